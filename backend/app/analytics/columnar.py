@@ -0,0 +1,287 @@
+"""Spaltenbasierte In-Memory-Snapshots der Buchungen pro Konto (optional).
+
+Mit settings.analytics_enabled rechnen Zeitreihe, Einnahmen/Ausgaben,
+Monatsreports und Kreisdiagramm nicht mehr per SQL, sondern vektorisiert mit
+NumPy auf einem Snapshot des Kontos: created_at, amount (Cent, int64) und
+category_id als Arrays, aufsteigend nach Zeit sortiert.
+
+- Geladen wird beim ersten Zugriff auf ein Konto (eine Abfrage).
+- Neue Buchungen hängt der LedgerWriter nach dem Commit direkt an.
+- Jeder Zugriff vergleicht die Version des Snapshots mit Account.version. Bei
+  Abweichung (Änderung, Löschung, Import, anderer Worker-Prozess) wird neu geladen.
+- Archivierte Monate fließen als Tagessummen je Kategorie ein (ArchivedTotal).
+- Der Speicher ist über analytics_max_rows begrenzt; verdrängt wird das am
+  längsten nicht benutzte Konto (LRU).
+"""
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import date, datetime
+
+import numpy as np
+from sqlalchemy import func
+from sqlmodel import Session, select
+
+from backend.app.core.settings import settings
+from backend.app.db.models import Account, ArchivedTotal, Category, Transaction
+from backend.app.db.money import cents, from_cents, to_cents
+
+NO_CATEGORY = -1
+NO_CATEGORY_NAME = "(keine)"
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    version: int
+    created_at: np.ndarray  # datetime64[us], aufsteigend
+    amount: np.ndarray  # int64, Cent
+    category_id: np.ndarray  # int64, NO_CATEGORY für Buchungen ohne Kategorie
+
+    def __len__(self) -> int:
+        return len(self.amount)
+
+    @classmethod
+    def from_rows(cls, version: int, rows) -> "Snapshot":
+        """rows: Folge von (created_at, Cent, category_id)."""
+        created_at, amount, category_id = zip(*rows) if rows else ((), (), ())
+        return cls(
+            version,
+            np.array(created_at, dtype="datetime64[us]"),
+            np.array(amount, dtype=np.int64),
+            np.array([NO_CATEGORY if c is None else c for c in category_id], dtype=np.int64),
+        )
+
+    def appended(self, version: int, rows) -> "Snapshot":
+        new = Snapshot.from_rows(version, rows)
+        created_at = np.concatenate([self.created_at, new.created_at])
+        amount = np.concatenate([self.amount, new.amount])
+        category_id = np.concatenate([self.category_id, new.category_id])
+        # Rückdatierte Buchungen: Sortierung wiederherstellen
+        if len(self) and len(new) and new.created_at.min() < self.created_at[-1]:
+            order = np.argsort(created_at, kind="stable")
+            created_at, amount, category_id = created_at[order], amount[order], category_id[order]
+        return Snapshot(version, created_at, amount, category_id)
+
+    def _window(self, start: datetime, end: datetime) -> slice:
+        lo, hi = np.searchsorted(self.created_at, np.array([start, end], dtype="datetime64[us]"))
+        return slice(lo, hi)
+
+    def daily_closings(self) -> list[dict]:
+        if not len(self):
+            return []
+        days = self.created_at.astype("datetime64[D]")
+        closing = np.cumsum(self.amount)
+        # letzter Index jedes Tages
+        last = np.flatnonzero(np.append(days[1:] != days[:-1], True))
+        return [{"day": str(d), "balance": from_cents(c)} for d, c in zip(days[last], closing[last])]
+
+    def income_expense(self) -> dict:
+        a = self.amount
+        return {"income": from_cents(a[a > 0].sum()), "expense": from_cents(-a[a < 0].sum())}
+
+    def balance_before(self, day: date) -> float:
+        i = np.searchsorted(self.created_at, np.datetime64(day, "D").astype("datetime64[us]"))
+        return from_cents(self.amount[:i].sum())
+
+    def kpis(self, start: datetime, end: datetime) -> dict[str, tuple[float, float]]:
+        w = self._window(start, end)
+        amount = self.amount[w]
+        if not len(amount):
+            return {}
+        # sortiert nach Zeit -> Monate liegen zusammenhängend, reduceat summiert je Block
+        months, first = np.unique(self.created_at[w].astype("datetime64[M]"), return_index=True)
+        income = np.add.reduceat(np.where(amount > 0, amount, 0), first)
+        expense = np.add.reduceat(np.where(amount < 0, amount, 0), first)
+        return {str(m): (from_cents(i), from_cents(e)) for m, i, e in zip(months, income, expense)}
+
+    def spent_by_category(self, start: datetime, end: datetime, names: dict[int, str]) -> dict[str, list[dict]]:
+        w = self._window(start, end)
+        amount = self.amount[w]
+        neg = amount < 0
+        months = self.created_at[w][neg].astype("datetime64[M]")
+        groups, totals = _sum_by(-amount[neg], _month_category_key(months, self.category_id[w][neg]))
+
+        # Kategorien mit gleichem Namen zusammenfassen (wie GROUP BY name im SQL)
+        merged: dict[str, dict[str, int]] = {}
+        for group, total in zip(groups.tolist(), totals.tolist()):
+            key = str(np.datetime64(group >> 32, "M"))
+            name = names.get((group & 0xFFFFFFFF) - 1, NO_CATEGORY_NAME)
+            merged.setdefault(key, {})
+            merged[key][name] = merged[key].get(name, 0) + total
+        return {
+            key: [{"category": n, "spent": from_cents(t)} for n, t in sorted(by_name.items(), key=lambda x: -x[1])]
+            for key, by_name in merged.items()
+        }
+
+    def category_totals(self, tx_type: str, names: dict[int, str]) -> list[dict]:
+        mask = self.amount < 0 if tx_type == "expense" else self.amount > 0
+        groups, totals = _sum_by(np.abs(self.amount[mask]), self.category_id[mask])
+        by_name: dict[str, int] = {}
+        for category_id, total in zip(groups.tolist(), totals.tolist()):
+            name = names.get(category_id, NO_CATEGORY_NAME)
+            by_name[name] = by_name.get(name, 0) + total
+        return [
+            {"category": n, "total": from_cents(t)} for n, t in sorted(by_name.items(), key=lambda x: -x[1])
+        ]
+
+
+def _sum_by(values: np.ndarray, keys: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Summiert values je Schlüssel (exakt in int64): sortieren, dann blockweise reduceat."""
+    if not len(values):
+        return keys[:0], values[:0]
+    order = np.argsort(keys, kind="stable")
+    keys, values = keys[order], values[order]
+    groups, first = np.unique(keys, return_index=True)
+    return groups, np.add.reduceat(values, first)
+
+
+def _month_category_key(months: np.ndarray, category_id: np.ndarray) -> np.ndarray:
+    # Monat (seit 1970) in die oberen 32 Bit, category_id + 1 (>= 0) in die unteren
+    return (months.astype(np.int64) << 32) | (category_id + 1)
+
+
+def _version(session: Session, account_id: int) -> int:
+    return session.exec(
+        select(func.coalesce(Account.version, 0)).where(Account.id == account_id)
+    ).first() or 0
+
+
+def _load(session: Session, account_id: int, version: int) -> Snapshot:
+    # Archivierte Monate als Tagessummen je Kategorie (Einnahmen und Ausgaben getrennt)
+    archived = session.exec(
+        select(ArchivedTotal.day, cents(ArchivedTotal.income), cents(ArchivedTotal.expense), ArchivedTotal.category_id)
+        .where(ArchivedTotal.account_id == account_id)
+        .order_by(ArchivedTotal.day)
+    ).all()
+    rows = session.exec(
+        select(Transaction.created_at, cents(Transaction.amount), Transaction.category_id)
+        .where(Transaction.account_id == account_id)
+        .order_by(Transaction.created_at, Transaction.id)
+    ).all()
+    base = Snapshot.from_rows(version, [
+        (datetime.combine(r.day, datetime.min.time()), amount, r.category_id)
+        for r in archived
+        for amount in (r[1], r[2]) if amount
+    ])
+    return base.appended(version, rows)
+
+
+class SnapshotStore:
+    """LRU-Cache der Snapshots, begrenzt auf max_rows Buchungen insgesamt."""
+
+    def __init__(self, max_rows: int):
+        self.max_rows = max_rows
+        self._snapshots: OrderedDict[int, Snapshot] = OrderedDict()
+        self._rows = 0
+        self._lock = threading.Lock()
+
+    def get(self, session: Session, account_id: int) -> Snapshot:
+        # Version zuerst lesen: kommt zwischendurch eine Buchung dazu, ist der
+        # Snapshot höchstens neuer als seine Version und wird beim nächsten Mal neu geladen
+        version = _version(session, account_id)
+        with self._lock:
+            snapshot = self._snapshots.get(account_id)
+            if snapshot is not None and snapshot.version == version:
+                self._snapshots.move_to_end(account_id)
+                return snapshot
+        snapshot = _load(session, account_id, version)
+        self._put(account_id, snapshot)
+        return snapshot
+
+    def _put(self, account_id: int, snapshot: Snapshot) -> None:
+        with self._lock:
+            old = self._snapshots.pop(account_id, None)
+            if old is not None:
+                self._rows -= len(old)
+            if len(snapshot) > self.max_rows:
+                return  # passt allein nicht ins Budget: nur für diesen Aufruf benutzen
+            self._snapshots[account_id] = snapshot
+            self._rows += len(snapshot)
+            while self._rows > self.max_rows:
+                _, evicted = self._snapshots.popitem(last=False)
+                self._rows -= len(evicted)
+
+    def prepare(self, session: Session, created: list[Transaction], modified: set[int]) -> list[tuple]:
+        """Vor dem Commit (nach bump_versions) aufrufen: merkt sich die neuen Versionen
+        der zwischengespeicherten Konten und die anzuhängenden Zeilen.
+
+        Kostet nur dann eine Abfrage, wenn eines der Konten gerade im Speicher liegt.
+        """
+        accounts = {tx.account_id for tx in created} | modified
+        with self._lock:
+            cached = [a for a in accounts if a in self._snapshots]
+        if not cached:
+            return []
+        versions = dict(session.exec(
+            select(Account.id, func.coalesce(Account.version, 0)).where(Account.id.in_(cached))
+        ).all())
+        return [
+            (
+                account_id,
+                versions.get(account_id, 0),
+                # Änderungen/Löschungen lassen sich nicht anhängen -> neu laden
+                None if account_id in modified else [
+                    (tx.created_at, to_cents(tx.amount), tx.category_id)
+                    for tx in created if tx.account_id == account_id
+                ],
+            )
+            for account_id in cached
+        ]
+
+    def apply(self, pending: list[tuple]) -> None:
+        """Nach dem Commit: neue Buchungen anhängen, sonst den Snapshot verwerfen."""
+        for account_id, version, rows in pending:
+            with self._lock:
+                snapshot = self._snapshots.get(account_id)
+            # Nur wenn genau unser Commit dazwischen liegt, ist Anhängen korrekt
+            if snapshot is not None and rows is not None and snapshot.version == version - 1:
+                self._put(account_id, snapshot.appended(version, rows))
+            else:
+                self.invalidate(account_id)
+
+    def invalidate(self, account_id: int) -> None:
+        with self._lock:
+            old = self._snapshots.pop(account_id, None)
+            if old is not None:
+                self._rows -= len(old)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._snapshots.clear()
+            self._rows = 0
+
+
+store = SnapshotStore(settings.analytics_max_rows)
+
+
+def category_names(session: Session) -> dict[int, str]:
+    return dict(session.exec(select(Category.id, Category.name)).all())
+
+
+# --- Gegenstücke zu den SQL-Helfern in api/accounts.py und api/reports.py ---
+
+def daily_closings(session: Session, account_id: int, start: date | None = None, end: date | None = None) -> list[dict]:
+    points = store.get(session, account_id).daily_closings()
+    if start is not None or end is not None:
+        # ISO-Datum als String vergleicht sich chronologisch
+        lo, hi = str(start or date.min), str(end or date.max)
+        points = [p for p in points if lo <= p["day"] <= hi]
+    return points
+
+
+def income_expense(session: Session, account_id: int) -> dict:
+    return store.get(session, account_id).income_expense()
+
+
+def chart_data(session: Session, account_id: int, tx_type: str) -> list[dict]:
+    return store.get(session, account_id).category_totals(tx_type, category_names(session))
+
+
+def period_parts(session: Session, account_id: int, start: datetime, end: datetime) -> tuple:
+    """(kpis, by_category, Startsaldo) für reports._assemble."""
+    snapshot = store.get(session, account_id)
+    return (
+        snapshot.kpis(start, end),
+        snapshot.spent_by_category(start, end, category_names(session)),
+        snapshot.balance_before(start.date()),
+    )
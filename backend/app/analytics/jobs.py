@@ -0,0 +1,310 @@
+"""Report-Jobs im Hintergrund mit zwischengespeichertem Ergebnis.
+
+Schwere Auswertungen (alle Konten, lange Zeiträume, komplette Historie) laufen
+nicht im Request, sondern in einem Thread-Pool (settings.jobs_workers). Der
+Request legt nur einen Job an und kehrt sofort zurück; der Client fragt dann
+/jobs/{id} bzw. /jobs/{id}/result ab. So hält ein langer Report nie eine
+Pool-Verbindung, die interaktive Requests brauchen, und es laufen höchstens
+jobs_workers Reports gleichzeitig.
+
+Jobs und Ergebnisse liegen in einer eigenen lokalen SQLite-Datei
+(settings.jobs_database_url), nicht in der App-Datenbank. Mehrere Worker-Prozesse
+auf demselben Host teilen sie sich.
+
+Gültigkeit eines Ergebnisses:
+- TTL (settings.jobs_result_ttl), danach Status "expired".
+- Fingerprint der Datenversionen der betroffenen Konten (wie die ETags, siehe
+  api/caching.py), festgehalten vor dem Rechnen. Jeder Schreibzugriff auf ein
+  betroffenes Konto zählt dessen Version hoch; das Ergebnis gilt dann als
+  "stale" und wird nicht mehr ausgeliefert. Ein Job über alle Konten wird auch
+  durch neue Konten ungültig.
+Gleiche Anfragen (Art + Parameter) teilen sich einen laufenden Job bzw. ein
+noch gültiges Ergebnis.
+"""
+import hashlib
+import json
+import logging
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+from sqlalchemy import Column, DateTime, Index, MetaData, String, Table, Text, delete, func, insert, update
+from sqlmodel import Session, select
+
+from backend.app.core.settings import settings
+from backend.app.db.database import engine, make_engine
+from backend.app.db.models import Account, DailyBalance
+from backend.app.db.money import from_cents, to_cents
+
+log = logging.getLogger("backend.jobs")
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+EXPIRED, STALE = "expired", "stale"  # nur beim Lesen berechnet
+
+_metadata = MetaData()
+report_job = Table(
+    "report_job", _metadata,
+    Column("id", String(32), primary_key=True),
+    Column("kind", String(50), nullable=False),
+    Column("params", Text, nullable=False),  # JSON, Schlüssel sortiert
+    Column("status", String(10), nullable=False),
+    Column("fingerprint", String(64)),
+    Column("created_at", DateTime, nullable=False),
+    Column("started_at", DateTime),
+    Column("finished_at", DateTime),
+    Column("expires_at", DateTime),
+    Column("result", Text),  # JSON
+    Column("error", Text),
+    Index("ix_report_job_kind_params", "kind", "params"),
+)
+
+
+# --- Report-Arten ---
+# Jede Art bekommt eine Session auf die App-Datenbank und die Parameter und
+# liefert etwas JSON-Serialisierbares. Die Abfragen sind dieselben wie in den
+# Endpunkten (api/reports.py, db/rollups.py).
+
+def _month_range(params: dict) -> tuple[int, int, int]:
+    year, month, months = int(params["year"]), int(params["month"]), int(params.get("months", 12))
+    if not (1 <= month <= 12 and 1 <= months <= 120):
+        raise ValueError("month muss 1-12 und months 1-120 sein")
+    return year, month, months
+
+
+def _account_ids(session: Session, params: dict) -> list[int]:
+    if params.get("account_id") is not None:
+        return [int(params["account_id"])]
+    return list(session.exec(select(Account.id).order_by(Account.id)).all())
+
+
+def range_report(session: Session, params: dict) -> dict:
+    """Monatsreports eines Kontos über viele Monate (wie /reports/range)."""
+    from backend.app.api import reports
+
+    year, month, months = _month_range(params)
+    account_id = int(params["account_id"])
+    return {"account_id": account_id, "months": reports._period_reports(session, account_id, year, month, months)}
+
+
+def category_breakdown(session: Session, params: dict) -> dict:
+    """Einnahmen, Ausgaben und Ausgaben nach Kategorie je Monat, summiert über alle (oder ein) Konto."""
+    from backend.app.api import reports
+
+    year, month, months = _month_range(params)
+    start, end = reports._bounds(year, month, months)
+    totals: dict[str, list[int]] = {}
+    spent: dict[tuple[str, str], int] = {}
+    accounts = _account_ids(session, params)
+    for account_id in accounts:
+        for key, (income, expense) in reports._kpis(session, account_id, start, end).items():
+            t = totals.setdefault(key, [0, 0])
+            t[0] += to_cents(income)
+            t[1] += to_cents(expense)
+        for key, items in reports._spent_by_category(session, account_id, start, end).items():
+            for item in items:
+                spent[(key, item["category"])] = spent.get((key, item["category"]), 0) + to_cents(item["spent"])
+
+    result = []
+    for i in range(months):
+        y, m = reports._add_months(year, month, i)
+        key = f"{y:04d}-{m:02d}"
+        income, expense = totals.get(key, (0, 0))
+        by_category = sorted(((c, v) for (k, c), v in spent.items() if k == key), key=lambda x: -x[1])
+        result.append({
+            "period": {"year": y, "month": m},
+            "kpis": {"income": from_cents(income), "expense": from_cents(-expense), "net": from_cents(income + expense)},
+            "by_category": [{"category": c, "spent": from_cents(v)} for c, v in by_category],
+        })
+    return {"accounts": len(accounts), "months": result}
+
+
+def timeseries(session: Session, params: dict) -> dict:
+    """Tagessalden über die komplette Historie; ohne account_id der Gesamtsaldo aller Konten."""
+    from backend.app.db import rollups
+
+    if params.get("account_id") is not None:
+        return {"account_id": int(params["account_id"]),
+                "points": rollups.daily_closings(session, int(params["account_id"]))}
+    rows = session.exec(
+        select(DailyBalance.day, func.sum(DailyBalance.delta)).group_by(DailyBalance.day).order_by(DailyBalance.day)
+    ).all()
+    points, closing = [], 0
+    for day, delta in rows:
+        closing += to_cents(delta)
+        points.append({"day": str(day), "balance": from_cents(closing)})
+    return {"account_id": None, "points": points}
+
+
+KINDS = {
+    "range_report": range_report,
+    "category_breakdown": category_breakdown,
+    "timeseries": timeseries,
+}
+
+
+def _check(kind: str, params: dict) -> None:
+    """Parameter schon beim Anlegen prüfen, nicht erst im Worker (ValueError -> 400)."""
+    if kind not in KINDS:
+        raise ValueError(f"Unbekannte Report-Art: {kind} (möglich: {', '.join(KINDS)})")
+    if kind == "range_report" and params.get("account_id") is None:
+        raise ValueError("range_report braucht account_id")
+    if kind in ("range_report", "category_breakdown"):
+        if params.get("year") is None or params.get("month") is None:
+            raise ValueError(f"{kind} braucht year und month")
+        _month_range(params)
+
+
+# --- Job-Datenbank ---
+
+def _jobs_url() -> str:
+    url = settings.jobs_database_url
+    if url.startswith("sqlite:///./"):
+        url = f"sqlite:///{(Path(__file__).resolve().parents[3] / url.removeprefix('sqlite:///./')).as_posix()}"
+    return url
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def jobs_engine():
+    """Engine der Job-Datenbank; Tabelle wird beim ersten Zugriff angelegt (nicht beim App-Start)."""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = make_engine(_jobs_url())
+            _metadata.create_all(_engine)
+        return _engine
+
+
+def _now() -> datetime:
+    return datetime.utcnow()
+
+
+def _fingerprint(session: Session, params: dict) -> str:
+    """Datenversion der Konten, von denen der Report abhängt (vgl. api/caching.py)."""
+    if params.get("account_id") is not None:
+        version = session.exec(
+            select(func.coalesce(Account.version, 0)).where(Account.id == int(params["account_id"]))
+        ).first()
+        return f"a{params['account_id']}-v{version}"
+    rows = session.exec(select(Account.id, func.coalesce(Account.version, 0)).order_by(Account.id)).all()
+    return "all-" + hashlib.sha1(repr(rows).encode()).hexdigest()[:16]
+
+
+def _effective_status(job: dict, fingerprint: str | None) -> str:
+    if job["status"] != DONE:
+        return job["status"]
+    if job["expires_at"] is not None and job["expires_at"] <= _now():
+        return EXPIRED
+    if fingerprint is not None and job["fingerprint"] != fingerprint:
+        return STALE
+    return DONE
+
+
+def _public(job: dict, status: str) -> dict:
+    out = {k: job[k] for k in ("id", "kind", "status", "created_at", "started_at", "finished_at", "expires_at", "error")}
+    out["params"] = json.loads(job["params"])
+    out["status"] = status
+    return out
+
+
+# --- Ausführung ---
+
+_executor: ThreadPoolExecutor | None = None
+_executor_lock = threading.Lock()
+
+
+def _pool() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=settings.jobs_workers, thread_name_prefix="report-job")
+        return _executor
+
+
+def shutdown() -> None:
+    """Beim App-Ende: wartende Jobs verwerfen (sie bleiben "queued" und laufen nach jobs_timeout ab)."""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+
+
+def _json_default(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} ist nicht JSON-serialisierbar")
+
+
+def _run(job_id: str, kind: str, params: dict) -> None:
+    jobs = jobs_engine()
+    with jobs.begin() as conn:
+        conn.execute(update(report_job).where(report_job.c.id == job_id).values(status=RUNNING, started_at=_now()))
+    try:
+        with Session(engine) as session:
+            # Vor dem Rechnen: schreibt jemand währenddessen, ist das Ergebnis sofort "stale"
+            fingerprint = _fingerprint(session, params)
+            result = json.dumps(KINDS[kind](session, params), default=_json_default, ensure_ascii=False)
+        values = {"status": DONE, "fingerprint": fingerprint, "result": result,
+                  "expires_at": _now() + timedelta(seconds=settings.jobs_result_ttl)}
+    except Exception as e:
+        log.exception("Report-Job %s (%s) fehlgeschlagen", job_id, kind)
+        values = {"status": FAILED, "error": f"{type(e).__name__}: {e}"}
+    with jobs.begin() as conn:
+        conn.execute(update(report_job).where(report_job.c.id == job_id).values(finished_at=_now(), **values))
+
+
+def submit(kind: str, params: dict) -> dict:
+    """Legt einen Job an (oder liefert einen gleichen laufenden Job bzw. ein gültiges Ergebnis)."""
+    params = {k: v for k, v in params.items() if v is not None}
+    _check(kind, params)
+    key = json.dumps(params, sort_keys=True)
+    with Session(engine) as session:
+        fingerprint = _fingerprint(session, params)
+
+    jobs = jobs_engine()
+    now = _now()
+    stuck = now - timedelta(seconds=settings.jobs_timeout)
+    with jobs.begin() as conn:
+        conn.execute(delete(report_job).where(report_job.c.expires_at < now))
+        # Hängengebliebene Jobs (z.B. Prozess neu gestartet) nicht mehr als "läuft" werten
+        conn.execute(
+            update(report_job)
+            .where(report_job.c.status.in_([QUEUED, RUNNING]), report_job.c.created_at < stuck)
+            .values(status=FAILED, error="Zeitüberschreitung", finished_at=now)
+        )
+        candidates = conn.execute(
+            select(report_job)
+            .where(report_job.c.kind == kind, report_job.c.params == key)
+            .where(report_job.c.status.in_([QUEUED, RUNNING, DONE]))
+            .order_by(report_job.c.created_at.desc())
+        ).mappings().all()
+        for job in candidates:
+            status = _effective_status(job, fingerprint)
+            if status in (QUEUED, RUNNING, DONE):
+                return _public(job, status)
+
+        job_id = uuid.uuid4().hex
+        conn.execute(insert(report_job).values(id=job_id, kind=kind, params=key, status=QUEUED, created_at=now))
+    _pool().submit(_run, job_id, kind, params)
+    return {"id": job_id, "kind": kind, "params": params, "status": QUEUED, "created_at": now,
+            "started_at": None, "finished_at": None, "expires_at": None, "error": None}
+
+
+def get(job_id: str, with_result: bool = False) -> tuple[dict, object] | None:
+    """(Job, Ergebnis) mit aktuellem Status; das Ergebnis nur, wenn es noch gültig ist."""
+    with jobs_engine().connect() as conn:
+        job = conn.execute(select(report_job).where(report_job.c.id == job_id)).mappings().first()
+    if job is None:
+        return None
+    fingerprint = None
+    if job["status"] == DONE:
+        with Session(engine) as session:
+            fingerprint = _fingerprint(session, json.loads(job["params"]))
+    status = _effective_status(job, fingerprint)
+    result = json.loads(job["result"]) if with_result and status == DONE else None
+    return _public(job, status), result
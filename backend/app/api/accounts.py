@@ -1,15 +1,20 @@
-from fastapi import APIRouter, Depends
+from datetime import date
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, Query, Response
 from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from backend.app.db.models import Account, AccountCreate
-from backend.app.db.session import get_session
+from backend.app.db.models import Account, AccountCreate, DailyBalance
+from backend.app.db.session import get_async_session
+from backend.app.api.caching import account_etag, all_accounts_etag
+from backend.app.api.encoding import FORMAT_QUERY, Format, render
+from backend.app.db import archive, downsample, rollups
+from backend.app.core.settings import settings
 
 from sqlalchemy import func, case
 from backend.app.db.models import Transaction
-
-from sqlalchemy import func, case
-from sqlmodel import select
-from backend.app.db.models import Transaction
+from backend.app.db.money import from_cents, to_cents
 
 
 
@@ -17,37 +22,62 @@ from backend.app.db.models import Transaction
 
 router = APIRouter(tags=["accounts"])
 
+# Die Routen sind async und laufen über die AsyncSession. Die eigentlichen
+# Abfragen stecken in synchronen Helfern (_...), die per run_sync ausgeführt
+# werden – so nutzen auch Skripte und der Plan-Check dieselben Queries.
+
 @router.post("/", response_model=Account)
-def create_account(payload: AccountCreate, session: Session = Depends(get_session)):
+async def create_account(payload: AccountCreate, session: AsyncSession = Depends(get_async_session)):
     acc = Account(name=payload.name, currency=payload.currency)
     session.add(acc)
-    session.commit()
-    session.refresh(acc)
+    await session.commit()
+    await session.refresh(acc)
     return acc
 
-@router.get("/", response_model=list[Account])
-def list_accounts(session: Session = Depends(get_session)):
-    return session.exec(select(Account)).all()
-
-@router.get("/{account_id}/balance")
-def get_account_balance(account_id: int, session: Session = Depends(get_session)):
-    total = session.exec(
-        select(func.coalesce(func.sum(Transaction.amount), 0))
-        .where(Transaction.account_id == account_id)
-    ).one()
-    return {"account_id": account_id, "balance": float(total)}
-
-@router.get("/balances")
-def get_all_balances(session: Session = Depends(get_session)):
+@router.get("/", response_model=list[Account], dependencies=[Depends(all_accounts_etag)])
+async def list_accounts(session: AsyncSession = Depends(get_async_session)):
+    return (await session.exec(select(Account))).all()
+
+@router.get("/{account_id}/version")
+async def get_account_version(account_id: int, session: AsyncSession = Depends(get_async_session)):
+    """Aktuelle Datenversion des Kontos – ändert sich nach jedem Schreibzugriff auf seine Buchungen."""
+    version = (await session.exec(select(Account.version).where(Account.id == account_id))).first()
+    return {"account_id": account_id, "version": version or 0}
+
+@router.get("/{account_id}/balance", dependencies=[Depends(account_etag)])
+async def get_account_balance(
+    account_id: int,
+    as_of: Optional[date] = Query(None, description="Kontostand am Ende dieses Tages statt aktuell"),
+    session: AsyncSession = Depends(get_async_session),
+):
+    # Das Tages-Rollup ist der Checkpoint: Schreibzugriffe (auch rückdatierte
+    # Änderungen und Löschungen) halten die Tagessalden aktuell, siehe db/ledger.py
+    if as_of is None:
+        total = await session.run_sync(rollups.current_balance, account_id)
+        return {"account_id": account_id, "balance": total}
+    total = await session.run_sync(rollups.balance_as_of, account_id, as_of)
+    return {"account_id": account_id, "as_of": str(as_of), "balance": total}
+
+def _all_balances(session: Session) -> list[dict]:
+    # Letzter Tag pro Konto im Rollup = aktueller Kontostand
+    last_day = (
+        select(DailyBalance.account_id, func.max(DailyBalance.day).label("day"))
+        .group_by(DailyBalance.account_id)
+        .subquery()
+    )
     rows = session.exec(
         select(
             Account.id,
             Account.name,
             Account.currency,
-            func.coalesce(func.sum(Transaction.amount), 0).label("balance"),
+            func.coalesce(DailyBalance.closing, 0).label("balance"),
+        )
+        .join(last_day, last_day.c.account_id == Account.id, isouter=True)
+        .join(
+            DailyBalance,
+            (DailyBalance.account_id == last_day.c.account_id) & (DailyBalance.day == last_day.c.day),
+            isouter=True,
         )
-        .join(Transaction, Transaction.account_id == Account.id, isouter=True)
-        .group_by(Account.id)
     ).all()
 
     return [
@@ -55,49 +85,66 @@ def get_all_balances(session: Session = Depends(get_session)):
             "account_id": r.id,
             "account": r.name,
             "currency": r.currency,
-            "balance": float(r.balance),
+            "balance": r.balance,
         }
         for r in rows
     ]
 
-@router.get("/{account_id}/timeseries")
-def account_timeseries(account_id: int, session: Session = Depends(get_session)):
-    rows = session.exec(
-        select(
-            func.date(Transaction.created_at).label("day"),
-            func.sum(Transaction.amount).label("delta"),
-        )
-        .where(Transaction.account_id == account_id)
-        .group_by(func.date(Transaction.created_at))
-        .order_by(func.date(Transaction.created_at))
-    ).all()
-
-    # kumulativer Saldo
-    balance = 0.0
-    series = []
-    for r in rows:
-        balance += float(r.delta)
-        series.append({"day": str(r.day), "balance": round(balance, 2)})
-
-    return series
-
-@router.get("/{account_id}/income-expense")
-def income_expense(account_id: int, session: Session = Depends(get_session)):
+BALANCE_FIELDS = ("account_id", "account", "currency", "balance")
+
+@router.get("/balances", dependencies=[Depends(all_accounts_etag)])
+async def get_all_balances(
+    response: Response, format: Format = FORMAT_QUERY, session: AsyncSession = Depends(get_async_session)
+):
+    return render(await session.run_sync(_all_balances), response, BALANCE_FIELDS, format)
+
+@router.get("/{account_id}/timeseries", dependencies=[Depends(account_etag)])
+async def account_timeseries(
+    account_id: int,
+    response: Response,
+    resolution: Literal["auto", "day", "week", "month"] = "auto",
+    max_points: int = Query(downsample.DEFAULT_MAX_POINTS, ge=10, le=100_000),
+    date_from: Optional[date] = Query(None, alias="from"),
+    date_to: Optional[date] = Query(None, alias="to"),
+    format: Format = FORMAT_QUERY,
+    session: AsyncSession = Depends(get_async_session),
+):
+    """Kontostand-Verlauf, höchstens max_points Punkte (siehe db/downsample.py).
+
+    auto wählt die feinste Auflösung, die in max_points passt; die verwendete
+    steht im Header X-Resolution. from/to begrenzen auf Tage (beide inklusive).
+    """
+    if settings.analytics_enabled:
+        from backend.app.analytics import columnar  # lädt numpy, nur mit Snapshots
+
+        points = await session.run_sync(columnar.daily_closings, account_id, date_from, date_to)
+    else:
+        # Tagessalden kommen fertig kumuliert aus dem Rollup
+        points = await session.run_sync(rollups.daily_closings, account_id, date_from, date_to)
+    points, used = downsample.resample(points, resolution, max_points)
+    response.headers["X-Resolution"] = used
+    return render(points, response, ("day", "balance"), format)
+
+def _income_expense(session: Session, account_id: int) -> dict:
     rows = session.exec(
         select(
             func.sum(case((Transaction.amount > 0, Transaction.amount), else_=0)).label("income"),
             func.sum(case((Transaction.amount < 0, Transaction.amount), else_=0)).label("expense"),
         ).where(Transaction.account_id == account_id)
     ).one()
+    archived_income, archived_expense = archive.totals(session, account_id)
 
     return {
-        "income": round(float(rows.income or 0), 2),
-        "expense": round(abs(float(rows.expense or 0)), 2),
+        "income": from_cents(to_cents(rows.income or 0) + to_cents(archived_income)),
+        "expense": from_cents(-to_cents(rows.expense or 0) - to_cents(archived_expense)),
     }
 
-    return {
-        "income": round(float(rows.income or 0), 2),
-        "expense": round(abs(float(rows.expense or 0)), 2),
-    }
+@router.get("/{account_id}/income-expense", dependencies=[Depends(account_etag)])
+async def income_expense(account_id: int, session: AsyncSession = Depends(get_async_session)):
+    if settings.analytics_enabled:
+        from backend.app.analytics import columnar
+
+        return await session.run_sync(columnar.income_expense, account_id)
+    return await session.run_sync(_income_expense, account_id)
 
 #--------------------------------------------------------------------------------------------------------
@@ -0,0 +1,58 @@
+"""ETag / Conditional GET über die Datenversion der Konten.
+
+Die Abhängigkeiten hier laufen vor dem eigentlichen Endpunkt. Sie lesen nur die
+Version des Kontos (ein Primärschlüssel-Zugriff). Schickt der Client die
+passende ETag in If-None-Match, wird direkt mit 304 geantwortet, ohne dass die
+Buchungen angefasst werden.
+
+Einbinden per: @router.get(..., dependencies=[Depends(account_etag)])
+
+Die Prüfung nutzt eine eigene, sofort wieder geschlossene Session, damit der
+Request nicht während des ganzen Endpunkts eine Pool-Verbindung festhält.
+"""
+import hashlib
+
+from fastapi import HTTPException, Request, Response
+from sqlalchemy import func
+from sqlmodel import select
+
+from backend.app.db.models import Account
+from backend.app.db.session import AsyncSessionLocal
+
+
+def _matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    # Schwacher Vergleich: W/-Präfix spielt keine Rolle
+    tags = {t.strip().removeprefix("W/") for t in header.split(",")}
+    return "*" in tags or etag.removeprefix("W/") in tags
+
+
+def _conditional(request: Request, response: Response, etag: str) -> None:
+    if _matches(request, etag):
+        raise HTTPException(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    # Darf gespeichert werden, muss aber jedes Mal per ETag bestätigt werden
+    response.headers["Cache-Control"] = "private, no-cache"
+
+
+async def account_etag(request: Request, response: Response, account_id: int):
+    """ETag für Endpunkte, deren Antwort nur von den Buchungen eines Kontos abhängt."""
+    async with AsyncSessionLocal() as session:
+        version = (await session.exec(
+            select(func.coalesce(Account.version, 0)).where(Account.id == account_id)
+        )).first()
+    if version is None:
+        return  # unbekanntes Konto: nichts cachen
+    _conditional(request, response, f'W/"a{account_id}-v{version}"')
+
+
+async def all_accounts_etag(request: Request, response: Response):
+    """ETag über alle Konten (Liste, Salden): ändert sich mit jeder Version und jedem neuen Konto."""
+    async with AsyncSessionLocal() as session:
+        rows = (await session.exec(
+            select(Account.id, func.coalesce(Account.version, 0)).order_by(Account.id)
+        )).all()
+    digest = hashlib.sha1(repr(rows).encode()).hexdigest()[:16]
+    _conditional(request, response, f'W/"all-{digest}"')
@@ -1,6 +1,9 @@
-from fastapi import APIRouter, Depends
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, HTTPException
 from sqlmodel import Session, select
-from backend.app.db.models import Category
+from backend.app.db import rules
+from backend.app.db.models import Category, CategoryRule, CategoryRuleCreate
 from backend.app.db.session import get_session
 
 # Prefix weglassen, da es in der main.py definiert wird!
@@ -17,4 +20,50 @@ def create_category(category: Category, session: Session = Depends(get_session))
     session.add(category)
     session.commit()
     session.refresh(category)
-    return category
\ No newline at end of file
+    return category
+
+# --- Regeln für die automatische Kategorisierung (siehe db/rules.py) ---
+
+def _validated(session: Session, payload: CategoryRuleCreate) -> CategoryRuleCreate:
+    if session.get(Category, payload.category_id) is None:
+        raise HTTPException(status_code=404, detail="Kategorie nicht gefunden")
+    if payload.min_amount is not None and payload.max_amount is not None and payload.min_amount > payload.max_amount:
+        raise HTTPException(status_code=400, detail="min_amount ist größer als max_amount")
+    return payload
+
+@router.get("/rules", response_model=list[CategoryRule])
+def list_rules(session: Session = Depends(get_session)):
+    return session.exec(select(CategoryRule).order_by(CategoryRule.priority.desc(), CategoryRule.id)).all()
+
+@router.post("/rules", response_model=CategoryRule)
+def create_rule(payload: CategoryRuleCreate, session: Session = Depends(get_session)):
+    rule = CategoryRule(**_validated(session, payload).model_dump())
+    session.add(rule)
+    session.commit()
+    session.refresh(rule)
+    return rule
+
+@router.put("/rules/{rule_id}", response_model=CategoryRule)
+def update_rule(rule_id: int, payload: CategoryRuleCreate, session: Session = Depends(get_session)):
+    rule = session.get(CategoryRule, rule_id)
+    if rule is None:
+        raise HTTPException(status_code=404, detail="Regel nicht gefunden")
+    rule.sqlmodel_update(_validated(session, payload).model_dump())
+    rule.updated_at = datetime.utcnow()
+    session.add(rule)
+    session.commit()
+    session.refresh(rule)
+    return rule
+
+@router.delete("/rules/{rule_id}")
+def delete_rule(rule_id: int, session: Session = Depends(get_session)):
+    rule = session.get(CategoryRule, rule_id)
+    if rule:
+        session.delete(rule)
+        session.commit()
+    return {"status": "gelöscht"}
+
+@router.post("/rules/apply")
+def apply_rules(account_id: int | None = None, overwrite: bool = False, session: Session = Depends(get_session)):
+    """Wendet die Regeln auf bestehende Buchungen an (ohne overwrite nur auf unkategorisierte)."""
+    return rules.recategorise(session, account_id=account_id, overwrite=overwrite).as_dict()
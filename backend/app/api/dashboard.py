@@ -0,0 +1,73 @@
+from fastapi import APIRouter, Depends, Query
+from sqlmodel import Session, select
+from sqlalchemy import case, func
+
+from backend.app.db.session import run_concurrently
+from backend.app.api.caching import account_etag
+from backend.app.db import archive, downsample, rollups
+from backend.app.db.models import Transaction, Category
+from backend.app.db.money import from_cents, to_cents
+
+router = APIRouter(tags=["dashboard"])
+
+
+def _category_totals(session: Session, account_id: int) -> list:
+    """Einnahmen und Ausgaben je Kategorie in einem gruppierten Durchlauf."""
+    category = func.coalesce(Category.name, "(keine)")
+    rows = session.exec(
+        select(
+            category.label("category"),
+            func.sum(case((Transaction.amount > 0, Transaction.amount), else_=0)).label("income"),
+            func.sum(case((Transaction.amount < 0, -Transaction.amount), else_=0)).label("expense"),
+        )
+        .select_from(Transaction)
+        .join(Category, Category.id == Transaction.category_id, isouter=True)
+        .where(Transaction.account_id == account_id)
+        .group_by(category)
+    ).all()
+
+    # Archiv-Summen haben Ausgaben negativ, hier werden sie positiv gezählt
+    archived = [
+        archive.CategoryTotal(r.category, r.income, -r.expense) for r in archive.category_totals(session, account_id)
+    ]
+    if not archived:
+        return rows
+    return archive.merge_category_totals(rows, archived)
+
+
+def _overview(account_id: int, timeseries: list[dict], rows: list) -> dict:
+    income = sorted(
+        ({"category": r.category, "total": r.income} for r in rows if r.income),
+        key=lambda r: r["total"], reverse=True,
+    )
+    expense = sorted(
+        ({"category": r.category, "total": r.expense} for r in rows if r.expense),
+        key=lambda r: r["total"], reverse=True,
+    )
+
+    return {
+        "account_id": account_id,
+        "timeseries": timeseries,
+        "income_by_category": income,
+        "expense_by_category": expense,
+        "income_expense": {
+            "income": from_cents(sum(to_cents(r["total"]) for r in income)),
+            "expense": from_cents(sum(to_cents(r["total"]) for r in expense)),
+        },
+    }
+
+
+@router.get("/overview", dependencies=[Depends(account_etag)])
+async def overview(account_id: int, max_points: int = Query(downsample.DEFAULT_MAX_POINTS, ge=10, le=100_000)):
+    """Alle Daten der Übersichtsseite in einem Aufruf.
+
+    Zeitreihe aus dem Tages-Rollup (auf max_points ausgedünnt), dazu ein
+    einziger gruppierter Durchlauf über die Buchungen, aus dem beide
+    Kreisdiagramme und die Summen entstehen. Beide Abfragen laufen gleichzeitig.
+    """
+    timeseries, rows = await run_concurrently(
+        (rollups.daily_closings, account_id),
+        (_category_totals, account_id),
+    )
+    timeseries, _ = downsample.resample(timeseries, "auto", max_points)
+    return _overview(account_id, timeseries, rows)
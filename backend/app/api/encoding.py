@@ -0,0 +1,64 @@
+"""Schnelle JSON-Antworten und Spaltenformat.
+
+- JSONResponse serialisiert mit orjson und ist in main.py die
+  default_response_class aller Routen.
+- render() baut die Antwort einer Listen-Route direkt. FastAPI schickt sonst
+  jeden Rückgabewert erst durch jsonable_encoder bzw. die Pydantic-Validierung
+  des response_model, bei tausenden Zeilen teurer als das Encoding selbst.
+  Header, die Route oder Abhängigkeiten am Response-Parameter gesetzt haben
+  (ETag, X-Next-Cursor), werden übernommen.
+- ?format=columns liefert statt einer Liste von Objekten ein Objekt mit
+  parallelen Arrays ({"day": [...], "balance": [...]}). Die Feldnamen stehen
+  nur einmal in der Antwort, und pandas/Plotly nehmen das Format direkt.
+  Routen mit Modell dokumentieren beide Formen per list_responses(Modell)
+  statt response_model.
+
+Komprimiert wird in main.py per GZipMiddleware (ab settings.gzip_min_size).
+"""
+from typing import Any, Iterable, Literal
+
+import orjson
+from fastapi import Query, Response
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel, create_model
+
+Format = Literal["rows", "columns"]
+
+# Für Listen-Routen: format: Format = FORMAT_QUERY
+FORMAT_QUERY = Query("rows", description="rows: Liste von Objekten, columns: parallele Arrays je Feld")
+
+
+class JSONResponse(ORJSONResponse):
+    def render(self, content: Any) -> bytes:
+        # numpy-Werte kommen aus den Snapshots (analytics/columnar.py)
+        return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+
+
+def list_responses(model: type[BaseModel]) -> dict:
+    """OpenAPI-Beschreibung einer Listen-Route: Liste von model oder (format=columns) ein Array je Feld."""
+    columns_model = create_model(
+        f"{model.__name__}Columns",
+        **{name: (list[field.annotation], ...) for name, field in model.model_fields.items()},
+    )
+    return {200: {"model": list[model] | columns_model, "description": "format=rows: Liste, format=columns: parallele Arrays"}}
+
+
+def _value(row, field: str):
+    return row[field] if isinstance(row, dict) else getattr(row, field)
+
+
+def columns(rows: Iterable, fields: Iterable[str]) -> dict[str, list]:
+    """Zeilen (dicts, SQLModel-Objekte oder Result-Rows) als parallele Arrays."""
+    rows = list(rows)
+    return {field: [_value(r, field) for r in rows] for field in fields}
+
+
+def render(rows: list, response: Response, fields: Iterable[str], format: Format = "rows") -> JSONResponse:
+    """Listen-Antwort ohne jsonable_encoder. fields legt die Spalten fest, auch bei leerer Liste."""
+    if format == "columns":
+        content = columns(rows, fields)
+    elif rows and not isinstance(rows[0], dict):
+        content = [{field: getattr(r, field) for field in fields} for r in rows]
+    else:
+        content = rows
+    return JSONResponse(content, headers=dict(response.headers))
@@ -0,0 +1,49 @@
+import asyncio
+
+import orjson
+from fastapi import APIRouter, Request
+from fastapi.responses import StreamingResponse
+
+from backend.app.core import events
+from backend.app.core.settings import settings
+
+# Prefix weglassen, da es in der main.py definiert wird!
+router = APIRouter()
+
+
+def _frame(event: dict) -> str:
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {orjson.dumps(event).decode()}\n\n"
+
+
+@router.get("/")
+async def stream_events(request: Request, account_id: int | None = None):
+    """Server-Sent Events: ein "account"-Event pro Commit und betroffenem Konto.
+
+    Ohne account_id kommen die Events aller Konten. Bei "resync" hat der
+    Client Events verpasst und sollte einmal alles neu laden. Zwischendurch
+    hält eine Kommentarzeile (": ping") die Verbindung offen.
+    """
+    subscription = events.broker.subscribe(account_id)
+
+    async def body():
+        try:
+            # Browser (EventSource) verbinden sich nach einem Abbruch nach 3 s neu
+            yield "retry: 3000\n\n"
+            while True:
+                try:
+                    event = await asyncio.wait_for(subscription.queue.get(), timeout=settings.events_heartbeat)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield ": ping\n\n"
+                    continue
+                yield _frame(event)
+        finally:
+            events.broker.unsubscribe(subscription)
+
+    return StreamingResponse(
+        body(),
+        media_type="text/event-stream",
+        # X-Accel-Buffering: nginx soll die Events nicht puffern
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
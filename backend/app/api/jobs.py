@@ -0,0 +1,60 @@
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, Field
+from sqlmodel import Session
+
+from backend.app.analytics import jobs
+from backend.app.db.models import Account
+from backend.app.db.session import get_session
+
+# Prefix weglassen, da es in der main.py definiert wird!
+router = APIRouter()
+
+
+class ReportJobCreate(BaseModel):
+    kind: str  # range_report, category_breakdown, timeseries
+    account_id: int | None = None  # ohne: alle Konten (nicht bei range_report)
+    year: int | None = None
+    month: int | None = Field(default=None, ge=1, le=12)
+    months: int | None = Field(default=None, ge=1, le=120)
+
+
+@router.post("/", status_code=202)
+def submit_job(payload: ReportJobCreate, session: Session = Depends(get_session)):
+    """Legt einen Report-Job an und kehrt sofort zurück (Status per GET /jobs/{id}).
+
+    Gleiche Anfragen bekommen den laufenden Job bzw. das noch gültige Ergebnis
+    zurück, statt neu zu rechnen.
+    """
+    if payload.account_id is not None and session.get(Account, payload.account_id) is None:
+        raise HTTPException(status_code=404, detail="Konto nicht gefunden")
+    params = payload.model_dump(exclude={"kind"}, exclude_none=True)
+    try:
+        return jobs.submit(payload.kind, params)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/{job_id}")
+def get_job(job_id: str):
+    """Status: queued, running, done, failed, expired (TTL abgelaufen) oder stale (Daten haben sich geändert)."""
+    found = jobs.get(job_id)
+    if found is None:
+        raise HTTPException(status_code=404, detail="Job nicht gefunden")
+    return found[0]
+
+
+@router.get("/{job_id}/result")
+def get_job_result(job_id: str):
+    """Ergebnis (200), noch nicht fertig (202), fehlgeschlagen (500) oder nicht mehr gültig (410, neu anlegen)."""
+    found = jobs.get(job_id, with_result=True)
+    if found is None:
+        raise HTTPException(status_code=404, detail="Job nicht gefunden")
+    job, result = found
+    if job["status"] == jobs.DONE:
+        return result
+    if job["status"] in (jobs.QUEUED, jobs.RUNNING):
+        return JSONResponse(status_code=202, content={"id": job_id, "status": job["status"]}, headers={"Retry-After": "1"})
+    if job["status"] == jobs.FAILED:
+        raise HTTPException(status_code=500, detail=job["error"])
+    raise HTTPException(status_code=410, detail=f"Ergebnis nicht mehr gültig ({job['status']})")
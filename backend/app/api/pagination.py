@@ -0,0 +1,49 @@
+"""Keyset-Pagination über (created_at, id).
+
+Der Cursor ist ein undurchsichtiger String mit created_at und id der letzten
+Zeile einer Seite. Die nächste Seite beginnt direkt dahinter, ohne OFFSET –
+dadurch kostet jede Seite gleich viel, egal wie weit hinten sie liegt.
+"""
+import base64
+from datetime import datetime
+
+from fastapi import HTTPException, Response
+from sqlalchemy import tuple_
+
+from backend.app.db.models import Transaction
+
+DEFAULT_PAGE_SIZE = 500
+MAX_PAGE_SIZE = 5000
+
+# Header, in dem der Cursor für die nächste Seite zurückgegeben wird
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(created_at: datetime, tx_id: int) -> str:
+    raw = f"{created_at.isoformat()}|{tx_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, tx_id = base64.urlsafe_b64decode(padded).decode().split("|")
+        return datetime.fromisoformat(created_at), int(tx_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Ungültiger Cursor")
+
+
+def paginate(query, cursor: str | None, limit: int):
+    """Sortiert nach (created_at, id), setzt auf den Cursor auf und holt eine Zeile mehr als nötig."""
+    if cursor:
+        query = query.where(tuple_(Transaction.created_at, Transaction.id) > tuple_(*decode_cursor(cursor)))
+    return query.order_by(Transaction.created_at, Transaction.id).limit(limit + 1)
+
+
+def page(rows: list, limit: int, response: Response) -> list:
+    """Schneidet die Zusatzzeile ab und setzt den Cursor-Header, falls es weitergeht."""
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(last.created_at, last.id)
+    return rows
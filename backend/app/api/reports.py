@@ -1,90 +1,186 @@
 from datetime import datetime
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, Response
 from sqlmodel import Session, select
-from sqlalchemy import func
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy import case, func
 
-from backend.app.db.session import get_session
-from backend.app.db.models import Transaction, Category
+from backend.app.db.session import AsyncSessionLocal, get_async_session, run_concurrently
+from backend.app.api.caching import account_etag
+from backend.app.api.encoding import FORMAT_QUERY, Format, render
+from backend.app.db import archive, rollups
+from backend.app.core.settings import settings
+from backend.app.db.models import ArchivedTotal, Transaction, Category
+from backend.app.db.money import from_cents, to_cents
 
 router = APIRouter(tags=["reports"])
 
 
-@router.get("/monthly")
-def monthly_report(
-    account_id: int = Query(..., ge=1),
-    year: int = Query(..., ge=2000),
-    month: int = Query(..., ge=1, le=12),
-    session: Session = Depends(get_session),
-):
-    # Zeitraum [start, end)
-    start = datetime(year, month, 1)
-    end = datetime(year + 1, 1, 1) if month == 12 else datetime(year, month + 1, 1)
+def _add_months(year: int, month: int, n: int) -> tuple[int, int]:
+    idx = year * 12 + (month - 1) + n
+    return idx // 12, idx % 12 + 1
 
-    # Totals (income/expense) im Zeitraum
-    income = session.exec(
-        select(func.coalesce(func.sum(Transaction.amount), 0))
-        .where(Transaction.account_id == account_id)
-        .where(Transaction.created_at >= start)
-        .where(Transaction.created_at < end)
-        .where(Transaction.amount > 0)
-    ).one()
 
-    expense = session.exec(
-        select(func.coalesce(func.sum(Transaction.amount), 0))
+def _month_key(session: Session, column):
+    """Monat als 'YYYY-MM' – je nach Datenbank mit eigener Funktion."""
+    if session.get_bind().dialect.name == "postgresql":
+        return func.to_char(column, "YYYY-MM")
+    return func.strftime("%Y-%m", column)
+
+
+def _kpis(session: Session, account_id: int, start: datetime, end: datetime) -> dict[str, tuple[float, float]]:
+    """Einnahmen und Ausgaben pro Monat ('YYYY-MM') in einem Durchlauf (bedingte Aggregation)."""
+    month_col = _month_key(session, Transaction.created_at)
+    rows = session.exec(
+        select(
+            month_col.label("month"),
+            func.sum(case((Transaction.amount > 0, Transaction.amount), else_=0)).label("income"),
+            func.sum(case((Transaction.amount < 0, Transaction.amount), else_=0)).label("expense"),
+        )
         .where(Transaction.account_id == account_id)
         .where(Transaction.created_at >= start)
         .where(Transaction.created_at < end)
-        .where(Transaction.amount < 0)
-    ).one()
+        .group_by(month_col)
+    ).all()
+    kpis = {r.month: (r.income or 0.0, r.expense or 0.0) for r in rows}
 
-    # Monats-Balance-Delta = income + expense (expense ist negativ)
-    net = float(income) + float(expense)
+    # Archivierte Monate aus den Summenzeilen dazunehmen
+    for r in archive.month_totals(session, account_id, _month_key(session, ArchivedTotal.day), start, end):
+        income, expense = kpis.get(r.month, (0.0, 0.0))
+        kpis[r.month] = (
+            from_cents(to_cents(income) + to_cents(r.income)),
+            from_cents(to_cents(expense) + to_cents(r.expense)),
+        )
+    return kpis
 
-    # Kontostand bis Monatsende (kumuliert bis end)
-    balance_end = session.exec(
-        select(func.coalesce(func.sum(Transaction.amount), 0))
-        .where(Transaction.account_id == account_id)
-        .where(Transaction.created_at < end)
-    ).one()
 
-    # Ausgaben nach Kategorie (positive Beträge für Darstellung)
+def _spent_by_category(session: Session, account_id: int, start: datetime, end: datetime) -> dict[str, list[dict]]:
+    """Ausgaben nach Kategorie pro Monat (positive Beträge für Darstellung)."""
+    month_col = _month_key(session, Transaction.created_at)
+    category = func.coalesce(Category.name, "(keine)")
+    spent = func.coalesce(func.sum(-Transaction.amount), 0)
     rows = session.exec(
-        select(
-            func.coalesce(Category.name, "(keine)").label("category"),
-            func.coalesce(func.sum(-Transaction.amount), 0).label("spent"),
-        )
+        select(month_col.label("month"), category.label("category"), spent.label("spent"))
         .select_from(Transaction)
         .join(Category, Category.id == Transaction.category_id, isouter=True)
         .where(Transaction.account_id == account_id)
         .where(Transaction.created_at >= start)
         .where(Transaction.created_at < end)
         .where(Transaction.amount < 0)
-        .group_by(func.coalesce(Category.name, "(keine)"))
-        .order_by(func.coalesce(func.sum(-Transaction.amount), 0).desc())
+        .group_by(month_col, category)
+        .order_by(month_col, spent.desc())
     ).all()
+    by_category: dict[str, list[dict]] = {}
+    for r in rows:
+        by_category.setdefault(r.month, []).append({"category": r.category, "spent": r.spent})
+
+    archived = [
+        r for r in archive.category_totals(session, account_id, _month_key(session, ArchivedTotal.day), start, end)
+        if r.expense
+    ]
+    if not archived:
+        return by_category
+    # Mit dem Archiv zusammenführen und je Monat neu sortieren
+    spent_cents = {(m, c["category"]): to_cents(c["spent"]) for m, items in by_category.items() for c in items}
+    for r in archived:
+        spent_cents[(r.month, r.category)] = spent_cents.get((r.month, r.category), 0) - to_cents(r.expense)
+    by_category = {}
+    for (m, category), total in sorted(spent_cents.items(), key=lambda x: (x[0][0], -x[1])):
+        by_category.setdefault(m, []).append({"category": category, "spent": from_cents(total)})
+    return by_category
+
+
+def _assemble(year: int, month: int, months: int, kpis: dict, by_category: dict, opening: float) -> list[dict]:
+    # Kontostand am Monatsende = Saldo vor dem Zeitraum + bisherige Monats-Deltas
+    # (in Cent gerechnet, damit sich über viele Monate kein Rundungsfehler aufaddiert)
+    balance_end = to_cents(opening)
+    reports = []
+    for i in range(months):
+        y, m = _add_months(year, month, i)
+        key = f"{y:04d}-{m:02d}"
+        income, expense = kpis.get(key, (0.0, 0.0))
+        # Monats-Balance-Delta = income + expense (expense ist negativ)
+        net = to_cents(income) + to_cents(expense)
+        balance_end += net
+        reports.append({
+            "period": {"year": y, "month": m},
+            "kpis": {
+                "income": income,
+                "expense": abs(expense),  # als positive Zahl
+                "net": from_cents(net),
+                "balance_end": from_cents(balance_end),
+            },
+            "by_category": by_category.get(key, []),
+        })
+    return reports
+
+
+def _bounds(year: int, month: int, months: int) -> tuple[datetime, datetime]:
+    return datetime(year, month, 1), datetime(*_add_months(year, month, months), 1)
+
+
+def _period_reports(session: Session, account_id: int, year: int, month: int, months: int) -> list[dict]:
+    """KPIs und Ausgaben nach Kategorie für `months` Monate ab year/month.
 
-    by_category = [{"category": r.category, "spent": float(r.spent)} for r in rows]
+    Unabhängig von der Anzahl Monate genau drei Abfragen: KPIs per bedingter
+    Aggregation, Kategorien gruppiert nach Monat und der Startsaldo aus dem Rollup.
+    """
+    start, end = _bounds(year, month, months)
+    return _assemble(
+        year, month, months,
+        _kpis(session, account_id, start, end),
+        _spent_by_category(session, account_id, start, end),
+        rollups.balance_before(session, account_id, start.date()),
+    )
 
+
+def _period_reports_columnar(session: Session, account_id: int, year: int, month: int, months: int) -> list[dict]:
+    """Wie _period_reports, aber vektorisiert auf dem Spalten-Snapshot des Kontos."""
+    from backend.app.analytics import columnar  # lädt numpy, nur mit Snapshots
+
+    start, end = _bounds(year, month, months)
+    return _assemble(year, month, months, *columnar.period_parts(session, account_id, start, end))
+
+
+async def _period_reports_async(account_id: int, year: int, month: int, months: int) -> list[dict]:
+    """Wie _period_reports, aber die drei Abfragen laufen gleichzeitig."""
+    if settings.analytics_enabled:
+        async with AsyncSessionLocal() as session:
+            return await session.run_sync(_period_reports_columnar, account_id, year, month, months)
+    start, end = _bounds(year, month, months)
+    kpis, by_category, opening = await run_concurrently(
+        (_kpis, account_id, start, end),
+        (_spent_by_category, account_id, start, end),
+        (rollups.balance_before, account_id, start.date()),
+    )
+    return _assemble(year, month, months, kpis, by_category, opening)
+
+
+@router.get("/monthly", dependencies=[Depends(account_etag)])
+async def monthly_report(
+    account_id: int = Query(..., ge=1),
+    year: int = Query(..., ge=2000),
+    month: int = Query(..., ge=1, le=12),
+):
+    report = (await _period_reports_async(account_id, year, month, 1))[0]
+    return {"account_id": account_id, **report}
+
+
+@router.get("/range", dependencies=[Depends(account_etag)])
+async def range_report(
+    account_id: int = Query(..., ge=1),
+    year: int = Query(..., ge=2000),
+    month: int = Query(..., ge=1, le=12),
+    months: int = Query(12, ge=1, le=120),
+):
+    """Monatsreports für `months` aufeinanderfolgende Monate ab year/month in einem Aufruf."""
     return {
         "account_id": account_id,
-        "period": {"year": year, "month": month},
-        "kpis": {
-            "income": float(income),
-            "expense": abs(float(expense)),  # als positive Zahl
-            "net": net,
-            "balance_end": float(balance_end),
-        },
-        "by_category": by_category,
+        "months": await _period_reports_async(account_id, year, month, months),
     }
 
 # --- NEU: Endpunkt für das Kreisdiagramm ---
-@router.get("/chart-data")
-def chart_data(
-    account_id: int = Query(..., ge=1),
-    tx_type: str = Query("expense"),  # NEU: Unterscheidet Einnahmen und Ausgaben
-    session: Session = Depends(get_session)
-):
-    # """Liefert die aggregierten Daten für das Diagramm (Einnahmen oder Ausgaben)."""
+def _chart_data(session: Session, account_id: int, tx_type: str) -> list[dict]:
+    """Liefert die aggregierten Daten für das Diagramm (Einnahmen oder Ausgaben)."""
     
     # Entscheiden, ob wir nach Plus- oder Minus-Beträgen suchen
     if tx_type == "expense":
@@ -107,4 +203,35 @@ def chart_data(
         .order_by(func.coalesce(func.sum(amount_col), 0).desc())
     ).all()
 
-    return [{"category": r.category, "total": float(r.total)} for r in rows]
\ No newline at end of file
+    result = [{"category": r.category, "total": r.total} for r in rows]
+
+    archived = [
+        (r.category, -r.expense if tx_type == "expense" else r.income)
+        for r in archive.category_totals(session, account_id)
+    ]
+    archived = [(category, total) for category, total in archived if total]
+    if not archived:
+        return result
+    totals = {r["category"]: to_cents(r["total"]) for r in result}
+    for category, total in archived:
+        totals[category] = totals.get(category, 0) + to_cents(total)
+    return [
+        {"category": c, "total": from_cents(t)} for c, t in sorted(totals.items(), key=lambda x: -x[1])
+    ]
+
+
+@router.get("/chart-data", dependencies=[Depends(account_etag)])
+async def chart_data(
+    response: Response,
+    account_id: int = Query(..., ge=1),
+    tx_type: str = Query("expense"),  # NEU: Unterscheidet Einnahmen und Ausgaben
+    format: Format = FORMAT_QUERY,
+    session: AsyncSession = Depends(get_async_session)
+):
+    if settings.analytics_enabled:
+        from backend.app.analytics import columnar
+
+        rows = await session.run_sync(columnar.chart_data, account_id, tx_type)
+    else:
+        rows = await session.run_sync(_chart_data, account_id, tx_type)
+    return render(rows, response, ("category", "total"), format)
@@ -1,10 +1,23 @@
-from fastapi import APIRouter, Depends
+import csv
+import io
+import json
+import tempfile
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy.exc import IntegrityError
 from sqlmodel import Session, select
 
+from backend.app.api.caching import account_etag
+from backend.app.api.encoding import FORMAT_QUERY, Format, list_responses, render
+from backend.app.api.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, page, paginate
+from backend.app.db import search
 from backend.app.db.models import Transaction, TransactionCreate
-from backend.app.db.session import get_session
+from backend.app.db.session import engine, get_session
+from backend.app.db.ledger import LedgerWriter
+from backend.app.importer.pipeline import import_rows, parse_stream
 
-from datetime import datetime
+from datetime import date, datetime, time, timedelta
 from fastapi import Query
 
 router = APIRouter(tags=["transactions"])
@@ -12,44 +25,189 @@ router = APIRouter(tags=["transactions"])
 
 @router.post("/", response_model=Transaction)
 def create_tx(payload: TransactionCreate, session: Session = Depends(get_session)):
-    tx = Transaction(**payload.model_dump())
-    session.add(tx)
-    session.commit()
+    ledger = LedgerWriter(session)
+    tx = ledger.create(payload)
+    ledger.commit()
     session.refresh(tx)
     return tx
 
 
-@router.get("/", response_model=list[Transaction])
-def list_txs(session: Session = Depends(get_session)):
-    return session.exec(select(Transaction)).all()
+# Felder der Listen-Antworten, in der Reihenfolge des Modells. Die Listen lesen
+# nur die Spalten (ohne ORM-Objekte), render() macht daraus JSON.
+TRANSACTION_FIELDS = tuple(Transaction.model_fields)
+_COLUMNS = [Transaction.__table__.c[field] for field in TRANSACTION_FIELDS]
 
-from datetime import datetime
-from fastapi import Query
 
-@router.get("/filter")
-def filter_transactions(
-    account_id: int,
-    year: int = Query(..., ge=2000),
-    month: int = Query(None, ge=1, le=12),
+@router.get("/", response_model=None, responses=list_responses(Transaction))
+def list_txs(
+    response: Response,
+    account_id: int | None = None,
+    cursor: str | None = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    format: Format = FORMAT_QUERY,
     session: Session = Depends(get_session),
 ):
+    """Listet Buchungen seitenweise. Gibt es weitere, steht der Cursor im Header X-Next-Cursor."""
+    query = select(*_COLUMNS)
+    if account_id is not None:
+        query = query.where(Transaction.account_id == account_id)
+    rows = session.exec(paginate(query, cursor, limit)).all()
+    return render(page(rows, limit, response), response, TRANSACTION_FIELDS, format)
+
+
+def _period(year: int | None, month: int | None) -> tuple[datetime, datetime] | None:
+    """Zeitraum [start, end) für ein Jahr oder einen einzelnen Monat."""
+    if year is None:
+        return None
     start = datetime(year, month or 1, 1)
     if month:
         end = datetime(year, month + 1, 1) if month < 12 else datetime(year + 1, 1, 1)
     else:
         end = datetime(year + 1, 1, 1)
+    return start, end
+
+
+@router.get("/filter", response_model=None, responses=list_responses(Transaction), dependencies=[Depends(account_etag)])
+def filter_transactions(
+    account_id: int,
+    response: Response,
+    year: int = Query(..., ge=2000),
+    month: int = Query(None, ge=1, le=12),
+    cursor: str | None = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    format: Format = FORMAT_QUERY,
+    session: Session = Depends(get_session),
+):
+    start, end = _period(year, month)
 
-    rows = session.exec(
-        select(Transaction)
+    query = (
+        select(*_COLUMNS)
         .where(Transaction.account_id == account_id)
         .where(Transaction.created_at >= start)
         .where(Transaction.created_at < end)
-        .order_by(Transaction.created_at)
-    ).all()
+    )
+    rows = session.exec(paginate(query, cursor, limit)).all()
+
+    return render(page(rows, limit, response), response, TRANSACTION_FIELDS, format)
+
+
+MAX_SEARCH_LIMIT = 200
+# Header mit dem offset der nächsten Trefferseite (Ranking lässt sich nicht per Keyset blättern)
+NEXT_OFFSET_HEADER = "X-Next-Offset"
+
+
+@router.get("/search", response_model=None, responses=list_responses(Transaction))
+def search_transactions(
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=200),
+    account_id: int | None = None,
+    date_from: date | None = None,
+    date_to: date | None = None,
+    category_id: int | None = None,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=MAX_SEARCH_LIMIT),
+    format: Format = FORMAT_QUERY,
+    session: Session = Depends(get_session),
+):
+    """Volltextsuche in den Notizen, beste Treffer zuerst. date_from/date_to sind inklusive."""
+    words = search.terms(q)
+    if not words:
+        raise HTTPException(status_code=400, detail="Suchbegriff enthält keine Wörter")
+    rows = search.search(
+        session, words, account_id=account_id,
+        start=datetime.combine(date_from, time.min) if date_from else None,
+        end=datetime.combine(date_to + timedelta(days=1), time.min) if date_to else None,
+        category_id=category_id, offset=offset, limit=limit + 1,
+    )
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers[NEXT_OFFSET_HEADER] = str(offset + limit)
+    return render(rows, response, TRANSACTION_FIELDS, format)
+
+
+EXPORT_FIELDS = ["id", "account_id", "created_at", "amount", "category_id", "note"]
+EXPORT_BATCH = 1000
+
+
+def _export_rows(account_id: int, period: tuple[datetime, datetime] | None):
+    """Liest die Buchungen über einen serverseitigen Cursor in Blöcken von EXPORT_BATCH Zeilen.
+
+    Die Session gehört dem Generator, weil sie bis zum Ende des Streams offen bleiben muss.
+    """
+    query = select(*(getattr(Transaction, f) for f in EXPORT_FIELDS)).where(Transaction.account_id == account_id)
+    if period:
+        query = query.where(Transaction.created_at >= period[0]).where(Transaction.created_at < period[1])
+    query = query.order_by(Transaction.created_at, Transaction.id).execution_options(yield_per=EXPORT_BATCH)
+
+    with Session(engine) as session:
+        for partition in session.exec(query).partitions():
+            yield partition
 
-    return rows
 
-from pydantic import BaseModel
+def _ndjson(account_id, period):
+    for rows in _export_rows(account_id, period):
+        yield "".join(
+            json.dumps({**r._asdict(), "created_at": r.created_at.isoformat()}, ensure_ascii=False) + "\n"
+            for r in rows
+        )
+
+
+def _csv(account_id, period):
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(EXPORT_FIELDS)
+    for rows in _export_rows(account_id, period):
+        writer.writerows(rows)
+        yield buf.getvalue()
+        buf.seek(0)
+        buf.truncate()
+    # Header auch bei leerem Export
+    if buf.tell():
+        yield buf.getvalue()
+
+
+@router.get("/export")
+def export_transactions(
+    account_id: int,
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    year: int = Query(None, ge=2000),
+    month: int = Query(None, ge=1, le=12),
+):
+    """Exportiert die Buchungen eines Kontos als NDJSON oder CSV-Stream mit konstantem Speicherbedarf."""
+    period = _period(year, month)
+    if format == "csv":
+        return StreamingResponse(
+            _csv(account_id, period),
+            media_type="text/csv",
+            headers={"Content-Disposition": f'attachment; filename="buchungen_{account_id}.csv"'},
+        )
+    return StreamingResponse(_ndjson(account_id, period), media_type="application/x-ndjson")
+
+def _run_import(stream, account_id: int, fmt: str, encoding: str) -> dict:
+    with Session(engine) as session:
+        fmt, rows = parse_stream(stream, fmt, encoding)
+        return import_rows(session, account_id, rows, fmt).as_dict()
+
+
+@router.post("/import")
+async def import_statement(
+    request: Request,
+    account_id: int,
+    format: str = Query("auto", pattern="^(auto|csv|camt053|mt940)$"),
+    encoding: str = "utf-8-sig",
+):
+    """Importiert einen Kontoauszug (Datei als Request-Body) in Blöcken, Dubletten werden übersprungen."""
+    # Body erst zwischenspeichern (große Dateien auf Platte), dann synchron im Threadpool parsen
+    with tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024) as spool:
+        async for chunk in request.stream():
+            spool.write(chunk)
+        spool.seek(0)
+        try:
+            return await run_in_threadpool(_run_import, spool, account_id, format, encoding)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+from pydantic import BaseModel, Field
 
 # Ein kleines Hilfsmodell, um nur die veränderten Daten zu empfangen
 class TransactionUpdate(BaseModel):
@@ -57,13 +215,77 @@ class TransactionUpdate(BaseModel):
     note: str
     category_id: int | None = None
 
+
+# --- Batch: viele Änderungen, eine DB-Transaktion, ein Commit ---
+MAX_BATCH_SIZE = 5000
+
+
+class TransactionBatchUpdate(TransactionUpdate):
+    id: int
+
+
+class TransactionBatch(BaseModel):
+    create: list[TransactionCreate] = Field(default_factory=list, max_length=MAX_BATCH_SIZE)
+    update: list[TransactionBatchUpdate] = Field(default_factory=list, max_length=MAX_BATCH_SIZE)
+    delete: list[int] = Field(default_factory=list, max_length=MAX_BATCH_SIZE)
+
+
+@router.post("/batch")
+def batch_transactions(payload: TransactionBatch, session: Session = Depends(get_session)):
+    """Legt an, ändert und löscht viele Buchungen atomar.
+
+    Liefert pro Eintrag ein Ergebnis. Schlägt ein Eintrag fehl, wird nichts
+    gespeichert und die Ergebnisliste kommt mit Status 422 zurück.
+    """
+    ids = {item.id for item in payload.update} | set(payload.delete)
+    existing = {tx.id: tx for tx in session.exec(select(Transaction).where(Transaction.id.in_(ids)))} if ids else {}
+
+    ledger = LedgerWriter(session)
+    results = []
+    created = []
+    for index, item in enumerate(payload.create):
+        created.append(ledger.create(item))
+        results.append({"op": "create", "index": index, "status": "ok"})
+    for index, item in enumerate(payload.update):
+        tx = existing.get(item.id)
+        if tx is None:
+            results.append({"op": "update", "index": index, "id": item.id, "status": "error", "error": "Nicht gefunden"})
+            continue
+        ledger.update(tx, item.amount, item.note, item.category_id)
+        results.append({"op": "update", "index": index, "id": item.id, "status": "ok"})
+    for index, tx_id in enumerate(payload.delete):
+        tx = existing.pop(tx_id, None)
+        if tx is None:
+            results.append({"op": "delete", "index": index, "id": tx_id, "status": "error", "error": "Nicht gefunden"})
+            continue
+        ledger.delete(tx)
+        results.append({"op": "delete", "index": index, "id": tx_id, "status": "ok"})
+
+    if any(r["status"] == "error" for r in results):
+        session.rollback()
+        raise HTTPException(status_code=422, detail={"committed": False, "results": results})
+
+    try:
+        # IDs der neuen Buchungen stehen nach dem Flush fest (nach dem Commit wären sie expired)
+        session.flush()
+        for result, tx in zip(results, created):
+            result["id"] = tx.id
+        ledger.commit()
+    except IntegrityError as e:
+        session.rollback()
+        raise HTTPException(status_code=409, detail={"committed": False, "error": str(e.orig)})
+
+    return {"committed": True, "results": results}
+
+
 @router.delete("/{tx_id}")
 def delete_transaction(tx_id: int, session: Session = Depends(get_session)):
     """Löscht eine Buchung anhand ihrer ID."""
     tx = session.get(Transaction, tx_id)
     if tx:
-        session.delete(tx)
-        session.commit()
+        ledger = LedgerWriter(session)
+        ledger.delete(tx)
+        ledger.commit()
     return {"status": "gelöscht"}
 
 @router.put("/{tx_id}")
@@ -71,11 +293,9 @@ def update_transaction(tx_id: int, payload: TransactionUpdate, session: Session
     """Aktualisiert eine bestehende Buchung."""
     tx = session.get(Transaction, tx_id)
     if tx:
-        tx.amount = payload.amount
-        tx.note = payload.note
-        tx.category_id = payload.category_id
-        session.add(tx)
-        session.commit()
+        ledger = LedgerWriter(session)
+        ledger.update(tx, payload.amount, payload.note, payload.category_id)
+        ledger.commit()
         session.refresh(tx)
         return tx
     return {"error": "Nicht gefunden"}
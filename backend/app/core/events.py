@@ -0,0 +1,120 @@
+"""Änderungs-Events pro Konto für den SSE-Stream (/events).
+
+Nach jedem Commit, der Buchungen ändert (LedgerWriter.commit, Import), wird
+pro betroffenem Konto ein Event veröffentlicht:
+    {"id": 7, "type": "account", "account_id": 1, "version": 42, "balance": 1234.56, "months": ["2025-03"]}
+version ist dieselbe Datenversion wie in ETags und Snapshots; ein Client kann
+damit gezielt nur das nachladen, was sich geändert hat.
+
+Der Broker verteilt in-process: jeder Abonnent ist eine asyncio.Queue auf dem
+Event-Loop, jede SSE-Verbindung eine Coroutine – kein Thread pro Verbindung.
+publish() darf aus jedem Thread kommen (sync-Routen laufen im Threadpool) und
+übergibt per call_soon_threadsafe an den Loop. Ohne Abonnenten kostet ein
+Commit nichts, auch Saldo und Version werden dann nicht gelesen.
+
+Wer nicht hinterherkommt (Queue voll, settings.events_queue_size), verliert
+seine ausstehenden Events und bekommt stattdessen ein "resync": einmal alles
+neu laden. Mehrere Worker-Prozesse teilen sich die Events nicht; ein Client
+sieht nur Änderungen, die über seinen Worker geschrieben wurden.
+"""
+import asyncio
+import itertools
+import threading
+from collections import defaultdict
+from dataclasses import dataclass, field
+
+from sqlalchemy import func
+from sqlmodel import Session, select
+
+from backend.app.core.settings import settings
+from backend.app.db import rollups
+from backend.app.db.models import Account
+
+ALL = None  # Abonnement auf alle Konten
+
+
+@dataclass(eq=False)
+class Subscription:
+    account_id: int | None
+    queue: asyncio.Queue = field(default_factory=lambda: asyncio.Queue(maxsize=settings.events_queue_size))
+
+
+class Broker:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers: dict[int | None, set[Subscription]] = defaultdict(set)
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._ids = itertools.count(1)
+        self._count = 0
+
+    @property
+    def active(self) -> bool:
+        return self._count > 0
+
+    def subscribe(self, account_id: int | None = ALL) -> Subscription:
+        """Im Event-Loop aufrufen; mit unsubscribe() wieder abmelden."""
+        subscription = Subscription(account_id)
+        with self._lock:
+            self._loop = asyncio.get_running_loop()
+            self._subscribers[account_id].add(subscription)
+            self._count += 1
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            subscribers = self._subscribers[subscription.account_id]
+            if subscription in subscribers:
+                subscribers.discard(subscription)
+                self._count -= 1
+            if not subscribers:
+                del self._subscribers[subscription.account_id]
+
+    def publish(self, events: list[dict]) -> None:
+        """Thread-sicher; vergibt fortlaufende ids und verteilt im Event-Loop."""
+        loop = self._loop
+        if not events or loop is None or loop.is_closed():
+            return
+        events = [{"id": next(self._ids), **event} for event in events]
+        loop.call_soon_threadsafe(self._fan_out, events)
+
+    def _fan_out(self, events: list[dict]) -> None:
+        with self._lock:
+            targets = {
+                event["id"]: list(self._subscribers.get(event["account_id"], set()) | self._subscribers.get(ALL, set()))
+                for event in events
+            }
+        for event in events:
+            for subscription in targets[event["id"]]:
+                try:
+                    subscription.queue.put_nowait(event)
+                except asyncio.QueueFull:
+                    # Zu langsam: Rückstand verwerfen, Client lädt einmal komplett neu
+                    while not subscription.queue.empty():
+                        subscription.queue.get_nowait()
+                    subscription.queue.put_nowait({"id": event["id"], "type": "resync"})
+
+
+broker = Broker()
+
+
+def collect(session: Session, months: dict[int, set[str]]) -> list[dict]:
+    """Events für die geänderten Konten, vor dem Commit in derselben Transaktion gelesen.
+
+    months: Konto -> betroffene Monate ('YYYY-MM'). Gibt es keine Abonnenten,
+    wird nichts abgefragt.
+    """
+    if not months or not broker.active:
+        return []
+    versions = dict(session.exec(
+        select(Account.id, func.coalesce(Account.version, 0)).where(Account.id.in_(list(months)))
+    ).all())
+    return [
+        {
+            "type": "account",
+            "account_id": account_id,
+            "version": versions.get(account_id, 0),
+            "balance": rollups.current_balance(session, account_id),
+            "months": sorted(account_months),
+        }
+        for account_id, account_months in sorted(months.items())
+    ]
@@ -0,0 +1,201 @@
+"""Request-Metriken im Prometheus-Textformat.
+
+- MetricsMiddleware misst pro Route (Template, nicht konkrete URL) die Dauer
+  bis zum letzten Byte der Antwort, also inklusive Streaming.
+- Die SQLAlchemy-Events before/after_cursor_execute zählen SQL-Statements und
+  SQL-Zeit und ordnen sie über eine ContextVar dem laufenden Request zu. Das
+  klappt auch für sync-Routen im Threadpool, run_sync und run_concurrently,
+  weil diese den Kontext mitnehmen.
+- Statements über settings.slow_query_ms landen im Logger "backend.sql.slow"
+  und (die letzten SLOW_LOG_SIZE) in registry.slow_log.
+
+Eingebunden in main.py per app.add_middleware(MetricsMiddleware) und
+instrument(engine, async_engine.sync_engine); ausgegeben unter /metrics.
+"""
+import logging
+import threading
+import time
+from collections import defaultdict, deque
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from sqlalchemy import event
+
+from backend.app.core.settings import settings
+
+# Sekunden; grob von "aus dem Cache" bis "hängt"
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SQL_COUNT_BUCKETS = (0, 1, 2, 5, 10, 25, 50, 100, 250)
+SLOW_LOG_SIZE = 100
+
+slow_log = logging.getLogger("backend.sql.slow")
+
+
+@dataclass
+class RequestStats:
+    statements: int = 0
+    sql_seconds: float = 0.0
+
+
+_current: ContextVar[RequestStats | None] = ContextVar("request_stats", default=None)
+
+
+class _Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.total += 1
+        self.sum += value
+
+    def lines(self, name: str, labels: str) -> list[str]:
+        out, cumulative = [], 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            out.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+        out.append(f'{name}_bucket{{{labels},le="+Inf"}} {self.total}')
+        out.append(f"{name}_sum{{{labels}}} {self.sum:.6f}")
+        out.append(f"{name}_count{{{labels}}} {self.total}")
+        return out
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests: dict[tuple, int] = defaultdict(int)  # (method, route, status)
+        self.latency: dict[tuple, _Histogram] = {}  # (method, route)
+        self.sql_count: dict[tuple, _Histogram] = {}
+        self.sql_seconds: dict[tuple, float] = defaultdict(float)
+        self.slow_queries = 0
+        self.slow_log: deque = deque(maxlen=SLOW_LOG_SIZE)
+
+    def observe_request(self, method: str, route: str, status: int, seconds: float, stats: RequestStats) -> None:
+        key = (method, route)
+        with self._lock:
+            self.requests[(method, route, status)] += 1
+            self.latency.setdefault(key, _Histogram(LATENCY_BUCKETS)).observe(seconds)
+            self.sql_count.setdefault(key, _Histogram(SQL_COUNT_BUCKETS)).observe(stats.statements)
+            self.sql_seconds[key] += stats.sql_seconds
+
+    def observe_slow(self, statement: str, seconds: float) -> None:
+        with self._lock:
+            self.slow_queries += 1
+            self.slow_log.append({"ms": round(seconds * 1000, 1), "statement": statement})
+
+    def render(self, pools=()) -> str:
+        with self._lock:
+            lines = [
+                "# HELP http_requests_total Requests nach Route und Status.",
+                "# TYPE http_requests_total counter",
+            ]
+            for (method, route, status), n in sorted(self.requests.items()):
+                lines.append(f'http_requests_total{{method="{method}",route="{route}",status="{status}"}} {n}')
+
+            lines += [
+                "# HELP http_request_duration_seconds Dauer bis zum letzten Byte der Antwort.",
+                "# TYPE http_request_duration_seconds histogram",
+            ]
+            for (method, route), h in sorted(self.latency.items()):
+                lines += h.lines("http_request_duration_seconds", f'method="{method}",route="{route}"')
+
+            lines += [
+                "# HELP db_statements_per_request SQL-Statements pro Request.",
+                "# TYPE db_statements_per_request histogram",
+            ]
+            for (method, route), h in sorted(self.sql_count.items()):
+                lines += h.lines("db_statements_per_request", f'method="{method}",route="{route}"')
+
+            lines += [
+                "# HELP db_statement_seconds_total Summierte SQL-Zeit nach Route.",
+                "# TYPE db_statement_seconds_total counter",
+            ]
+            for (method, route), seconds in sorted(self.sql_seconds.items()):
+                lines.append(f'db_statement_seconds_total{{method="{method}",route="{route}"}} {seconds:.6f}')
+
+            lines += [
+                f"# HELP db_slow_queries_total Statements über {settings.slow_query_ms} ms.",
+                "# TYPE db_slow_queries_total counter",
+                f"db_slow_queries_total {self.slow_queries}",
+            ]
+
+        lines += [
+            "# HELP db_pool_checked_out Aktuell ausgeliehene Verbindungen je Engine.",
+            "# TYPE db_pool_checked_out gauge",
+        ]
+        for name, pool in pools:
+            checked_out = getattr(pool, "checkedout", None)
+            if checked_out is not None:
+                lines.append(f'db_pool_checked_out{{engine="{name}"}} {checked_out()}')
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+
+# --- SQL-Events ---
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # Am Ausführungskontext statt an der Verbindung: bei einem Fehler bleibt nichts liegen
+    context._metrics_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    seconds = time.perf_counter() - context._metrics_started
+    stats = _current.get()
+    if stats is not None:
+        stats.statements += 1
+        stats.sql_seconds += seconds
+    if seconds * 1000 >= settings.slow_query_ms:
+        registry.observe_slow(statement, seconds)
+        slow_log.warning("Langsame Abfrage (%.1f ms): %s", seconds * 1000, " ".join(statement.split()))
+
+
+def instrument(*engines) -> None:
+    """Hängt die Zähl-Events an die (sync-)Engines; für async: async_engine.sync_engine."""
+    for engine in engines:
+        if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+            event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+            event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+# --- Middleware ---
+
+class MetricsMiddleware:
+    """Reine ASGI-Middleware: misst bis zum Ende des Bodys, auch bei StreamingResponse."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _current.set(stats)
+        status = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+            route = scope.get("route")
+            # Nicht gematchte Pfade zusammenfassen, sonst wächst die Label-Menge unbegrenzt
+            registry.observe_request(
+                scope["method"], getattr(route, "path", "unmatched"), status,
+                time.perf_counter() - started, stats,
+            )
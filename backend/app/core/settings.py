@@ -6,12 +6,50 @@ class Settings(BaseSettings):
     database_url: str = "sqlite:///./dashboard.db"
     debug: bool = True
 
-model_config = SettingsConfigDict(
-    env_file=".env",
-    env_file_encoding="utf-8",
-    case_sensitive=False,
-    extra="ignore",
-)
+    # --- Datenbank-Engine (siehe backend/app/db/database.py) ---
+    db_echo: bool = False  # jedes SQL-Statement loggen, nur zum Debuggen
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: int = 30  # Sekunden warten auf eine freie Verbindung
+    db_pool_recycle: int = 1800  # Verbindungen nach 30 min erneuern (Neon & Co. trennen idle Verbindungen)
+    db_pool_pre_ping: bool = True
+    db_migrate_on_startup: bool = True  # false: Worker prüfen nur die Schema-Version (siehe init_db.py)
+
+    # --- SQLite-Pragmas, werden bei jeder neuen Verbindung gesetzt ---
+    sqlite_journal_mode: str = "WAL"  # Leser blockieren Schreiber nicht mehr
+    sqlite_synchronous: str = "NORMAL"  # im WAL-Modus sicher, spart ein fsync pro Commit
+    sqlite_mmap_size: int = 256 * 1024 * 1024
+    sqlite_cache_size: int = -64000  # negativ = KiB, also ~64 MB Page-Cache
+
+    # --- Spaltenbasierte Report-Snapshots im Speicher (siehe backend/app/analytics) ---
+    analytics_enabled: bool = False
+    analytics_max_rows: int = 2_000_000  # Buchungen über alle Konten, ~32 Byte pro Zeile
+
+    # --- Report-Jobs im Hintergrund (siehe backend/app/analytics/jobs.py, /jobs) ---
+    jobs_database_url: str = "sqlite:///./jobs.db"  # eigene lokale Datei, nicht die App-Datenbank
+    jobs_workers: int = 2  # so viele Reports laufen höchstens gleichzeitig
+    jobs_result_ttl: int = 900  # Sekunden, so lange bleibt ein Ergebnis abrufbar
+    jobs_timeout: int = 600  # Sekunden; ältere Jobs ohne Ergebnis gelten als abgebrochen
+
+    # --- Antworten (siehe backend/app/api/encoding.py) ---
+    gzip_min_size: int = 1024  # Bytes; kleinere Antworten lohnen das Komprimieren nicht
+
+    # --- Live-Events (siehe backend/app/core/events.py, /events) ---
+    events_queue_size: int = 100  # ausstehende Events pro Verbindung, danach "resync"
+    events_heartbeat: int = 15  # Sekunden; Kommentarzeile gegen Proxy-Timeouts
+
+    # --- Archiv abgeschlossener Monate (siehe backend/app/db/archive.py) ---
+    archive_dir: str = "./archive"  # relativ zum Projekt-Root
+
+    # --- Metriken (siehe backend/app/core/metrics.py, /metrics) ---
+    slow_query_ms: int = 200  # langsamere Statements werden geloggt
+
+    model_config = SettingsConfigDict(
+        env_file=".env",
+        env_file_encoding="utf-8",
+        case_sensitive=False,
+        extra="ignore",
+    )
 
 
 
@@ -0,0 +1,213 @@
+"""Archivierung abgeschlossener Monate nach Parquet.
+
+Buchungen vor einem Stichtag werden pro Konto und Monat als Parquet-Datei
+geschrieben (Hive-Layout: account_id=3/month=2023-01/part-....parquet), in der
+Tabelle durch Summenzeilen (ArchivedTotal pro Tag und Kategorie) ersetzt und
+aus "transaction" gelöscht. Das Tages-Rollup bleibt unverändert, Salden und
+Zeitreihe stimmen also weiter.
+
+Die Report-Helfer lesen die Summenzeilen über die Funktionen unten und addieren
+sie zu den Live-Daten. Werden später noch Buchungen in einen archivierten Monat
+gebucht, landen sie ganz normal in der Tabelle und werden beim nächsten Lauf
+als weitere Datei dazu archiviert.
+"""
+from dataclasses import asdict, dataclass
+from datetime import date, datetime
+from pathlib import Path
+from typing import NamedTuple
+
+from sqlalchemy import case, delete, func, insert
+from sqlmodel import Session, select
+
+from backend.app.core.settings import settings
+from backend.app.db.ledger import bump_versions
+from backend.app.db.models import Account, ArchivedTotal, Category, Transaction
+from backend.app.db.money import cents, from_cents, to_cents
+
+# account_id und month stecken im Pfad (Hive-Partitionen), nicht in der Datei:
+#   pyarrow.dataset.dataset(archive_root(), partitioning="hive")
+COLUMNS = ("id", "created_at", "amount", "note", "category_id", "import_hash")  # amount in Cent
+
+READ_BATCH = 10_000
+
+
+@dataclass
+class ArchiveResult:
+    account_id: int
+    cutoff: str
+    rows: int = 0
+    files: int = 0
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+def archive_root() -> Path:
+    root = Path(settings.archive_dir)
+    if not root.is_absolute():
+        root = Path(__file__).resolve().parents[3] / root
+    return root
+
+
+def _write_month(account_id: int, month: str, columns: dict[str, list], stamp: str) -> Path:
+    # pyarrow erst hier laden: die API importiert dieses Modul, braucht Parquet aber nie
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([
+        ("id", pa.int64()),
+        ("created_at", pa.timestamp("us")),
+        ("amount", pa.int64()),
+        ("note", pa.string()),
+        ("category_id", pa.int64()),
+        ("import_hash", pa.string()),
+    ])
+    directory = archive_root() / f"account_id={account_id}" / f"month={month}"
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"part-{stamp}.parquet"
+    pq.write_table(pa.table(columns, schema=schema), path)
+    return path
+
+
+def archive_account(session: Session, account_id: int, cutoff: date) -> ArchiveResult:
+    """Archiviert alle Buchungen des Kontos vor cutoff (erster Tag eines Monats) und committet.
+
+    Schlägt der Commit fehl, werden die geschriebenen Dateien wieder entfernt.
+    """
+    if cutoff.day != 1:
+        raise ValueError("cutoff muss der erste Tag eines Monats sein")
+    result = ArchiveResult(account_id=account_id, cutoff=cutoff.isoformat())
+    before = datetime.combine(cutoff, datetime.min.time())
+    in_scope = (Transaction.account_id == account_id, Transaction.created_at < before)
+    stamp = datetime.utcnow().strftime("%Y%m%dT%H%M%S%f")
+
+    query = (
+        select(
+            Transaction.id, Transaction.created_at, cents(Transaction.amount),
+            Transaction.note, Transaction.category_id, Transaction.import_hash,
+        )
+        .where(*in_scope)
+        .order_by(Transaction.created_at, Transaction.id)
+        .execution_options(yield_per=READ_BATCH)
+    )
+    written: list[Path] = []
+    try:
+        # Sortiert nach Zeit: ein Monat ist ein zusammenhängender Block
+        month, columns = None, None
+        for rows in session.exec(query).partitions():
+            for row in rows:
+                key = row.created_at.strftime("%Y-%m")
+                if key != month:
+                    if columns:
+                        written.append(_write_month(account_id, month, columns, stamp))
+                    month, columns = key, {name: [] for name in COLUMNS}
+                for name, value in zip(COLUMNS, row):
+                    columns[name].append(value)
+                result.rows += 1
+        if columns:
+            written.append(_write_month(account_id, month, columns, stamp))
+        result.files = len(written)
+        if not result.rows:
+            return result
+
+        amount = cents(Transaction.amount)
+        session.exec(
+            insert(ArchivedTotal).from_select(
+                ["account_id", "day", "category_id", "income", "expense", "count"],
+                select(
+                    Transaction.account_id,
+                    func.date(Transaction.created_at),
+                    Transaction.category_id,
+                    func.sum(case((amount > 0, amount), else_=0)),
+                    func.sum(case((amount < 0, amount), else_=0)),
+                    func.count(),
+                )
+                .where(*in_scope)
+                .group_by(Transaction.account_id, func.date(Transaction.created_at), Transaction.category_id),
+            )
+        )
+        session.exec(delete(Transaction).where(*in_scope))
+        account = session.get(Account, account_id)
+        if account.archived_until is None or account.archived_until < cutoff:
+            account.archived_until = cutoff
+            session.add(account)
+        # Die Zahlen bleiben gleich, aber Snapshots müssen die neue Quelle laden
+        bump_versions(session, [account_id])
+        session.commit()
+    except Exception:
+        session.rollback()
+        for path in written:
+            path.unlink(missing_ok=True)
+        raise
+    return result
+
+
+def archived_until(session: Session, account_id: int) -> date | None:
+    return session.exec(select(Account.archived_until).where(Account.id == account_id)).first()
+
+
+# --- Summen für die Report-Helfer ---
+
+class CategoryTotal(NamedTuple):
+    category: str
+    income: float
+    expense: float
+
+
+def totals(session: Session, account_id: int) -> tuple[float, float]:
+    """(income, expense) über alle archivierten Buchungen des Kontos."""
+    row = session.exec(
+        select(func.sum(ArchivedTotal.income), func.sum(ArchivedTotal.expense))
+        .where(ArchivedTotal.account_id == account_id)
+    ).one()
+    return row[0] or 0.0, row[1] or 0.0
+
+
+def _in_period(query, account_id: int, start: datetime | None, end: datetime | None):
+    query = query.where(ArchivedTotal.account_id == account_id)
+    if start is not None:
+        query = query.where(ArchivedTotal.day >= start.date())
+    if end is not None:
+        query = query.where(ArchivedTotal.day < end.date())
+    return query
+
+
+def month_totals(session: Session, account_id: int, month_col, start: datetime, end: datetime) -> list:
+    """(month, income, expense) je Monat; month_col ist reports._month_key(session, ArchivedTotal.day)."""
+    return session.exec(
+        _in_period(
+            select(month_col.label("month"), func.sum(ArchivedTotal.income).label("income"),
+                   func.sum(ArchivedTotal.expense).label("expense")),
+            account_id, start, end,
+        ).group_by(month_col)
+    ).all()
+
+
+def category_totals(session: Session, account_id: int, month_col=None,
+                    start: datetime | None = None, end: datetime | None = None) -> list:
+    """(category, income, expense) je Kategorie-Name, mit month_col zusätzlich je Monat."""
+    category = func.coalesce(Category.name, "(keine)")
+    columns = [category.label("category"), func.sum(ArchivedTotal.income).label("income"),
+               func.sum(ArchivedTotal.expense).label("expense")]
+    group_by = [category]
+    if month_col is not None:
+        columns.insert(0, month_col.label("month"))
+        group_by.insert(0, month_col)
+    return session.exec(
+        _in_period(
+            select(*columns)
+            .select_from(ArchivedTotal)
+            .join(Category, Category.id == ArchivedTotal.category_id, isouter=True),
+            account_id, start, end,
+        ).group_by(*group_by)
+    ).all()
+
+
+def merge_category_totals(live, archived) -> list[CategoryTotal]:
+    """Addiert Kategorie-Summen (Cent-genau) aus Tabelle und Archiv."""
+    merged: dict[str, list[int]] = {}
+    for r in (*live, *archived):
+        totals = merged.setdefault(r.category, [0, 0])
+        totals[0] += to_cents(r.income or 0)
+        totals[1] += to_cents(r.expense or 0)
+    return [CategoryTotal(name, from_cents(i), from_cents(e)) for name, (i, e) in merged.items()]
@@ -1,8 +1,16 @@
 from __future__ import annotations
 import os
 from pathlib import Path
-from sqlmodel import SQLModel, create_engine
+from dotenv import load_dotenv
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import create_engine
 from backend.app.core.settings import settings
+from backend.app.db import migrations
+
+# Lädt die .env Datei (für DATABASE_URL aus der Umgebung)
+load_dotenv()
 
 # 1. URL holen (Priorität: Render Umgebungsvariable > Settings > SQLite Fallback)
 DATABASE_URL = os.getenv("DATABASE_URL")
@@ -22,34 +30,108 @@ if DATABASE_URL:
     if DATABASE_URL.startswith("postgres://"):
         DATABASE_URL = DATABASE_URL.replace("postgres://", "postgresql://", 1)
 
-# --- DEBUGGING (Damit wir im Log sehen, was passiert) ---
-print(f"🔧 DB-Check: URL-Länge ist {len(str(DATABASE_URL)) if DATABASE_URL else 0}")
-if DATABASE_URL and "postgresql" in DATABASE_URL:
-    print("✅ Erkenne PostgreSQL URL")
-# -------------------------------------------------------
-
-# SQLite Konfiguration (Lokal)
-connect_args = {}
+# SQLite Konfiguration (Lokal): relative Pfade beziehen sich aufs Projekt-Root
 if DATABASE_URL and "sqlite" in DATABASE_URL:
     if DATABASE_URL.startswith("sqlite:///./"):
         base_dir = Path(__file__).resolve().parents[3]
         db_file = base_dir / DATABASE_URL.replace("sqlite:///./", "")
         DATABASE_URL = f"sqlite:///{db_file.as_posix()}"
-    connect_args = {"check_same_thread": False}
 
-# Engine erstellen
+
+def async_url(url: str):
+    """Baut aus der normalen URL die Async-Variante: aiosqlite lokal, asyncpg für PostgreSQL.
+
+    asyncpg kennt sslmode/channel_binding nicht als URL-Parameter (z.B. bei Neon),
+    sslmode wird deshalb als connect_args["ssl"] durchgereicht.
+    """
+    u = make_url(url)
+    connect_args = {}
+    if u.drivername.startswith("sqlite"):
+        u = u.set(drivername="sqlite+aiosqlite")
+    elif u.drivername.startswith("postgresql"):
+        query = dict(u.query)
+        sslmode = query.pop("sslmode", None)
+        query.pop("channel_binding", None)
+        if sslmode:
+            connect_args["ssl"] = sslmode
+        u = u.set(drivername="postgresql+asyncpg", query=query)
+    return u, connect_args
+
+
+def _is_memory_sqlite(url) -> bool:
+    return url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")
+
+
+def _pool_options(url) -> dict:
+    # SQLite im Speicher hat keinen echten Pool (eine Verbindung pro Thread)
+    if _is_memory_sqlite(url):
+        return {}
+    return {
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout,
+        "pool_recycle": settings.db_pool_recycle,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+    }
+
+
+def _apply_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"PRAGMA journal_mode={settings.sqlite_journal_mode}")
+    cursor.execute(f"PRAGMA synchronous={settings.sqlite_synchronous}")
+    cursor.execute(f"PRAGMA mmap_size={int(settings.sqlite_mmap_size)}")
+    cursor.execute(f"PRAGMA cache_size={int(settings.sqlite_cache_size)}")
+    cursor.close()
+
+
+def make_engine(url: str, asynchronous: bool = False):
+    """Die einzige Stelle, an der Engines gebaut werden (sync und async).
+
+    Pool-Größe, Recycle, Pre-Ping und Echo kommen aus den Settings; bei SQLite
+    werden zusätzlich die Performance-Pragmas auf jede neue Verbindung gesetzt.
+    """
+    sa_url = make_url(url)
+    sqlite = sa_url.get_backend_name() == "sqlite"
+    if asynchronous:
+        async_sa_url, connect_args = async_url(url)
+        eng = create_async_engine(
+            async_sa_url, echo=settings.db_echo, connect_args=connect_args, **_pool_options(sa_url)
+        )
+        sync_engine = eng.sync_engine
+    else:
+        connect_args = {"check_same_thread": False} if sqlite else {}
+        eng = create_engine(url, echo=settings.db_echo, connect_args=connect_args, **_pool_options(sa_url))
+        sync_engine = eng
+    if sqlite and not _is_memory_sqlite(sa_url):
+        event.listen(sync_engine, "connect", _apply_sqlite_pragmas)
+    return eng
+
+
+# Engines erstellen
 try:
     if not DATABASE_URL:
         raise ValueError("DATABASE_URL ist leer!")
-        
-    engine = create_engine(
-        DATABASE_URL,
-        echo=True,
-        connect_args=connect_args
-    )
+
+    engine = make_engine(DATABASE_URL)
+    async_engine = make_engine(DATABASE_URL, asynchronous=True)
 except Exception as e:
     print(f"❌ FEHLER: Konnte Datenbank nicht verbinden. URL Start: {str(DATABASE_URL)[:10]}...")
     raise e
 
+
 def init_db() -> None:
-    SQLModel.metadata.create_all(engine)
\ No newline at end of file
+    """Schema auf den neuesten Stand bringen (siehe db/migrations.py).
+
+    Beim normalen Neustart ist das nur ein SELECT auf schema_version. Mit
+    DB_MIGRATE_ON_STARTUP=false wird nur geprüft; migriert wird dann vorher
+    einmal per "python init_db.py" (z.B. im Release-Schritt vor den Workern).
+    """
+    if settings.db_migrate_on_startup:
+        migrations.upgrade(engine)
+        return
+    with engine.connect() as conn:
+        version = migrations.current_version(conn)
+    if version < migrations.head():
+        raise RuntimeError(
+            f"Datenbankschema ist auf Version {version}, erwartet {migrations.head()}: python init_db.py ausführen"
+        )
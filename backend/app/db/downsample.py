@@ -0,0 +1,95 @@
+"""Auflösung und Ausdünnung von Saldo-Zeitreihen ({"day", "balance"}, chronologisch).
+
+- resolution "week"/"month": ein Punkt je Periode, der Saldo am letzten Tag mit
+  Buchungen (= Saldo am Periodenende).
+- max_points: wird es danach immer noch zu viel, Min/Max-Bucketing über die
+  Zeit: je Zeitabschnitt der tiefste und der höchste Punkt in zeitlicher
+  Reihenfolge, dazu erster und letzter Punkt der Reihe. Ausschläge (Gehalt,
+  Miete) bleiben damit sichtbar, anders als bei Mittelwerten oder jedem n-ten Punkt.
+- "auto": die feinste Auflösung (day, week, month), die in max_points passt.
+
+Die Eingabe hat höchstens einen Punkt pro Tag (Tages-Rollup bzw. Snapshot),
+bei zehn Jahren also ~3650; ein Durchlauf kostet wenige Millisekunden. Die
+Antwort bleibt dadurch unabhängig von der Länge der Historie bei max_points.
+"""
+from datetime import date
+
+RESOLUTIONS = ("auto", "day", "week", "month")
+DEFAULT_MAX_POINTS = 1000
+
+
+def _week(day: str) -> int:
+    # Der 1.1.0001 ist ein Montag: Wochen laufen Montag bis Sonntag
+    return (date.fromisoformat(day).toordinal() - 1) // 7
+
+
+def _month(day: str) -> str:
+    return day[:7]
+
+
+_PERIOD_KEYS = {"week": _week, "month": _month}
+
+
+def period_closings(points: list[dict], resolution: str) -> list[dict]:
+    """Letzter Punkt je Woche/Monat; bei "day" unverändert."""
+    key = _PERIOD_KEYS.get(resolution)
+    if key is None or not points:
+        return points
+    out = []
+    last_key = None
+    for point in points:
+        k = key(point["day"])
+        if k == last_key:
+            out[-1] = point
+        else:
+            out.append(point)
+            last_key = k
+    return out
+
+
+def min_max(points: list[dict], max_points: int) -> list[dict]:
+    """Höchstens max_points Punkte: erster, letzter und je Zeitabschnitt Minimum und Maximum."""
+    if len(points) <= max_points:
+        return points
+    first, last = points[0], points[-1]
+    buckets = max(1, (max_points - 2) // 2)
+    start = date.fromisoformat(first["day"]).toordinal()
+    span = date.fromisoformat(last["day"]).toordinal() - start + 1
+
+    out = [first]
+    current, low, high = None, None, None
+
+    def flush():
+        if low is None:
+            return
+        for p in sorted({id(low): low, id(high): high}.values(), key=lambda p: p["day"]):
+            out.append(p)
+
+    for point in points[1:-1]:
+        bucket = (date.fromisoformat(point["day"]).toordinal() - start) * buckets // span
+        if bucket != current:
+            flush()
+            current, low, high = bucket, point, point
+            continue
+        if point["balance"] < low["balance"]:
+            low = point
+        if point["balance"] > high["balance"]:
+            high = point
+    flush()
+    out.append(last)
+    return out
+
+
+def resample(points: list[dict], resolution: str = "auto", max_points: int | None = DEFAULT_MAX_POINTS) -> tuple[list[dict], str]:
+    """(Punkte, tatsächlich verwendete Auflösung)."""
+    if resolution != "auto":
+        points = period_closings(points, resolution)
+    else:
+        for resolution in ("day", "week", "month"):
+            candidate = period_closings(points, resolution)
+            if max_points is None or len(candidate) <= max_points:
+                break
+        points = candidate
+    if max_points is not None:
+        points = min_max(points, max_points)
+    return points, resolution
@@ -0,0 +1,115 @@
+"""Schreibzugriffe auf Buchungen inkl. Pflege der abgeleiteten Tabellen.
+
+Die Endpunkte ändern Buchungen nur über einen LedgerWriter. Er sammelt die
+Salden-Änderungen pro Konto und Tag und verbucht sie gebündelt direkt vor dem
+einzigen Commit – egal ob eine oder tausend Buchungen geändert wurden.
+"""
+from collections import defaultdict
+from datetime import date
+
+from sqlalchemy import func, update
+from sqlmodel import Session, select
+
+from backend.app.core import events
+from backend.app.core.settings import settings
+from backend.app.db import rollups, rules
+from backend.app.db.models import Account, Transaction, TransactionCreate
+from backend.app.db.money import from_cents, to_cents
+
+
+def bump_versions(session: Session, account_ids) -> None:
+    """Zählt die Datenversion der Konten hoch (in der laufenden DB-Transaktion)."""
+    if account_ids:
+        session.exec(
+            update(Account)
+            .where(Account.id.in_(list(account_ids)))
+            .values(version=func.coalesce(Account.version, 0) + 1)
+        )
+
+
+def lock_accounts(session: Session, account_ids) -> None:
+    """Sperrt die Konto-Zeilen bis zum Commit (SELECT ... FOR UPDATE, nach id sortiert).
+
+    Vor dem Lesen des Rollups aufrufen: parallele Writer auf dasselbe Konto
+    warten dann hier, statt Salden aus einem veralteten Stand fortzuschreiben.
+    Die feste Reihenfolge verhindert Deadlocks zwischen Writern mit mehreren
+    Konten. SQLite kennt kein FOR UPDATE, serialisiert Schreiber aber ohnehin.
+    """
+    if account_ids:
+        session.exec(
+            select(Account.id).where(Account.id.in_(sorted(account_ids))).order_by(Account.id).with_for_update()
+        ).all()
+
+
+class LedgerWriter:
+    def __init__(self, session: Session):
+        self.session = session
+        # Deltas in Cent, damit sich viele kleine Beträge exakt aufsummieren
+        self._deltas: dict[tuple[int, date], int] = defaultdict(int)
+        self._removed: set[tuple[int, date]] = set()
+        # Für die Spalten-Snapshots: neue Buchungen werden angehängt, geänderte Konten neu geladen
+        self._created: list[Transaction] = []
+        self._modified: set[int] = set()
+        self._rules: rules.RuleSet | None = None
+
+    def create(self, payload: TransactionCreate) -> Transaction:
+        tx = Transaction(**payload.model_dump())
+        if tx.category_id is None:
+            # Einmal pro Writer laden, ein Batch mit tausend Buchungen fragt nur einmal
+            if self._rules is None:
+                self._rules = rules.load(self.session)
+            tx.category_id = self._rules.match(tx.note, to_cents(tx.amount))
+        self.session.add(tx)
+        self._deltas[(tx.account_id, tx.created_at.date())] += to_cents(tx.amount)
+        self._created.append(tx)
+        return tx
+
+    def update(self, tx: Transaction, amount: float, note: str, category_id: int | None) -> Transaction:
+        self._deltas[(tx.account_id, tx.created_at.date())] += to_cents(amount) - to_cents(tx.amount)
+        tx.amount = amount
+        tx.note = note
+        tx.category_id = category_id
+        self.session.add(tx)
+        self._modified.add(tx.account_id)
+        return tx
+
+    def delete(self, tx: Transaction) -> None:
+        key = (tx.account_id, tx.created_at.date())
+        self._deltas[key] -= to_cents(tx.amount)
+        self._removed.add(key)
+        self._modified.add(tx.account_id)
+        self.session.delete(tx)
+
+    @property
+    def accounts(self) -> set[int]:
+        """Alle Konten, die von den gesammelten Änderungen betroffen sind."""
+        return {account_id for account_id, _ in self._deltas}
+
+    def commit(self) -> None:
+        """Rollup nachziehen und alles in einer DB-Transaktion committen."""
+        self.session.flush()
+        # Erst die Konten sperren, dann Vortagessaldo lesen und spätere Tage verschieben
+        lock_accounts(self.session, self.accounts)
+        for (account_id, day), delta in self._deltas.items():
+            rollups.apply_delta(self.session, account_id, day, from_cents(delta))
+        for account_id, day in self._removed:
+            rollups.prune_day(self.session, account_id, day)
+        bump_versions(self.session, self.accounts)
+        months = defaultdict(set)
+        for account_id, day in self._deltas:
+            months[account_id].add(f"{day:%Y-%m}")
+        changed = events.collect(self.session, months)
+        # Ohne Snapshots gibt es nichts nachzuziehen (und numpy bleibt ungeladen)
+        pending = []
+        if settings.analytics_enabled:
+            from backend.app.analytics import columnar
+
+            pending = columnar.store.prepare(self.session, self._created, self._modified)
+        self.session.commit()
+        if pending:
+            columnar.store.apply(pending)
+        events.broker.publish(changed)
+        self._deltas.clear()
+        self._removed.clear()
+        self._created.clear()
+        self._modified.clear()
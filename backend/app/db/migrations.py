@@ -0,0 +1,387 @@
+"""Versionierte Schema-Migrationen.
+
+Die Datenbank merkt sich in schema_version (eine Zeile), bis zu welcher
+Migration sie ist. Beim Start kostet das genau eine Abfrage; nur wenn
+MIGRATIONS weiter ist, wird migriert:
+- jede Migration läuft in ihrer eigenen Transaktion, danach wird die Version
+  geschrieben. Bricht eine ab, bleibt die Version davor stehen.
+- auf PostgreSQL hält der Lauf ein Advisory-Lock. Starten mehrere Worker
+  gleichzeitig, migriert einer, die anderen warten und sehen danach die neue
+  Version.
+- transactional=False für Schritte, die keine Transaktion vertragen (CREATE
+  INDEX CONCURRENTLY). So lassen sich Indizes auf "transaction" anlegen, ohne
+  die Tabelle im laufenden Betrieb für Schreiber zu sperren.
+
+Migration 1 legt das Schema an, wie es beim Einführen der Versionierung war
+(_BASELINE, fest eingefroren). Jede spätere Änderung an models.py braucht eine
+eigene Migration; tests/test_migrations.py vergleicht eine frisch migrierte
+Datenbank mit den Modellen. Migrationen sollten trotzdem idempotent sein
+(Spalte/Index existiert evtl. schon); add_column und create_index unten prüfen das.
+
+Neue Migration: Funktion schreiben und hinten an MIGRATIONS anhängen, z.B.
+    Migration(4, "transaction.foo", lambda conn: add_column(conn, Transaction.__table__.c.foo))
+"""
+import logging
+import re
+from dataclasses import dataclass
+from typing import Callable
+
+from sqlalchemy import (
+    Column, Date, DateTime, Float, ForeignKey, Index, Integer, MetaData, Numeric, String, Table,
+    bindparam, delete, func, insert, inspect, select, tuple_, union_all, update,
+)
+from sqlalchemy import column as sa_column, table as sa_table
+from sqlalchemy.exc import OperationalError, ProgrammingError
+from sqlalchemy.schema import CreateIndex, CreateTable
+
+from backend.app.db import search
+from backend.app.db.models import SchemaVersion, Transaction
+from backend.app.db.money import Money, to_cents
+
+log = logging.getLogger("backend.db.migrations")
+
+# Beliebige, aber feste Zahl für pg_advisory_lock
+LOCK_KEY = 7_301_170
+# Zeilen pro UPDATE-Block bei der Umstellung auf Cent
+CENTS_BATCH = 10_000
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    name: str
+    apply: Callable
+    transactional: bool = True
+
+
+# --- Helfer für Migrationen ---
+
+def add_column(conn, column: Column) -> bool:
+    """ALTER TABLE ... ADD COLUMN für eine Modell-Spalte, falls sie fehlt.
+
+    Nur nullable Spalten bzw. solche mit server_default: dann braucht PostgreSQL
+    kein Umschreiben der Tabelle und ALTER TABLE ist sofort fertig.
+    """
+    table = column.table
+    if column.name in {c["name"] for c in inspect(conn).get_columns(table.name)}:
+        return False
+    if not column.nullable and column.server_default is None:
+        raise ValueError(f"{table.name}.{column.name}: neue Spalten brauchen nullable oder server_default")
+    ddl = f'ALTER TABLE "{table.name}" ADD COLUMN "{column.name}" {column.type.compile(dialect=conn.dialect)}'
+    if column.server_default is not None:
+        ddl += f" DEFAULT {column.server_default.arg}"
+    conn.exec_driver_sql(ddl)
+    log.info("Spalte %s.%s angelegt", table.name, column.name)
+    return True
+
+
+def create_index(conn, index: Index, concurrently: bool = False) -> None:
+    """Legt einen Modell-Index an, falls er fehlt.
+
+    concurrently=True baut ihn auf PostgreSQL ohne Schreibsperre; die Migration
+    muss dann transactional=False sein. Ein abgebrochener CONCURRENTLY-Lauf
+    hinterlässt einen ungültigen Index, der wird vorher entfernt.
+    """
+    if not (concurrently and conn.dialect.name == "postgresql"):
+        # Beachtet auch ddl_if (dialektspezifische Indizes)
+        index.create(conn, checkfirst=True)
+        return
+    invalid = conn.exec_driver_sql(
+        "SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+        "WHERE c.relname = %(name)s AND NOT i.indisvalid",
+        {"name": index.name},
+    ).first()
+    if invalid:
+        conn.exec_driver_sql(f'DROP INDEX CONCURRENTLY IF EXISTS "{index.name}"')
+    ddl = str(CreateIndex(index, if_not_exists=True).compile(dialect=conn.dialect))
+    conn.exec_driver_sql(re.sub(r"^CREATE (UNIQUE )?INDEX", r"CREATE \1INDEX CONCURRENTLY", ddl))
+
+
+# --- Migration 1: Stand vor der Versionierung ---
+
+# Das Schema, wie es beim Einführen der Versionierung war: Tabellen, Spalten
+# und Indizes fest eingefroren, unabhängig von models.py. Migration 1 macht
+# damit immer dasselbe, egal mit welcher Code-Version sie läuft; jede spätere
+# Änderung an den Modellen kommt mit ihrer eigenen Migration (tests/test_migrations.py
+# prüft, dass eine frisch migrierte Datenbank zu den Modellen passt).
+_BASELINE = MetaData()
+
+Table(
+    "user", _BASELINE,
+    Column("name", String, nullable=False),
+    Column("email", String, nullable=False),
+    Column("id", Integer, primary_key=True),
+)
+Table(
+    "account", _BASELINE,
+    Column("name", String, nullable=False),
+    Column("currency", String, nullable=False),
+    Column("id", Integer, primary_key=True),
+    Column("version", Integer),
+    Column("archived_until", Date),
+)
+Table(
+    "category", _BASELINE,
+    Column("id", Integer, primary_key=True),
+    Column("name", String, nullable=False),
+)
+Table(
+    "transaction", _BASELINE,
+    Column("account_id", Integer, nullable=False),
+    Column("amount", Money, nullable=False),
+    Column("note", String, nullable=False),
+    Column("category_id", Integer, ForeignKey("category.id")),
+    Column("created_at", DateTime, nullable=False),
+    Column("id", Integer, primary_key=True),
+    Column("import_hash", String(64)),
+    Index("ix_transaction_account_created", "account_id", "created_at", "amount"),
+    Index("ix_transaction_account_category", "account_id", "category_id", "amount"),
+    Index("ix_transaction_created", "created_at"),
+    Index("ux_transaction_import_hash", "import_hash", unique=True),
+)
+Table(
+    "dailybalance", _BASELINE,
+    Column("account_id", Integer, primary_key=True),
+    Column("day", Date, primary_key=True),
+    Column("delta", Money, nullable=False),
+    Column("closing", Money, nullable=False),
+)
+Table(
+    "archivedtotal", _BASELINE,
+    Column("id", Integer, primary_key=True),
+    Column("account_id", Integer, nullable=False),
+    Column("day", Date, nullable=False),
+    Column("category_id", Integer),
+    Column("income", Money, nullable=False),
+    Column("expense", Money, nullable=False),
+    Column("count", Integer, nullable=False),
+    Index("ix_archivedtotal_account_day", "account_id", "day"),
+)
+Table(
+    "schema_version", _BASELINE,
+    Column("id", Integer, primary_key=True, autoincrement=False),
+    Column("version", Integer, nullable=False),
+)
+
+BASELINE_INDEXES = tuple(index.name for table in _BASELINE.sorted_tables for index in table.indexes)
+
+
+def _float_money_columns(conn, table) -> list[str]:
+    """Money-Spalten, die in der bestehenden DB noch als Gleitkommazahl (Euro) liegen."""
+    money = {c.name for c in table.columns if isinstance(c.type, Money)}
+    return [
+        c["name"] for c in inspect(conn).get_columns(table.name)
+        if c["name"] in money and isinstance(c["type"], (Float, Numeric))
+    ]
+
+
+def _round_to_cents(conn, table, columns: list[str]) -> None:
+    """Beträge in der Gleitkommaspalte per money.to_cents auf ganze Cent umrechnen.
+
+    In Python statt per ROUND() in SQL: ROUND rundet die Binärzahl (1.005 * 100 =
+    100.4999...), to_cents kaufmännisch über den Dezimalwert. So ergibt ein alter
+    Betrag dieselben Cent wie derselbe Betrag, der heute über die API kommt.
+    Blockweise per Keyset über den Primärschlüssel.
+    """
+    keys = [c.name for c in table.primary_key.columns]
+    # Ohne Spaltentypen, damit Money beim Lesen/Schreiben nicht umrechnet
+    raw = sa_table(table.name, *(sa_column(name) for name in keys + columns))
+    pk = tuple_(*(raw.c[k] for k in keys))
+    stmt = (
+        update(raw)
+        .where(*(raw.c[k] == bindparam(f"k_{k}") for k in keys))
+        .values({name: bindparam(f"v_{name}") for name in columns})
+    )
+    last = None
+    while True:
+        query = select(*raw.c).order_by(*(raw.c[k] for k in keys)).limit(CENTS_BATCH)
+        if last is not None:
+            query = query.where(pk > tuple_(*last))
+        rows = conn.execute(query).all()
+        if not rows:
+            return
+        conn.execute(stmt, [
+            {**{f"k_{k}": row._mapping[k] for k in keys},
+             **{f"v_{name}": None if row._mapping[name] is None else to_cents(row._mapping[name]) for name in columns}}
+            for row in rows
+        ])
+        last = [rows[-1]._mapping[k] for k in keys]
+
+
+def _migrate_amounts_to_cents(conn, tables) -> bool:
+    """Beträge von float (Euro) auf ganze Cent (BIGINT) umstellen.
+
+    Erst werden die Werte in der alten Spalte auf Cent umgerechnet
+    (_round_to_cents), dann ändert sich nur noch der Typ: PostgreSQL per ALTER
+    COLUMN ... USING, SQLite kann Spaltentypen nicht ändern, dort wird die
+    Tabelle neu angelegt und umkopiert. Gibt zurück, ob migriert wurde.
+    """
+    migrated = False
+    for table in tables:
+        columns = _float_money_columns(conn, table)
+        if not columns:
+            continue
+        log.info("Migriere %s.%s auf Cent", table.name, ", ".join(columns))
+        migrated = True
+        _round_to_cents(conn, table, columns)
+        if conn.dialect.name == "postgresql":
+            for name in columns:
+                conn.exec_driver_sql(
+                    f'ALTER TABLE "{table.name}" ALTER COLUMN "{name}" TYPE BIGINT USING "{name}"::bigint'
+                )
+            continue
+
+        old = f"_old_{table.name}"
+        conn.exec_driver_sql(f'ALTER TABLE "{table.name}" RENAME TO "{old}"')
+        for index in table.indexes:
+            conn.exec_driver_sql(f'DROP INDEX IF EXISTS "{index.name}"')
+        # Ohne Indizes; die Baseline-Indizes legt _baseline danach wieder an
+        conn.execute(CreateTable(table))
+        names = [c.name for c in table.columns]
+        values = [f'CAST("{n}" AS INTEGER)' if n in columns else f'"{n}"' for n in names]
+        target = ", ".join(f'"{n}"' for n in names)
+        conn.exec_driver_sql(f'INSERT INTO "{table.name}" ({target}) SELECT {", ".join(values)} FROM "{old}"')
+        conn.exec_driver_sql(f'DROP TABLE "{old}"')
+    return migrated
+
+
+def _rebuild_rollup(conn) -> None:
+    """Tages-Rollup aus Buchungen und Archivsummen neu aufbauen, wie rollups.rebuild, aber auf _BASELINE."""
+    tx, archived, daily = (_BASELINE.tables[name] for name in ("transaction", "archivedtotal", "dailybalance"))
+    entries = union_all(
+        select(tx.c.account_id, func.date(tx.c.created_at).label("day"), tx.c.amount),
+        select(archived.c.account_id, archived.c.day, archived.c.income + archived.c.expense),
+    ).subquery()
+    delta = func.sum(entries.c.amount)
+    conn.execute(delete(daily))
+    conn.execute(insert(daily).from_select(
+        ["account_id", "day", "delta", "closing"],
+        select(
+            entries.c.account_id,
+            entries.c.day,
+            delta,
+            func.sum(delta).over(partition_by=entries.c.account_id, order_by=entries.c.day),
+        ).group_by(entries.c.account_id, entries.c.day),
+    ))
+
+
+def _baseline(conn) -> None:
+    """Holt jede Datenbank auf den Stand, den früher init_db() bei jedem Start hergestellt hat.
+
+    Leere Datenbank: _BASELINE.create_all. Ältere Datenbanken: fehlende Tabellen,
+    Spalten und Indizes ergänzen, Beträge auf Cent umstellen, Rollup neu aufbauen.
+    """
+    existing = set(inspect(conn).get_table_names())
+    rollup_missing = "dailybalance" not in existing
+    _BASELINE.create_all(conn)
+    old_tables = [t for t in _BASELINE.sorted_tables if t.name in existing]
+    for table in old_tables:
+        for column in table.columns:
+            if column.nullable:
+                add_column(conn, column)
+    migrated = _migrate_amounts_to_cents(conn, old_tables)
+    # create_all legt Indizes nur für neue Tabellen an
+    for table in old_tables:
+        for index in table.indexes:
+            create_index(conn, index)
+
+    # Neue Rollup-Tabelle auf einer bestehenden Datenbank: einmalig befüllen.
+    # Nach der Cent-Migration ebenfalls, damit die Salden exakt zu den gerundeten Buchungen passen.
+    if existing and (rollup_missing or migrated):
+        _rebuild_rollup(conn)
+
+
+# --- Migration 2: Volltextsuche ---
+
+def _note_search(conn) -> None:
+    """Suchindex über transaction.note: GIN-Index auf PostgreSQL, FTS5 mit Triggern auf SQLite."""
+    if conn.dialect.name == "postgresql":
+        index = next(i for i in Transaction.__table__.indexes if i.name == "ix_transaction_note_fts")
+        create_index(conn, index, concurrently=True)
+    else:
+        search.install_sqlite(conn)
+
+
+# --- Migration 3: Kategorisierungsregeln ---
+
+_RULES = MetaData()
+# category nur als Ziel des ForeignKeys, angelegt wird allein categoryrule
+Table("category", _RULES, Column("id", Integer, primary_key=True))
+_CATEGORY_RULE = Table(
+    "categoryrule", _RULES,
+    Column("pattern", String(200), nullable=False),
+    Column("category_id", Integer, ForeignKey("category.id"), nullable=False),
+    Column("min_amount", Money),
+    Column("max_amount", Money),
+    Column("priority", Integer, nullable=False),
+    Column("id", Integer, primary_key=True),
+    Column("updated_at", DateTime, nullable=False),
+)
+
+
+MIGRATIONS: list[Migration] = [
+    Migration(1, "baseline", _baseline),
+    Migration(2, "transaction.note Volltextsuche", _note_search, transactional=False),
+    Migration(3, "categoryrule", lambda conn: _CATEGORY_RULE.create(conn, checkfirst=True)),
+]
+
+
+# --- Runner ---
+
+def head() -> int:
+    return MIGRATIONS[-1].version
+
+
+def current_version(conn) -> int:
+    """Version der Datenbank; 0, wenn es schema_version noch nicht gibt."""
+    try:
+        return conn.execute(select(SchemaVersion.version)).scalar() or 0
+    except (OperationalError, ProgrammingError):
+        conn.rollback()
+        return 0
+
+
+def _set_version(conn, version: int) -> None:
+    if conn.execute(update(SchemaVersion).values(version=version)).rowcount == 0:
+        conn.execute(SchemaVersion.__table__.insert().values(id=1, version=version))
+
+
+def _apply(engine, migration: Migration) -> None:
+    if migration.transactional or engine.dialect.name != "postgresql":
+        with engine.begin() as conn:
+            migration.apply(conn)
+            _set_version(conn, migration.version)
+        return
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        migration.apply(conn)
+    with engine.begin() as conn:
+        _set_version(conn, migration.version)
+
+
+def upgrade(engine) -> list[int]:
+    """Spielt alle ausstehenden Migrationen ein und gibt ihre Versionen zurück.
+
+    Ist die Datenbank aktuell, bleibt es bei einem SELECT.
+    """
+    with engine.connect() as conn:
+        if current_version(conn) >= head():
+            return []
+
+    postgres = engine.dialect.name == "postgresql"
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as lock:
+        if postgres:
+            lock.exec_driver_sql(f"SELECT pg_advisory_lock({LOCK_KEY})")
+        try:
+            # Nach dem Lock erneut lesen: ein anderer Worker kann schon fertig sein
+            version = current_version(lock)
+            applied = []
+            for migration in MIGRATIONS:
+                if migration.version <= version:
+                    continue
+                log.info("Migration %d (%s) ...", migration.version, migration.name)
+                _apply(engine, migration)
+                applied.append(migration.version)
+            return applied
+        finally:
+            if postgres:
+                lock.exec_driver_sql(f"SELECT pg_advisory_unlock({LOCK_KEY})")
@@ -1,6 +1,8 @@
 from typing import Optional
-from datetime import datetime
+from datetime import date, datetime
+from sqlalchemy import Index, text
 from sqlmodel import SQLModel, Field
+from backend.app.db.money import Money
 
 # --- Users ---
 class UserBase(SQLModel):
@@ -21,6 +23,12 @@ class AccountBase(SQLModel):
 
 class Account(AccountBase, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
+    # Wird bei jeder Änderung an den Buchungen des Kontos hochgezählt (siehe db/ledger.py).
+    # Clients erkennen daran, ob ihre zwischengespeicherten Daten noch aktuell sind.
+    version: Optional[int] = Field(default=0)
+    # Erster Tag, dessen Buchungen noch in der Tabelle liegen; alles davor ist
+    # archiviert (Parquet + ArchivedTotal, siehe db/archive.py)
+    archived_until: Optional[date] = Field(default=None)
 
 class AccountCreate(AccountBase):
     pass
@@ -34,18 +42,97 @@ class Category(SQLModel, table=True):
     name: str
 
 
+# --- Kategorisierungsregeln (siehe db/rules.py) ---
+class CategoryRuleBase(SQLModel):
+    # Teilstring der Notiz, Groß-/Kleinschreibung egal (z.B. "rewe" oder "stadtwerke")
+    pattern: str = Field(min_length=1, max_length=200)
+    category_id: int = Field(foreign_key="category.id")
+    # Optionaler Betragsbereich in Euro, inklusive; Ausgaben sind negativ
+    min_amount: Optional[float] = Field(default=None, sa_type=Money)
+    max_amount: Optional[float] = Field(default=None, sa_type=Money)
+    # Höher gewinnt; bei Gleichstand die Regel mit dem längeren Muster
+    priority: int = 0
+
+class CategoryRule(CategoryRuleBase, table=True):
+    id: Optional[int] = Field(default=None, primary_key=True)
+    # Teil der Cache-Signatur: geänderte Regeln werden in allen Workern neu geladen
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+class CategoryRuleCreate(CategoryRuleBase):
+    pass
+
+
 # --- Transactions ---
 # Hier ist jetzt alles zusammengefasst (nur noch EINMAL definiert)
 class TransactionBase(SQLModel):
     account_id: int
-    amount: float  # + Einnahme, - Ausgabe
+    # + Einnahme, - Ausgabe; in der DB als ganze Cent gespeichert (siehe db/money.py)
+    amount: float = Field(sa_type=Money)
     note: str = ""
     # Die category_id ist jetzt fest von Anfang an dabei!
     category_id: Optional[int] = Field(default=None, foreign_key="category.id")
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
 class Transaction(TransactionBase, table=True):
+    # Indizes passend zu den Zugriffsmustern der Reports:
+    # - Saldo, Zeitreihe, Monatsreport und Filter laufen über (account_id, created_at).
+    #   amount ist mit drin, damit SUM(amount) direkt aus dem Index kommt (covering).
+    # - Kreisdiagramme gruppieren pro Konto nach Kategorie und summieren amount.
+    # - Die kontoübergreifende Liste blättert per Keyset über (created_at, id).
+    __table_args__ = (
+        Index("ix_transaction_account_created", "account_id", "created_at", "amount"),
+        Index("ix_transaction_account_category", "account_id", "category_id", "amount"),
+        Index("ix_transaction_created", "created_at"),
+        # Inhalts-Hash importierter Zeilen: Re-Importe desselben Auszugs werden übersprungen.
+        # Manuelle Buchungen haben NULL und kollidieren daher nie.
+        Index("ux_transaction_import_hash", "import_hash", unique=True),
+        # Volltextsuche über note (siehe db/search.py); SQLite nutzt stattdessen FTS5
+        Index(
+            "ix_transaction_note_fts", text("to_tsvector('simple', note)"), postgresql_using="gin",
+        ).ddl_if(dialect="postgresql"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
+    import_hash: Optional[str] = Field(default=None, max_length=64)
 
 class TransactionCreate(TransactionBase):
-    pass
\ No newline at end of file
+    pass
+
+
+# --- Tages-Rollup ---
+# Pro Konto und Tag: Summe der Buchungen (delta) und Kontostand am Tagesende (closing).
+# Wird von den Schreib-Endpunkten in derselben DB-Transaktion gepflegt
+# (siehe backend/app/db/rollups.py), damit Zeitreihe und Saldo nicht mehr
+# die komplette Historie aggregieren müssen.
+class DailyBalance(SQLModel, table=True):
+    account_id: int = Field(primary_key=True)
+    day: date = Field(primary_key=True)
+    delta: float = Field(default=0.0, sa_type=Money)
+    closing: float = Field(default=0.0, sa_type=Money)
+
+
+# --- Archiv ---
+# Zusammenfassung archivierter Buchungen pro Konto, Tag und Kategorie. Die
+# Einzelbuchungen liegen danach nur noch als Parquet-Dateien vor; Reports,
+# Rollup-Rebuild und Snapshots rechnen diese Summen transparent mit ein.
+class ArchivedTotal(SQLModel, table=True):
+    __table_args__ = (Index("ix_archivedtotal_account_day", "account_id", "day"),)
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    account_id: int
+    day: date
+    category_id: Optional[int] = None
+    income: float = Field(default=0.0, sa_type=Money)
+    expense: float = Field(default=0.0, sa_type=Money)  # negativ, wie die Buchungen
+    count: int = 0
+
+
+# --- Schema-Version ---
+# Genau eine Zeile: bis zu welcher Migration die Datenbank ist (siehe db/migrations.py).
+# Steht mit in SQLModel.metadata, damit drop_all sie mit entfernt und der
+# nächste Start wieder bei null anfängt.
+class SchemaVersion(SQLModel, table=True):
+    __tablename__ = "schema_version"
+
+    id: int = Field(default=1, primary_key=True)
+    version: int = 0
@@ -0,0 +1,45 @@
+"""Geldbeträge als ganze Cent (int64) in der Datenbank.
+
+Die API spricht weiter Euro mit Nachkommastellen (float); gespeichert und
+aufsummiert wird aber in Cent. SUM() über Integer ist exakt und schneller als
+über double precision, das ständige round(..., 2) in den Endpunkten entfällt.
+
+Der Typ Money übernimmt die Umrechnung an der Grenze: beim Schreiben Euro ->
+Cent, beim Lesen Cent -> Euro. Das gilt auch für Ausdrücke wie
+SUM(amount), CASE ... THEN amount oder -amount, die den Typ der Spalte erben.
+"""
+from decimal import ROUND_HALF_UP, Decimal
+
+from sqlalchemy import BigInteger, type_coerce
+from sqlalchemy.types import TypeDecorator
+
+_CENT = Decimal("0.01")
+
+
+def to_cents(value) -> int:
+    """Euro -> Cent, kaufmännisch gerundet (1.005 -> 101, -0.125 -> -13)."""
+    if isinstance(value, int):
+        return value * 100
+    # über str(), damit 1.005 nicht als 1.00499999... gerundet wird
+    return int(Decimal(str(value)).quantize(_CENT, rounding=ROUND_HALF_UP) * 100)
+
+
+def from_cents(cents) -> float:
+    """Cent -> Euro. PostgreSQL liefert SUM(bigint) als numeric (Decimal), daher int()."""
+    return int(cents) / 100
+
+
+class Money(TypeDecorator):
+    impl = BigInteger
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        return None if value is None else to_cents(value)
+
+    def process_result_value(self, value, dialect):
+        return None if value is None else from_cents(value)
+
+
+def cents(column):
+    """Roh-Wert in Cent lesen (ohne Umrechnung), z.B. für NumPy-Auswertungen."""
+    return type_coerce(column, BigInteger)
@@ -0,0 +1,170 @@
+"""Pflege des Tages-Rollups (DailyBalance).
+
+Alle Funktionen arbeiten in der übergebenen Session und committen nicht selbst,
+damit Rollup und Buchung immer in derselben DB-Transaktion landen.
+"""
+from datetime import date, datetime, time, timedelta
+
+from sqlalchemy import delete, func, union_all, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlmodel import Session, select
+
+from backend.app.db.models import ArchivedTotal, DailyBalance, Transaction
+
+
+def _insert(session: Session):
+    if session.get_bind().dialect.name == "postgresql":
+        return pg_insert(DailyBalance)
+    return sqlite_insert(DailyBalance)
+
+
+def apply_delta(session: Session, account_id: int, day: date, amount: float) -> None:
+    """Verbucht amount am Tag day: Tageszeile anlegen/erhöhen, spätere Salden verschieben.
+
+    Die Tageszeile entsteht auch bei amount == 0 (0,00-Buchung, Tag mit Summe
+    null), wie bei rebuild(); nur die späteren Tage bleiben dann unberührt.
+    """
+    if amount:
+        # Alle späteren Tage verschieben sich um denselben Betrag.
+        session.exec(
+            update(DailyBalance)
+            .where(DailyBalance.account_id == account_id)
+            .where(DailyBalance.day > day)
+            .values(closing=DailyBalance.closing + amount)
+        )
+
+    # Saldo des Vortags als Basis, falls der Tag noch keine Zeile hat.
+    previous = (
+        select(DailyBalance.closing)
+        .where(DailyBalance.account_id == account_id)
+        .where(DailyBalance.day < day)
+        .order_by(DailyBalance.day.desc())
+        .limit(1)
+        .scalar_subquery()
+    )
+    stmt = _insert(session).values(
+        account_id=account_id,
+        day=day,
+        delta=amount,
+        closing=func.coalesce(previous, 0) + amount,
+    )
+    session.exec(
+        stmt.on_conflict_do_update(
+            index_elements=[DailyBalance.account_id, DailyBalance.day],
+            set_={
+                "delta": DailyBalance.delta + amount,
+                "closing": DailyBalance.closing + amount,
+            },
+        )
+    )
+
+
+def prune_day(session: Session, account_id: int, day: date) -> None:
+    """Entfernt die Tageszeile, wenn an diesem Tag keine Buchung mehr existiert (nach Löschen).
+
+    Archivierte Buchungen zählen mit: hat der Tag eine ArchivedTotal-Zeile
+    (späte Buchung in einem archivierten Monat wurde wieder gelöscht), bleibt
+    die Tageszeile mit ihrem Saldo stehen.
+    """
+    start = datetime.combine(day, time.min)
+    remaining = session.exec(
+        select(Transaction.id)
+        .where(Transaction.account_id == account_id)
+        .where(Transaction.created_at >= start)
+        .where(Transaction.created_at < start + timedelta(days=1))
+        .limit(1)
+    ).first()
+    if remaining is None:
+        remaining = session.exec(
+            select(ArchivedTotal.id)
+            .where(ArchivedTotal.account_id == account_id)
+            .where(ArchivedTotal.day == day)
+            .limit(1)
+        ).first()
+    if remaining is None:
+        session.exec(
+            delete(DailyBalance)
+            .where(DailyBalance.account_id == account_id)
+            .where(DailyBalance.day == day)
+        )
+
+
+def rebuild(session: Session, account_id: int | None = None) -> int:
+    """Baut das Rollup aus den Rohbuchungen neu auf (Backfill/Reparatur).
+
+    Ohne account_id werden alle Konten neu berechnet. Archivierte Monate gehen
+    über ihre Tagessummen (ArchivedTotal) ein. Gibt die Anzahl der Tageszeilen zurück.
+    """
+    live = select(
+        Transaction.account_id, func.date(Transaction.created_at).label("day"), Transaction.amount
+    )
+    archived = select(
+        ArchivedTotal.account_id, ArchivedTotal.day, ArchivedTotal.income + ArchivedTotal.expense
+    )
+    clear = delete(DailyBalance)
+    if account_id is not None:
+        live = live.where(Transaction.account_id == account_id)
+        archived = archived.where(ArchivedTotal.account_id == account_id)
+        clear = clear.where(DailyBalance.account_id == account_id)
+
+    entries = union_all(live, archived).subquery()
+    delta = func.sum(entries.c.amount)
+    query = select(
+        entries.c.account_id,
+        entries.c.day,
+        delta.label("delta"),
+        func.sum(delta).over(partition_by=entries.c.account_id, order_by=entries.c.day).label("closing"),
+    ).group_by(entries.c.account_id, entries.c.day)
+
+    rows = session.exec(query).all()
+    session.exec(clear)
+    session.add_all(
+        DailyBalance(
+            account_id=r.account_id,
+            # SQLite liefert date() als String, PostgreSQL als date
+            day=date.fromisoformat(r.day) if isinstance(r.day, str) else r.day,
+            delta=r.delta,
+            closing=r.closing,
+        )
+        for r in rows
+    )
+    return len(rows)
+
+
+def daily_closings(session: Session, account_id: int, start: date | None = None, end: date | None = None) -> list[dict]:
+    """Kontostand am Ende jedes Tages mit Buchungen, chronologisch; optional nur start <= day <= end."""
+    query = select(DailyBalance.day, DailyBalance.closing).where(DailyBalance.account_id == account_id)
+    if start is not None:
+        query = query.where(DailyBalance.day >= start)
+    if end is not None:
+        query = query.where(DailyBalance.day <= end)
+    rows = session.exec(query.order_by(DailyBalance.day)).all()
+    return [{"day": str(r.day), "balance": r.closing} for r in rows]
+
+
+def _last_closing(session: Session, account_id: int, condition) -> float:
+    # Ein Index-Lookup auf (account_id, day) – unabhängig von der Länge der Historie
+    closing = session.exec(
+        select(DailyBalance.closing)
+        .where(DailyBalance.account_id == account_id)
+        .where(condition)
+        .order_by(DailyBalance.day.desc())
+        .limit(1)
+    ).first()
+    return closing or 0.0
+
+
+def balance_before(session: Session, account_id: int, day: date) -> float:
+    """Kontostand am Ende des letzten Tages vor day."""
+    return _last_closing(session, account_id, DailyBalance.day < day)
+
+
+def balance_as_of(session: Session, account_id: int, day: date) -> float:
+    """Kontostand am Ende von day, inklusive der Buchungen dieses Tages."""
+    return _last_closing(session, account_id, DailyBalance.day <= day)
+
+
+def current_balance(session: Session, account_id: int) -> float:
+    """Aktueller Kontostand (Saldo des letzten Tages mit Buchungen)."""
+    return balance_before(session, account_id, date.max)
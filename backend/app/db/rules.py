@@ -0,0 +1,192 @@
+"""Automatische Kategorisierung über Regeln (CategoryRule).
+
+Eine Regel ist ein Teilstring der Notiz (Groß-/Kleinschreibung egal), optional
+mit Betragsbereich, und zeigt auf eine Kategorie. Alle Regeln zusammen werden
+zu einem RuleSet kompiliert: ein einziger regulärer Ausdruck, dessen Muster
+als Trie zusammengefasst sind (gemeinsame Präfixe nur einmal), in einem
+Lookahead. finditer liefert damit in einem Durchlauf über die Notiz jede
+Fundstelle, auch überlappende – wie ein Aho-Corasick-Automat. An jeder Stelle
+wird das längste Muster gefunden; kürzere, die dort ebenfalls beginnen, kommen
+über eine vorberechnete Präfix-Liste dazu. Die Kosten pro Buchung hängen damit
+kaum von der Zahl der Regeln ab (eine flache Alternative a|b|c|... probiert
+dagegen an jeder Stelle jedes Muster einzeln: ~17x langsamer bei 500 Regeln).
+
+Gewinnt bei mehreren Treffern: höhere priority, dann längeres Muster, dann
+kleinere id. Der Betragsbereich wird erst nach dem Textvergleich geprüft.
+
+Angewendet wird das RuleSet
+- beim Anlegen von Buchungen ohne Kategorie (LedgerWriter.create, Import),
+- per recategorise() als Massenlauf über den Bestand.
+Buchungen mit gesetzter Kategorie bleiben unangetastet (außer mit overwrite=True).
+"""
+import re
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import Iterable
+
+from sqlalchemy import bindparam, func, update
+from sqlmodel import Session, select
+
+from backend.app.db import ledger
+from backend.app.db.models import CategoryRule, Transaction
+from backend.app.db.money import cents, to_cents
+
+RECATEGORISE_BATCH = 10_000
+
+
+def _trie_pattern(words: Iterable[str]) -> str:
+    """Regex-Alternative über alle Wörter, nach gemeinsamen Präfixen verschachtelt; matcht gierig das längste."""
+    trie: dict = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def build(node: dict) -> str:
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        return f"(?:{body})?" if "" in node else body
+
+    return build(trie)
+
+
+@dataclass(frozen=True)
+class _Rule:
+    id: int
+    pattern: str
+    category_id: int
+    min_cents: int | None
+    max_cents: int | None
+    priority: int
+
+    def accepts(self, amount_cents: int) -> bool:
+        return ((self.min_cents is None or amount_cents >= self.min_cents)
+                and (self.max_cents is None or amount_cents <= self.max_cents))
+
+
+class RuleSet:
+    def __init__(self, rules: Iterable[CategoryRule]):
+        compiled = [
+            _Rule(r.id, r.pattern.casefold(), r.category_id,
+                  None if r.min_amount is None else to_cents(r.min_amount),
+                  None if r.max_amount is None else to_cents(r.max_amount),
+                  r.priority)
+            for r in rules if r.pattern
+        ]
+        compiled.sort(key=lambda r: (-r.priority, -len(r.pattern), r.id))
+        self._rank = {rule: i for i, rule in enumerate(compiled)}
+        self._by_pattern: dict[str, list[_Rule]] = {}
+        for rule in compiled:
+            self._by_pattern.setdefault(rule.pattern, []).append(rule)
+
+        patterns = sorted(self._by_pattern, key=len, reverse=True)
+        # Ein Treffer auf "rewe markt" ist auch einer auf "rewe"
+        self._covers = {p: [q for q in patterns if p.startswith(q)] for p in patterns}
+        self._regex = re.compile(f"(?=({_trie_pattern(patterns)}))") if patterns else None
+
+    def __bool__(self) -> bool:
+        return self._regex is not None
+
+    def match(self, note: str, amount_cents: int) -> int | None:
+        """category_id der besten passenden Regel oder None."""
+        if self._regex is None or not note:
+            return None
+        best = None
+        for m in self._regex.finditer(note.casefold()):
+            for pattern in self._covers[m.group(1)]:
+                for rule in self._by_pattern[pattern]:
+                    if best is not None and self._rank[rule] >= self._rank[best]:
+                        break
+                    if rule.accepts(amount_cents):
+                        best = rule
+                        break
+        return best.category_id if best else None
+
+
+# --- Cache über Requests hinweg ---
+
+_lock = threading.Lock()
+_cached: tuple[tuple, RuleSet] | None = None
+
+
+def load(session: Session) -> RuleSet:
+    """Aktuelles RuleSet. Kostet eine kleine Abfrage; kompiliert wird nur nach Änderungen."""
+    global _cached
+    signature = tuple(session.exec(select(func.count(), func.max(CategoryRule.updated_at))).one())
+    with _lock:
+        if _cached is not None and _cached[0] == signature:
+            return _cached[1]
+    ruleset = RuleSet(session.exec(select(CategoryRule)).all())
+    with _lock:
+        _cached = (signature, ruleset)
+    return ruleset
+
+
+# --- Massenlauf ---
+
+@dataclass
+class RecategoriseResult:
+    rows: int = 0
+    changed: int = 0
+    seconds: float = 0.0
+    rows_per_sec: float = 0.0
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+def recategorise(session: Session, account_id: int | None = None, overwrite: bool = False,
+                 batch_size: int = RECATEGORISE_BATCH) -> RecategoriseResult:
+    """Wendet die Regeln auf bestehende Buchungen an und committet blockweise.
+
+    Ohne overwrite nur Buchungen ohne Kategorie. Mit overwrite bekommen auch
+    kategorisierte Buchungen die Kategorie der passenden Regel; ohne Treffer
+    bleibt die bisherige stehen. Archivierte Monate sind nicht mehr in der
+    Tabelle und werden nicht verändert.
+    """
+    result = RecategoriseResult()
+    started = time.perf_counter()
+    ruleset = load(session)
+    if not ruleset:
+        return result
+
+    query = select(Transaction.id, Transaction.account_id, Transaction.note, cents(Transaction.amount),
+                   Transaction.category_id)
+    if account_id is not None:
+        query = query.where(Transaction.account_id == account_id)
+    if not overwrite:
+        query = query.where(Transaction.category_id.is_(None))
+    stmt = (
+        update(Transaction.__table__)
+        .where(Transaction.__table__.c.id == bindparam("tx_id"))
+        .values(category_id=bindparam("new_category"))
+    )
+
+    last_id = 0
+    while True:
+        # Keyset über id: jeder Block ist abgeschlossen gelesen, bevor geschrieben wird
+        rows = session.exec(query.where(Transaction.id > last_id).order_by(Transaction.id).limit(batch_size)).all()
+        if not rows:
+            break
+        last_id = rows[-1][0]
+        changes, accounts = [], set()
+        for tx_id, tx_account, note, amount, category_id in rows:
+            new = ruleset.match(note, amount)
+            if new is not None and new != category_id:
+                changes.append({"tx_id": tx_id, "new_category": new})
+                accounts.add(tx_account)
+        result.rows += len(rows)
+        if changes:
+            session.connection().execute(stmt, changes)
+            # Reports, ETags und Snapshots hängen an der Kategorie
+            ledger.bump_versions(session, accounts)
+            session.commit()
+            result.changed += len(changes)
+
+    result.seconds = round(time.perf_counter() - started, 3)
+    result.rows_per_sec = round(result.rows / result.seconds, 1) if result.seconds else 0.0
+    return result
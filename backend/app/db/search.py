@@ -0,0 +1,101 @@
+"""Volltextsuche über die Notizen der Buchungen.
+
+- SQLite: FTS5-Tabelle transaction_fts mit "transaction" als externem Inhalt.
+  Trigger auf "transaction" halten sie synchron, damit auch Bulk-Import,
+  Batch-Endpunkt und Archivierung ohne Zutun abgedeckt sind.
+- PostgreSQL: GIN-Index ix_transaction_note_fts auf to_tsvector('simple', note)
+  (in models.py). Den pflegt die Datenbank beim Schreiben selbst, es braucht
+  keine Zusatzspalte.
+
+'simple' statt 'german', weil die Notizen vor allem Händlernamen und
+Verwendungszwecke sind, die man nicht gestemmt haben möchte. Jeder Suchbegriff
+wird als Präfix gesucht (rew findet REWE), alle Begriffe müssen vorkommen.
+Archivierte Buchungen liegen nur noch im Parquet-Archiv und werden nicht gefunden.
+
+Eingerichtet wird beides in Migration 2 (siehe db/migrations.py).
+"""
+import re
+from datetime import datetime
+
+from sqlalchemy import column, func, literal_column, table, text
+from sqlmodel import Session, select
+
+from backend.app.db.models import Transaction
+
+FTS_TABLE = "transaction_fts"
+PG_CONFIG = "simple"
+
+_fts = table(FTS_TABLE, column("rowid"), column("rank"))
+_TERM = re.compile(r"\w+", re.UNICODE)
+
+_SQLITE_DDL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        note, content='transaction', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS transaction_fts_insert AFTER INSERT ON "transaction" BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, note) VALUES (new.id, new.note);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS transaction_fts_delete AFTER DELETE ON "transaction" BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, note) VALUES ('delete', old.id, old.note);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS transaction_fts_update AFTER UPDATE OF note ON "transaction" BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, note) VALUES ('delete', old.id, old.note);
+        INSERT INTO {FTS_TABLE}(rowid, note) VALUES (new.id, new.note);
+    END""",
+]
+
+
+def _tsvector():
+    # Muss wörtlich dem Index-Ausdruck entsprechen, sonst nutzt PostgreSQL den Index nicht
+    return func.to_tsvector(literal_column(f"'{PG_CONFIG}'"), Transaction.note)
+
+
+def install_sqlite(conn) -> None:
+    """Legt FTS-Tabelle und Trigger an (idempotent) und füllt den Index aus dem Bestand."""
+    for ddl in _SQLITE_DDL:
+        conn.exec_driver_sql(ddl)
+    # Auch nach drop_all/create_all von "transaction" wieder passend
+    conn.exec_driver_sql(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+def terms(q: str) -> list[str]:
+    """Suchbegriffe ohne Operatoren und Satzzeichen; Nutzereingaben werden nie als Syntax interpretiert."""
+    return [t.lower() for t in _TERM.findall(q)]
+
+
+def search(
+    session: Session,
+    words: list[str],
+    account_id: int | None = None,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    category_id: int | None = None,
+    offset: int = 0,
+    limit: int = 50,
+) -> list[Transaction]:
+    """Treffer nach Relevanz (bei Gleichstand neueste zuerst), Filter auf Konto, Zeitraum [start, end) und Kategorie."""
+    if session.get_bind().dialect.name == "postgresql":
+        tsquery = func.to_tsquery(literal_column(f"'{PG_CONFIG}'"), " & ".join(f"{w}:*" for w in words))
+        query = (
+            select(Transaction)
+            .where(_tsvector().op("@@")(tsquery))
+            .order_by(func.ts_rank(_tsvector(), tsquery).desc(), Transaction.created_at.desc(), Transaction.id.desc())
+        )
+    else:
+        match = " ".join(f'"{w}"*' for w in words)
+        query = (
+            select(Transaction)
+            .join(_fts, _fts.c.rowid == Transaction.id)
+            .where(text(f"{FTS_TABLE} MATCH :match").bindparams(match=match))
+            # rank ist bm25(): kleiner = relevanter
+            .order_by(_fts.c.rank, Transaction.created_at.desc(), Transaction.id.desc())
+        )
+    if account_id is not None:
+        query = query.where(Transaction.account_id == account_id)
+    if start is not None:
+        query = query.where(Transaction.created_at >= start)
+    if end is not None:
+        query = query.where(Transaction.created_at < end)
+    if category_id is not None:
+        query = query.where(Transaction.category_id == category_id)
+    return session.exec(query.offset(offset).limit(limit)).all()
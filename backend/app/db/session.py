@@ -1,24 +1,71 @@
-import os
-from sqlmodel import create_engine, Session, SQLModel
-from dotenv import load_dotenv
+import asyncio
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-# Lädt die .env Datei
-load_dotenv()
-
-# Holt die URL aus der .env Datei. 
-# Falls keine da ist, nimmt er als Fallback wieder die lokale Datei (gut zum Testen)
-DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///dashboard.db")
-
-# Ein kleiner Fix, falls der Link mit "postgres://" anfängt (SQLAlchemy braucht "postgresql://")
-if DATABASE_URL.startswith("postgres://"):
-    DATABASE_URL = DATABASE_URL.replace("postgres://", "postgresql://", 1)
-
-# Verbindung herstellen
-engine = create_engine(DATABASE_URL, echo=True)
+from backend.app.core.settings import settings
+# Engines kommen aus der gemeinsamen Factory in database.py
+from backend.app.db.database import DATABASE_URL, async_engine, engine, init_db
 
 def create_db_and_tables():
-    SQLModel.metadata.create_all(engine)
+    # Gleicher Weg wie beim App-Start: versionierte Migrationen statt create_all
+    init_db()
 
 def get_session():
     with Session(engine) as session:
-        yield session
\ No newline at end of file
+        yield session
+
+
+# --- Async-Pfad (Lese-Endpunkte für Konten und Reports) ---
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False)
+
+
+async def get_async_session():
+    async with AsyncSessionLocal() as session:
+        yield session
+
+
+class _ConnectionBudget:
+    """Reserviert für parallele Abfragen alle benötigten Verbindungen auf einmal.
+
+    Ohne das könnten sich viele gleichzeitige Requests gegenseitig blockieren:
+    jeder hält schon einen Teil seiner Verbindungen und wartet auf den Rest.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self.free = size
+        self.cond = asyncio.Condition()
+
+    async def acquire(self, n: int) -> int:
+        n = min(n, self.size)
+        async with self.cond:
+            await self.cond.wait_for(lambda: self.free >= n)
+            self.free -= n
+        return n
+
+    async def release(self, n: int) -> None:
+        async with self.cond:
+            self.free += n
+            self.cond.notify_all()
+
+
+_budget = _ConnectionBudget(settings.db_pool_size + settings.db_max_overflow)
+
+
+async def run_concurrently(*calls):
+    """Führt unabhängige Abfragen gleichzeitig aus, jede mit eigener Session/Verbindung.
+
+    Jeder Aufruf ist ein Tupel (funktion, *args); die Funktion bekommt eine
+    synchrone Session als erstes Argument (AsyncSession.run_sync), so dass die
+    Query-Helfer für den sync- und den async-Pfad dieselben bleiben.
+    """
+    async def run(fn, *args):
+        async with AsyncSessionLocal() as session:
+            return await session.run_sync(fn, *args)
+
+    reserved = await _budget.acquire(len(calls))
+    try:
+        return await asyncio.gather(*(run(*call) for call in calls))
+    finally:
+        await _budget.release(reserved)
@@ -0,0 +1,194 @@
+"""Streaming-Parser für Kontoauszüge (CSV, CAMT.053, MT940).
+
+Alle Parser sind Generatoren: sie lesen die Datei Stück für Stück und geben
+pro Buchung eine ParsedRow aus, ohne den ganzen Auszug im Speicher zu halten.
+Fehlerhafte Eingaben führen zu einem ValueError mit Zeilen-/Eintragsangabe.
+"""
+import csv
+import re
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass
+from datetime import datetime
+from typing import BinaryIO, Iterator, Optional, TextIO
+
+FORMATS = ("csv", "camt053", "mt940")
+
+
+@dataclass
+class ParsedRow:
+    created_at: datetime
+    amount: float  # + Einnahme, - Ausgabe
+    note: str = ""
+    category_id: Optional[int] = None  # Auszüge liefern keine, nur der Testdaten-Generator
+
+
+def detect_format(head: str) -> str:
+    """Erkennt das Format anhand der ersten Zeichen der Datei."""
+    start = head.lstrip("﻿ \r\n\t")
+    if start.startswith("<"):
+        return "camt053"
+    if start.startswith("{1:") or start.startswith(":20:") or "\n:61:" in head:
+        return "mt940"
+    return "csv"
+
+
+def parse_amount(value: str) -> float:
+    """Versteht '1234.56', '-1.234,56', '1,234.56' und '12,50 €'."""
+    text = value.replace("€", "").replace("EUR", "").replace(" ", "").replace("\u00a0", "")
+    if "," in text and "." in text:
+        if text.rfind(",") > text.rfind("."):
+            text = text.replace(".", "").replace(",", ".")
+        else:
+            text = text.replace(",", "")
+    elif "," in text:
+        text = text.replace(",", ".")
+    return float(text)
+
+
+def parse_date(value: str) -> datetime:
+    text = value.strip()
+    try:
+        return datetime.fromisoformat(text)
+    except ValueError:
+        pass
+    for fmt in ("%d.%m.%Y", "%d.%m.%y", "%d/%m/%Y"):
+        try:
+            return datetime.strptime(text, fmt)
+        except ValueError:
+            continue
+    raise ValueError(f"Unbekanntes Datumsformat: {value!r}")
+
+
+# --- CSV ---
+# Spaltennamen (klein geschrieben), die wir pro Feld akzeptieren – erster Treffer gewinnt.
+CSV_COLUMNS = {
+    "date": ("date", "datum", "buchungstag", "buchungsdatum", "created_at", "valuta"),
+    "amount": ("amount", "betrag", "betrag (eur)", "umsatz"),
+    "note": ("note", "verwendungszweck", "buchungstext", "beschreibung", "description"),
+}
+
+
+def parse_csv(stream: TextIO) -> Iterator[ParsedRow]:
+    header_line = stream.readline()
+    if not header_line:
+        return
+    # Deutsche Banken exportieren meist mit ';', alles andere mit ','
+    delimiter = max((";", ",", "\t"), key=header_line.count)
+    header = [h.strip().lower() for h in next(csv.reader([header_line], delimiter=delimiter))]
+
+    index = {}
+    for field, names in CSV_COLUMNS.items():
+        index[field] = next((header.index(n) for n in names if n in header), None)
+    if index["date"] is None or index["amount"] is None:
+        raise ValueError(f"CSV: Spalten für Datum und Betrag nicht gefunden in {header}")
+
+    for line_no, row in enumerate(csv.reader(stream, delimiter=delimiter), start=2):
+        if not any(cell.strip() for cell in row):
+            continue
+        try:
+            yield ParsedRow(
+                created_at=parse_date(row[index["date"]]),
+                amount=parse_amount(row[index["amount"]]),
+                note=row[index["note"]].strip() if index["note"] is not None else "",
+            )
+        except (ValueError, IndexError) as e:
+            raise ValueError(f"CSV Zeile {line_no}: {e}")
+
+
+# --- CAMT.053 (ISO 20022 XML) ---
+def _local(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+
+def _find(elem, *path):
+    """Sucht einen Pfad von Kind-Elementen, Namespaces werden ignoriert."""
+    for name in path:
+        elem = next((child for child in elem if _local(child.tag) == name), None)
+        if elem is None:
+            return None
+    return elem
+
+
+def _first(elem, *paths):
+    # Kein `or`: Elemente ohne Kinder sind in Python falsy
+    for path in paths:
+        found = _find(elem, *path)
+        if found is not None:
+            return found
+    return None
+
+
+def parse_camt053(stream: BinaryIO) -> Iterator[ParsedRow]:
+    # iterparse + clear(): jede Buchung (Ntry) wird nach dem Lesen wieder verworfen
+    for n, (_, elem) in enumerate(ET.iterparse(stream, events=("end",)), start=1):
+        if _local(elem.tag) != "Ntry":
+            continue
+        try:
+            amount = parse_amount(_find(elem, "Amt").text)
+            if _find(elem, "CdtDbtInd").text == "DBIT":
+                amount = -amount
+            booked = _first(elem, ("BookgDt", "Dt"), ("BookgDt", "DtTm"))
+            note = _first(elem, ("NtryDtls", "TxDtls", "RmtInf", "Ustrd"), ("AddtlNtryInf",))
+            yield ParsedRow(
+                created_at=parse_date(booked.text),
+                amount=amount,
+                note=(note.text or "").strip() if note is not None else "",
+            )
+        except (AttributeError, ValueError) as e:
+            raise ValueError(f"CAMT.053 Eintrag {n}: {e}")
+        elem.clear()
+
+
+# --- MT940 (SWIFT) ---
+# :61:JJMMTT[MMTT]C|D|RC|RD[Währungskennung]Betrag...
+MT940_LINE = re.compile(r"^(\d{6})(\d{4})?(RC|RD|C|D)([A-Z])?(\d+,\d*)")
+# Strukturiertes :86: deutscher Banken: ?20-?29 und ?60-?63 sind der Verwendungszweck
+MT940_SUBFIELD = re.compile(r"\?(\d\d)([^?]*)")
+
+
+def _mt940_note(text: str) -> str:
+    if "?" not in text:
+        return text
+    parts = MT940_SUBFIELD.findall(text)
+    purpose = [value for code, value in parts if "20" <= code <= "29" or "60" <= code <= "63"]
+    return "".join(purpose) if purpose else text
+
+
+def parse_mt940(stream: TextIO) -> Iterator[ParsedRow]:
+    current = None
+    note_lines: list[str] = []
+    in_note = False
+
+    def finish():
+        if current is not None:
+            current.note = _mt940_note("".join(note_lines)).strip()
+            return current
+
+    for line_no, raw in enumerate(stream, start=1):
+        line = raw.rstrip("\r\n")
+        if line.startswith(":61:"):
+            row = finish()
+            if row:
+                yield row
+            match = MT940_LINE.match(line[4:])
+            if not match:
+                raise ValueError(f"MT940 Zeile {line_no}: ungültige :61:-Zeile")
+            day, _, mark, _, amount = match.groups()
+            value = parse_amount(amount)
+            # RC = Storno einer Gutschrift (also Belastung), RD umgekehrt
+            current = ParsedRow(
+                created_at=datetime.strptime(day, "%y%m%d"),
+                amount=value if mark in ("C", "RD") else -value,
+            )
+            note_lines, in_note = [], False
+        elif line.startswith(":86:"):
+            note_lines.append(line[4:])
+            in_note = True
+        elif line.startswith(":") or line.startswith("-"):
+            in_note = False
+        elif in_note:
+            note_lines.append(line)
+
+    row = finish()
+    if row:
+        yield row
@@ -0,0 +1,201 @@
+"""Batch-Import geparster Kontoauszüge in die Transaktions-Tabelle.
+
+Die Zeilen werden in großen Blöcken geschrieben (SQLite: executemany in eine
+Staging-Tabelle, PostgreSQL: COPY; danach jeweils ein INSERT ... SELECT). Doppelte Zeilen
+aus früheren Importen fallen über den eindeutigen Index auf import_hash raus.
+Am Ende wird das Tages-Rollup des Kontos einmal neu aufgebaut und committet.
+Zeilen aus bereits archivierten Monaten werden nicht mehr importiert (ihre
+Hashes liegen nicht mehr in der Tabelle, sie kämen sonst doppelt). Zeilen ohne
+Kategorie laufen vorher durch die Kategorisierungsregeln (db/rules.py).
+"""
+import csv
+import hashlib
+import io
+import time
+from dataclasses import asdict, dataclass
+from typing import BinaryIO, Iterable, Iterator
+
+from sqlalchemy import Column, MetaData, Table, select, true
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlmodel import Session
+
+from backend.app.core import events
+from backend.app.db import archive, rollups, rules
+from backend.app.db.ledger import bump_versions
+from backend.app.db.models import Transaction
+from backend.app.db.money import to_cents
+from backend.app.importer import parsers
+from backend.app.importer.parsers import ParsedRow
+
+BATCH_SIZE = 5000
+
+# Spalten in der Reihenfolge, in der sie gebündelt geschrieben werden
+COLUMNS = ["account_id", "amount", "note", "category_id", "created_at", "import_hash"]
+
+
+@dataclass
+class ImportResult:
+    format: str
+    rows: int = 0
+    inserted: int = 0
+    duplicates: int = 0
+    archived: int = 0  # übersprungen, Monat ist bereits archiviert
+    categorised: int = 0  # Kategorie per Regel gesetzt
+    seconds: float = 0.0
+    rows_per_sec: float = 0.0
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+def row_hash(account_id: int, row: ParsedRow, occurrence: int) -> str:
+    """Inhalts-Hash einer Zeile.
+
+    occurrence zählt identische Zeilen innerhalb eines Auszugs (z.B. zwei gleiche
+    Kaffees am selben Tag), damit diese nicht fälschlich als Dublette gelten.
+    """
+    key = f"{account_id}|{row.created_at.isoformat()}|{row.amount:.2f}|{row.note}|{occurrence}"
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+def _records(account_id: int, rows: Iterable[ParsedRow]) -> Iterator[dict]:
+    seen: dict[tuple, int] = {}
+    for row in rows:
+        key = (row.created_at, round(row.amount, 2), row.note)
+        occurrence = seen.get(key, 0)
+        seen[key] = occurrence + 1
+        yield {
+            "account_id": account_id,
+            "amount": row.amount,
+            "note": row.note,
+            "category_id": row.category_id,
+            "created_at": row.created_at,
+            "import_hash": row_hash(account_id, row, occurrence),
+        }
+
+
+# Gleiche Typen wie in "transaction" (Money, DateTime), damit SQLAlchemy die Werte identisch ablegt
+_SQLITE_STAGE = Table(
+    "import_stage", MetaData(),
+    *(Column(name, Transaction.__table__.c[name].type) for name in COLUMNS),
+    prefixes=["TEMPORARY"],
+)
+
+
+def _insert_sqlite(session: Session, batch: list[dict]) -> set[str]:
+    conn = session.connection()
+    _SQLITE_STAGE.create(conn, checkfirst=True)
+    # Liste von Parametern ohne RETURNING -> cursor.executemany()
+    conn.execute(_SQLITE_STAGE.insert(), batch)
+    # Ein Statement für den ganzen Block: der FTS-Trigger (db/search.py) schreibt
+    # seinen Index dann einmal pro Block statt einmal pro Zeile
+    stmt = sqlite_insert(Transaction.__table__).from_select(
+        COLUMNS, select(*_SQLITE_STAGE.c).where(true())  # WHERE nötig, sonst liest SQLite ON CONFLICT als JOIN
+    ).on_conflict_do_nothing(index_elements=["import_hash"]).returning(Transaction.__table__.c.import_hash)
+    inserted = set(conn.execute(stmt).scalars())
+    conn.execute(_SQLITE_STAGE.delete())
+    return inserted
+
+
+def _insert_postgresql(session: Session, batch: list[dict]) -> set[str]:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    for record in batch:
+        # COPY läuft am Money-Typ vorbei, deshalb hier selbst in Cent umrechnen
+        record = {**record, "amount": to_cents(record["amount"])}
+        writer.writerow(["" if record[c] is None else record[c] for c in COLUMNS])
+    buf.seek(0)
+
+    columns = ", ".join(COLUMNS)
+    cursor = session.connection().connection.cursor()
+    try:
+        cursor.execute(
+            "CREATE TEMP TABLE IF NOT EXISTS import_stage ("
+            "account_id integer, amount bigint, note text, category_id integer, "
+            "created_at timestamp, import_hash text) ON COMMIT DELETE ROWS"
+        )
+        # COPY kennt kein ON CONFLICT, deshalb erst in die Staging-Tabelle
+        # Leere Notiz ist "" und nicht NULL
+        cursor.copy_expert(
+            f"COPY import_stage ({columns}) FROM STDIN WITH (FORMAT csv, FORCE_NOT_NULL (note))", buf
+        )
+        cursor.execute(
+            f'INSERT INTO "transaction" ({columns}) SELECT {columns} FROM import_stage '
+            "ON CONFLICT (import_hash) DO NOTHING RETURNING import_hash"
+        )
+        inserted = {row[0] for row in cursor.fetchall()}
+        cursor.execute("TRUNCATE import_stage")
+    finally:
+        cursor.close()
+    return inserted
+
+
+def import_rows(session: Session, account_id: int, rows: Iterable[ParsedRow], fmt: str = "csv",
+                batch_size: int = BATCH_SIZE) -> ImportResult:
+    """Schreibt die Zeilen blockweise, baut das Rollup neu auf und committet einmal."""
+    insert = _insert_postgresql if session.get_bind().dialect.name == "postgresql" else _insert_sqlite
+    result = ImportResult(format=fmt)
+    started = time.perf_counter()
+    until = archive.archived_until(session, account_id)
+    ruleset = rules.load(session)
+
+    batch: list[dict] = []
+    ruled: set[str] = set()  # import_hash der Zeilen im Block, deren Kategorie eine Regel gesetzt hat
+    months: set[tuple[int, int]] = set()
+
+    def flush():
+        # Die Insert-Funktionen liefern die Hashes der tatsächlich eingefügten Zeilen:
+        # Dubletten aus früheren Importen zählen weder als eingefügt noch als kategorisiert
+        inserted = insert(session, batch)
+        result.inserted += len(inserted)
+        result.categorised += len(inserted & ruled)
+        result.rows += len(batch)
+        ruled.clear()
+
+    for record in _records(account_id, rows):
+        if until is not None and record["created_at"].date() < until:
+            result.archived += 1
+            result.rows += 1
+            continue
+        if record["category_id"] is None and ruleset:
+            record["category_id"] = ruleset.match(record["note"], to_cents(record["amount"]))
+            if record["category_id"] is not None:
+                ruled.add(record["import_hash"])
+        batch.append(record)
+        months.add((record["created_at"].year, record["created_at"].month))
+        if len(batch) >= batch_size:
+            flush()
+            batch = []
+    if batch:
+        flush()
+
+    changed = []
+    if result.inserted:
+        rollups.rebuild(session, account_id)
+        bump_versions(session, [account_id])
+        changed = events.collect(session, {account_id: {f"{y:04d}-{m:02d}" for y, m in months}})
+    session.commit()
+    events.broker.publish(changed)
+
+    result.duplicates = result.rows - result.inserted - result.archived
+    result.seconds = round(time.perf_counter() - started, 3)
+    result.rows_per_sec = round(result.rows / result.seconds, 1) if result.seconds else 0.0
+    return result
+
+
+def parse_stream(stream: BinaryIO, fmt: str = "auto", encoding: str = "utf-8-sig") -> tuple[str, Iterator[ParsedRow]]:
+    """Wählt den Parser (bei "auto" anhand der ersten Bytes) und liefert (Format, Zeilen)."""
+    if fmt == "auto":
+        head = stream.read(2048)
+        stream.seek(0)
+        fmt = parsers.detect_format(head.decode(encoding, errors="replace"))
+    if fmt not in parsers.FORMATS:
+        raise ValueError(f"Unbekanntes Format: {fmt}")
+
+    if fmt == "camt053":
+        # XML bringt seine Kodierung selbst mit
+        return fmt, parsers.parse_camt053(stream)
+    text = io.TextIOWrapper(stream, encoding=encoding, errors="replace", newline="")
+    if fmt == "mt940":
+        return fmt, parsers.parse_mt940(text)
+    return fmt, parsers.parse_csv(text)
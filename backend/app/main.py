@@ -1,8 +1,16 @@
+import time
+
 from fastapi import FastAPI
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
+from sqlalchemy import text
 
 # Eigene Module importieren
 from backend.app.core.settings import settings
-from backend.app.db.database import init_db
+from backend.app.core.metrics import MetricsMiddleware, instrument, registry
+from backend.app.api.encoding import JSONResponse as FastJSONResponse
+from backend.app.db.database import async_engine, engine, init_db
+from backend.app.analytics import jobs as report_jobs
 
 # Router importieren
 from backend.app.api.users import router as users_router
@@ -10,15 +18,32 @@ from backend.app.api.accounts import router as accounts_router
 from backend.app.api.transactions import router as transactions_router
 from backend.app.api.categories import router as categories_router
 from backend.app.api.reports import router as reports_router 
+from backend.app.api.dashboard import router as dashboard_router
+from backend.app.api.jobs import router as jobs_router
+from backend.app.api.events import router as events_router
 
 # FastAPI App initialisieren
-app = FastAPI(title=settings.app_name)
+# orjson statt json.dumps für alle Antworten (siehe api/encoding.py)
+app = FastAPI(title=settings.app_name, default_response_class=FastJSONResponse)
+
+# Antworten ab gzip_min_size komprimieren, wenn der Client gzip annimmt
+# (Stufe 5: kaum größer als 9, aber ein Vielfaches schneller)
+app.add_middleware(GZipMiddleware, minimum_size=settings.gzip_min_size, compresslevel=5)
+
+# Latenz, SQL-Statements und SQL-Zeit pro Route (siehe /metrics)
+app.add_middleware(MetricsMiddleware)
+instrument(engine, async_engine.sync_engine)
 
 # Datenbank beim Start initialisieren
 @app.on_event("startup")
 def on_startup():
     init_db()
 
+@app.on_event("shutdown")
+def on_shutdown():
+    # Wartende Report-Jobs nicht mehr starten
+    report_jobs.shutdown()
+
 # --- Router einbinden ---
 # Wir weisen jedem Router ein Präfix zu, z.B. beginnen alle Routen in users_router automatisch mit /users
 # Das "tags"-Attribut sorgt dafür, dass die automatische API-Dokumentation (/docs) schön gruppiert wird.
@@ -27,13 +52,33 @@ app.include_router(accounts_router, prefix="/accounts", tags=["Accounts"])
 app.include_router(transactions_router, prefix="/transactions", tags=["Transactions"])
 app.include_router(categories_router, prefix="/categories", tags=["Categories"])
 app.include_router(reports_router, prefix="/reports", tags=["Reports"])
+app.include_router(dashboard_router, prefix="/dashboard", tags=["Dashboard"])
+app.include_router(jobs_router, prefix="/jobs", tags=["Jobs"])
+app.include_router(events_router, prefix="/events", tags=["Events"])
 
 # --- System-Endpunkte ---
 @app.get("/health", tags=["System"])
 def health():
-    """Überprüft, ob der Server ordnungsgemäß läuft."""
+    """Überprüft, ob der Server läuft und die Datenbank antwortet (503, wenn nicht)."""
+    started = time.perf_counter()
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+    except Exception as e:
+        return JSONResponse(
+            status_code=503,
+            content={"status": "error", "app": settings.app_name, "db": "unreachable", "error": str(e)},
+        )
     return {
         "status": "ok",
         "app": settings.app_name,
         "db": "connected",
-    }
\ No newline at end of file
+        "db_ms": round((time.perf_counter() - started) * 1000, 2),
+    }
+
+
+@app.get("/metrics", tags=["System"], include_in_schema=False)
+def metrics():
+    """Prometheus-Metriken: Latenz-Histogramme, SQL pro Request, langsame Abfragen, Pool."""
+    body = registry.render(pools=[("sync", engine.pool), ("async", async_engine.pool)])
+    return PlainTextResponse(body, media_type="text/plain; version=0.0.4")
\ No newline at end of file
@@ -1,6 +1,7 @@
 import os
 import streamlit as st
 import requests
+from requests.adapters import HTTPAdapter
 import pandas as pd
 import plotly.express as px
 from dotenv import load_dotenv
@@ -9,18 +10,79 @@ load_dotenv()
 API_URL = os.getenv("API_URL") or st.secrets.get("API_URL", "http://localhost:8000")
 st.set_page_config(page_title="Money Dashboard", layout="wide")
 
+# ==========================================
+# API-CLIENT (Keep-Alive & Cache)
+# ==========================================
+TIMEOUT = (3.05, 30)  # (Verbindungsaufbau, Antwort) in Sekunden
+TIMESERIES_POINTS = 600
+PAGE_SIZES = [100, 250, 500, 1000]  # Zeilen pro Seite im Buchungs-Grid
+
+
+@st.cache_resource
+def http() -> requests.Session:
+    # Eine Session für alle Reruns und Nutzer: Verbindungen bleiben offen (Keep-Alive)
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def api(method: str, path: str, **kwargs) -> requests.Response:
+    return http().request(method, f"{API_URL}{path}", timeout=TIMEOUT, **kwargs)
+
+
+# Die Lese-Abfragen werden pro Konto und Datenversion gecacht. Nach jeder Buchung
+# zählt das Backend die Version hoch -> neuer Cache-Schlüssel -> frische Daten.
+# Fehler werden als Exception geworfen, damit sie nicht im Cache landen.
+@st.cache_data(show_spinner=False, max_entries=64)
+def fetch_overview(account_id: int, version: int) -> dict:
+    # Die Zeitreihe dünnt das Backend aus; mehr Punkte als Pixel bringen im Chart nichts
+    r = api("GET", "/dashboard/overview", params={"account_id": account_id, "max_points": TIMESERIES_POINTS})
+    r.raise_for_status()
+    return r.json()
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def fetch_transaction_page(
+    account_id: int, version: int, year: int, month: int | None, cursor: str | None, limit: int
+) -> tuple[dict, str | None]:
+    """Eine Seite Buchungen als Spalten (format=columns) und der Cursor der nächsten Seite."""
+    params = {"account_id": account_id, "year": year, "limit": limit, "format": "columns"}
+    if month:
+        params["month"] = month
+    if cursor:
+        params["cursor"] = cursor
+    r = api("GET", "/transactions/filter", params=params)
+    r.raise_for_status()
+    return r.json(), r.headers.get("X-Next-Cursor")
+
+
+@st.cache_data(show_spinner=False, ttl=600)
+def fetch_categories() -> list:
+    r = api("GET", "/categories/")
+    r.raise_for_status()
+    return r.json()
+
+
 # --- Initialisierung ---
-if "edit_tx_id" not in st.session_state:
-    st.session_state.edit_tx_id = None
+# Cursor der bisher besuchten Seiten (Keyset-Pagination kennt nur "weiter")
+if "tx_cursors" not in st.session_state:
+    st.session_state.tx_cursors = [None]
+    st.session_state.tx_filter = None
+# Wird hochgezählt, um die Änderungen im Grid zu verwerfen (neuer Widget-Key)
+if "tx_editor_round" not in st.session_state:
+    st.session_state.tx_editor_round = 0
 
 # ==========================================
 # SEITENLEISTE (SIDEBAR) & NAVIGATION
 # ==========================================
 st.sidebar.title("💰 Dashboard")
 
-# 1. Konten laden für die globale Auswahl
-acc_r = requests.get(f"{API_URL}/accounts/")
+# 1. Konten laden für die globale Auswahl (liefert auch die Datenversion pro Konto)
+acc_r = api("GET", "/accounts/")
 accounts = acc_r.json() if acc_r.ok else []
+versions = {a["id"]: a.get("version") or 0 for a in accounts}
 
 selected_acc_id = None
 if accounts:
@@ -48,16 +110,23 @@ if page == "📊 Übersicht & Charts":
     if not selected_acc_id:
         st.info("Lege unter 'Einstellungen' ein Konto an, um Charts zu sehen.")
     else:
+        # Alle Daten der Übersicht kommen in einem Aufruf
+        try:
+            overview = fetch_overview(selected_acc_id, versions[selected_acc_id])
+        except requests.RequestException:
+            overview = {}
+
         # --- Zeitreihe (Kontostand-Verlauf) ---
-        ts_r = requests.get(f"{API_URL}/accounts/{selected_acc_id}/timeseries")
-        if ts_r.ok and ts_r.json():
-            df_ts = pd.DataFrame(ts_r.json())
+        if overview.get("timeseries"):
+            df_ts = pd.DataFrame(overview["timeseries"])
             df_ts["day"] = pd.to_datetime(df_ts["day"])
             st.subheader("Kontostand-Verlauf")
             
-            fig_ts = px.line(df_ts, x="day", y="balance", markers=True)
+            # Marker und Spline nur bei wenigen Punkten, sonst wird das Rendern zäh
+            few = len(df_ts) <= 120
+            fig_ts = px.line(df_ts, x="day", y="balance", markers=few)
             fig_ts.update_traces(
-                line_shape='spline', line=dict(width=3, color="#1f77b4"), marker=dict(size=8),
+                line_shape="spline" if few else "linear", line=dict(width=3, color="#1f77b4"), marker=dict(size=8),
                 hovertemplate="<b>Datum:</b> %{x|%d.%m.%Y}<br><b>Kontostand:</b> %{y:.2f} €<extra></extra>"
             )
             fig_ts.update_layout(yaxis_title="Kontostand (€)", hovermode="x unified", xaxis=dict(title="", showgrid=False, tickformat="%d.%m.%Y"))
@@ -72,29 +141,24 @@ if page == "📊 Übersicht & Charts":
         col_chart1, col_chart2 = st.columns(2)
         
         with col_chart1:
-            chart_r_inc = requests.get(f"{API_URL}/reports/chart-data", params={"account_id": selected_acc_id, "tx_type": "income"})
-            if chart_r_inc.ok and chart_r_inc.json():
-                df_inc = pd.DataFrame(chart_r_inc.json())
-                if df_inc["total"].sum() > 0:
-                    fig_inc = px.pie(df_inc, values='total', names='category', hole=0.4, title="Einnahmen 📈")
-                    st.plotly_chart(fig_inc, use_container_width=True)
-                else:
-                    st.info("Noch keine Einnahmen verbucht.")
+            if overview.get("income_by_category"):
+                df_inc = pd.DataFrame(overview["income_by_category"])
+                fig_inc = px.pie(df_inc, values='total', names='category', hole=0.4, title="Einnahmen 📈")
+                st.plotly_chart(fig_inc, use_container_width=True)
+            else:
+                st.info("Noch keine Einnahmen verbucht.")
                     
         with col_chart2:
-            chart_r_exp = requests.get(f"{API_URL}/reports/chart-data", params={"account_id": selected_acc_id, "tx_type": "expense"})
-            if chart_r_exp.ok and chart_r_exp.json():
-                df_exp = pd.DataFrame(chart_r_exp.json())
-                if df_exp["total"].sum() > 0:
-                    fig_exp = px.pie(df_exp, values='total', names='category', hole=0.4, title="Ausgaben 📉")
-                    st.plotly_chart(fig_exp, use_container_width=True)
-                else:
-                    st.info("Noch keine Ausgaben verbucht.")
+            if overview.get("expense_by_category"):
+                df_exp = pd.DataFrame(overview["expense_by_category"])
+                fig_exp = px.pie(df_exp, values='total', names='category', hole=0.4, title="Ausgaben 📉")
+                st.plotly_chart(fig_exp, use_container_width=True)
+            else:
+                st.info("Noch keine Ausgaben verbucht.")
 
         # --- Income vs Expense (Balkendiagramm) ---
-        ie_r = requests.get(f"{API_URL}/accounts/{selected_acc_id}/income-expense")
-        if ie_r.ok:
-            ie = ie_r.json()
+        if overview:
+            ie = overview["income_expense"]
             st.subheader("Einnahmen vs. Ausgaben")
             df_ie = pd.DataFrame({"Typ": ["Einnahmen", "Ausgaben"], "Betrag": [ie["income"], ie["expense"]]})
             fig_bar = px.bar(df_ie, x="Typ", y="Betrag", color="Typ", color_discrete_map={"Einnahmen": "#2ca02c", "Ausgaben": "#d62728"})
@@ -112,8 +176,10 @@ elif page == "💸 Buchungen verwalten":
         st.warning("Bitte lege zuerst ein Konto an.")
     else:
         # Kategorien laden
-        cat_r = requests.get(f"{API_URL}/categories/")
-        categories = cat_r.json() if cat_r.ok else []
+        try:
+            categories = fetch_categories()
+        except requests.RequestException:
+            categories = []
         cat_map = {"(keine)": None}
         cat_map |= {c["name"]: c["id"] for c in categories}
 
@@ -127,7 +193,7 @@ elif page == "💸 Buchungen verwalten":
                 submitted_tx = st.form_submit_button("Buchung speichern")
 
                 if submitted_tx:
-                    r = requests.post(f"{API_URL}/transactions", json={"account_id": selected_acc_id, "amount": amount, "note": note, "category_id": cat_map[selected_category]})
+                    r = api("POST", "/transactions/", json={"account_id": selected_acc_id, "amount": amount, "note": note, "category_id": cat_map[selected_category]})
                     if r.ok:
                         st.success("Erfolgreich gespeichert!")
                         st.rerun()
@@ -135,61 +201,110 @@ elif page == "💸 Buchungen verwalten":
         st.divider()
 
         # --- Filter & Liste ---
+        # Eine Seite vom Server in einem Grid (st.data_editor statt Buttons pro
+        # Zeile). Änderungen, neue und gelöschte Zeilen sammelt das Grid; gespeichert
+        # wird alles zusammen über /transactions/batch in einer DB-Transaktion.
         st.subheader("📅 Buchungen durchsuchen")
-        col_y, col_m = st.columns(2)
+        col_y, col_m, col_n = st.columns(3)
         year = col_y.number_input("Jahr", value=2026, step=1)
         month = col_m.selectbox("Monat", [None] + list(range(1, 13)))
+        page_size = col_n.selectbox("Zeilen pro Seite", PAGE_SIZES, index=1)
 
-        params = {"account_id": selected_acc_id, "year": int(year)}
-        if month:
-            params["month"] = int(month)
+        # Neuer Filter -> zurück auf Seite 1
+        tx_filter = (selected_acc_id, int(year), month, page_size)
+        if st.session_state.tx_filter != tx_filter:
+            st.session_state.tx_filter = tx_filter
+            st.session_state.tx_cursors = [None]
+        page_no = len(st.session_state.tx_cursors)
 
-        flt = requests.get(f"{API_URL}/transactions/filter", params=params)
-        filtered_txs = flt.json() if flt.ok else []
+        try:
+            page_data, next_cursor = fetch_transaction_page(
+                selected_acc_id, versions[selected_acc_id], int(year), month,
+                st.session_state.tx_cursors[-1], page_size,
+            )
+        except requests.RequestException:
+            page_data, next_cursor = {}, None
 
-        if filtered_txs:
-            col_date, col_note, col_amt, col_edit, col_del = st.columns([2, 4, 2, 1, 1])
-            col_date.markdown("**Datum**")
-            col_note.markdown("**Notiz**")
-            col_amt.markdown("**Betrag**")
-            st.write("---")
-            
-            for tx in filtered_txs:
-                c1, c2, c3, c4, c5 = st.columns([2, 4, 2, 1, 1])
-                datum_roh = tx.get("created_at", "")[:10]
-                datum_str = f"{datum_roh[8:10]}.{datum_roh[5:7]}.{datum_roh[0:4]}" if len(datum_roh) == 10 else datum_roh
-                    
-                c1.write(datum_str)
-                c2.write(tx.get("note", ""))
-                c3.write(f"{tx.get('amount', 0):.2f} €")
-                
-                if c4.button("✏️", key=f"edit_f_{tx['id']}"):
-                    st.session_state.edit_tx_id = tx['id']
-                    st.rerun()
-                if c5.button("🗑️", key=f"del_f_{tx['id']}"):
-                    requests.delete(f"{API_URL}/transactions/{tx['id']}")
-                    st.rerun()
-        else:
-            st.info("Für diesen Zeitraum gibt es keine Buchungen.")
+        cat_names = {v: k for k, v in cat_map.items()}
+        df = pd.DataFrame({
+            "id": page_data.get("id", []),
+            "Datum": pd.to_datetime(page_data.get("created_at", [])),
+            "Notiz": page_data.get("note", []),
+            "Betrag": page_data.get("amount", []),
+            "Kategorie": [cat_names.get(c, "(keine)") for c in page_data.get("category_id", [])],
+        })
 
-        # --- Bearbeitungs-Formular ---
-        if st.session_state.edit_tx_id is not None:
-            st.write("---")
-            st.subheader("Buchung bearbeiten ✏️")
-            tx_to_edit = next((t for t in filtered_txs if t['id'] == st.session_state.edit_tx_id), None)
-            
-            if tx_to_edit:
-                with st.form("edit_form_filtered"):
-                    new_note = st.text_input("Notiz", value=tx_to_edit.get("note", ""))
-                    new_amount = st.number_input("Betrag", value=float(tx_to_edit.get("amount", 0)), step=1.0)
-                    col_save, col_cancel = st.columns(2)
-                    if col_save.form_submit_button("Änderungen speichern"):
-                        requests.put(f"{API_URL}/transactions/{tx_to_edit['id']}", json={"amount": new_amount, "note": new_note, "category_id": tx_to_edit.get("category_id")})
-                        st.session_state.edit_tx_id = None
-                        st.rerun()
-                if st.button("❌ Abbrechen"):
-                    st.session_state.edit_tx_id = None
-                    st.rerun()
+        editor_key = f"tx_editor_{st.session_state.tx_editor_round}"
+        st.data_editor(
+            df,
+            key=editor_key,
+            num_rows="dynamic",
+            hide_index=True,
+            use_container_width=True,
+            disabled=["id", "Datum"],
+            column_order=["Datum", "Notiz", "Betrag", "Kategorie"],
+            column_config={
+                "Datum": st.column_config.DatetimeColumn("Datum", format="DD.MM.YYYY"),
+                "Notiz": st.column_config.TextColumn("Notiz", width="large"),
+                "Betrag": st.column_config.NumberColumn("Betrag", format="%.2f €", step=0.01, required=True),
+                "Kategorie": st.column_config.SelectboxColumn("Kategorie", options=list(cat_map.keys()), default="(keine)"),
+            },
+        )
+
+        # Änderungen aus dem Grid-Zustand in ein Change-Set für /transactions/batch übersetzen
+        state = st.session_state.get(editor_key, {})
+        deleted_rows = {int(row) for row in state.get("deleted_rows", [])}
+        changes = {"create": [], "update": [], "delete": [int(df.iloc[row]["id"]) for row in sorted(deleted_rows)]}
+        for row, edited in state.get("edited_rows", {}).items():
+            if int(row) in deleted_rows:
+                continue
+            current = df.iloc[int(row)]
+            merged = {col: edited.get(col, current[col]) for col in ("Notiz", "Betrag", "Kategorie")}
+            changes["update"].append({
+                "id": int(current["id"]),
+                "note": merged["Notiz"] or "",
+                "amount": float(merged["Betrag"]),
+                "category_id": cat_map.get(merged["Kategorie"]),
+            })
+        for added in state.get("added_rows", []):
+            if added.get("Betrag") is None:
+                continue
+            changes["create"].append({
+                "account_id": selected_acc_id,
+                "note": added.get("Notiz") or "",
+                "amount": float(added["Betrag"]),
+                "category_id": cat_map.get(added.get("Kategorie", "(keine)")),
+            })
+        pending = sum(len(v) for v in changes.values())
+
+        col_prev, col_info, col_next, col_save, col_reset = st.columns([1, 2, 1, 2, 1])
+        if col_prev.button("◀", disabled=page_no == 1 or pending > 0):
+            st.session_state.tx_cursors.pop()
+            st.rerun()
+        col_info.write(f"Seite {page_no} · {len(df)} Buchungen")
+        if col_next.button("▶", disabled=next_cursor is None or pending > 0):
+            st.session_state.tx_cursors.append(next_cursor)
+            st.rerun()
+        if col_save.button(f"💾 {pending} Änderungen speichern", disabled=pending == 0, type="primary"):
+            r = api("POST", "/transactions/batch", json=changes)
+            if r.ok:
+                # Neue Datenversion -> die Seite wird beim Rerun frisch geladen
+                st.session_state.tx_editor_round += 1
+                st.rerun()
+            detail = r.json().get("detail") if r.status_code == 422 else None
+            if isinstance(detail, dict):
+                # Batch abgelehnt: pro fehlerhaftem Eintrag eine Zeile, gespeichert wurde nichts
+                for e in detail["results"]:
+                    if e["status"] == "error":
+                        st.error(f"{e['op']} {e.get('id', '')}: {e['error']}")
+            else:
+                st.error(f"Speichern fehlgeschlagen ({r.status_code}): {r.text[:200]}")
+        if col_reset.button("↩️ Verwerfen", disabled=pending == 0):
+            st.session_state.tx_editor_round += 1
+            st.rerun()
+
+        if df.empty:
+            st.info("Für diesen Zeitraum gibt es keine Buchungen.")
 
 
 # ==========================================
@@ -204,7 +319,7 @@ elif page == "⚙️ Einstellungen (Konten & Kategorien)":
         name = st.text_input("Konto-Name", placeholder="z.B. Volksbank Giro")
         currency = st.selectbox("Währung", ["EUR", "USD", "CHF"], index=0)
         if st.form_submit_button("Konto anlegen"):
-            r = requests.post(f"{API_URL}/accounts/", json={"name": name, "currency": currency})
+            r = api("POST", "/accounts/", json={"name": name, "currency": currency})
             if r.ok:
                 st.success(f"Konto angelegt!")
                 st.rerun()
@@ -216,20 +331,24 @@ elif page == "⚙️ Einstellungen (Konten & Kategorien)":
 
     # --- Kategorien verwalten ---
     st.subheader("🏷️ Kategorien")
-    cat_r = requests.get(f"{API_URL}/categories/")
-    categories = cat_r.json() if cat_r.ok else []
+    try:
+        categories = fetch_categories()
+    except requests.RequestException:
+        categories = []
 
     if not categories:
         st.info("Erster Start erkannt: Standard-Kategorien werden eingerichtet...")
         standard_kategorien = ["Lebensmittel & Haushalt", "Wohnen & Miete", "Versicherungen & Steuern", "Mobilität & Auto", "Freizeit & Hobby", "Shopping", "Gesundheit", "Sparen & Investieren", "Gehalt", "Geschenke & Boni"]
         for cat in standard_kategorien:
-            requests.post(f"{API_URL}/categories/", json={"name": cat})
+            api("POST", "/categories/", json={"name": cat})
+        fetch_categories.clear()
         st.rerun()
 
     with st.form("create_category"):
         new_cat_name = st.text_input("Eigene Kategorie hinzufügen", placeholder="z.B. Haustier, Streaming-Abos...")
         if st.form_submit_button("Speichern") and new_cat_name:
-            r = requests.post(f"{API_URL}/categories/", json={"name": new_cat_name})
+            r = api("POST", "/categories/", json={"name": new_cat_name})
             if r.ok:
+                fetch_categories.clear()
                 st.success(f"Kategorie '{new_cat_name}' angelegt!")
                 st.rerun()
@@ -1,25 +1,27 @@
-# Datei: init_db.py
-from sqlmodel import SQLModel
-from backend.app.db.session import engine
+"""Bringt das Datenbankschema auf den neuesten Stand (versionierte Migrationen, siehe backend/app/db/migrations.py).
+
+Aufruf (aus dem Projekt-Root):
+    python init_db.py
+    DATABASE_URL=postgresql://... python init_db.py
+
+Die App macht das beim Start ebenfalls. Mit DB_MIGRATE_ON_STARTUP=false prüfen
+die Worker nur noch die Version; dann dieses Skript einmal vor dem Ausrollen
+laufen lassen.
+"""
+import logging
+
+from backend.app.db import migrations
+from backend.app.db.database import engine
 
-# --- KORREKTUR: Der Pfad muss genau stimmen! ---
-# Deine Datei liegt in: backend/app/db/models.py
-# Also lautet der Import-Pfad: backend.app.db.models
-try:
-    from backend.app.db.models import Account, Transaction, Category
-    print("✅ Modelle erfolgreich importiert!")
-except ImportError as e:
-    print(f"❌ Fehler beim Importieren: {e}")
-    print("Tipp: Prüfe, ob im Ordner 'backend/app/db/' eine leere Datei '__init__.py' liegt.")
-    exit()
 
 def init_db():
-    print("⏳ Verbinde mit Neon Cloud Datenbank...")
-    
-    # Erstelle die Tabellen
-    SQLModel.metadata.create_all(engine)
-    
-    print("✅ ERFOLG! Tabellen (Account, Category, Transaction) wurden in der Cloud erstellt.")
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    applied = migrations.upgrade(engine)
+    if applied:
+        print(f"✅ Migrationen {', '.join(map(str, applied))} eingespielt, Schema-Version {migrations.head()}")
+    else:
+        print(f"✅ Schema ist aktuell (Version {migrations.head()})")
+
 
 if __name__ == "__main__":
-    init_db()
\ No newline at end of file
+    init_db()
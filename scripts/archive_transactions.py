@@ -0,0 +1,47 @@
+"""Archiviert abgeschlossene Monate als Parquet (backend/app/db/archive.py).
+
+Aufruf (aus dem Projekt-Root):
+    python -m scripts.archive_transactions                  # alles älter als 3 volle Monate
+    python -m scripts.archive_transactions --keep-months 12 --account 3
+    python -m scripts.archive_transactions --before 2024-01
+
+Die Dateien landen unter settings.archive_dir (Standard ./archive), je Konto
+und Monat ein Verzeichnis. In der Datenbank bleiben Summenzeilen pro Tag und
+Kategorie zurück, Reports und Salden ändern sich dadurch nicht.
+"""
+import argparse
+from datetime import date
+
+from sqlmodel import Session, select
+
+from backend.app.api.reports import _add_months
+from backend.app.db.archive import archive_account, archive_root
+from backend.app.db.database import engine, init_db
+from backend.app.db.models import Account
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--account", type=int, default=None, help="nur dieses Konto archivieren")
+    parser.add_argument("--keep-months", type=int, default=3, help="so viele Monate vor dem aktuellen bleiben live")
+    parser.add_argument("--before", help="Stichtag als YYYY-MM (statt --keep-months)")
+    args = parser.parse_args(argv)
+
+    if args.before:
+        cutoff = date.fromisoformat(f"{args.before}-01")
+    else:
+        today = date.today()
+        cutoff = date(*_add_months(today.year, today.month, -args.keep_months), 1)
+
+    init_db()
+    with Session(engine) as session:
+        account_ids = [args.account] if args.account else session.exec(select(Account.id)).all()
+    for account_id in account_ids:
+        with Session(engine) as session:
+            result = archive_account(session, account_id, cutoff)
+        print(f"✅ Konto {account_id}: {result.rows} Buchungen vor {cutoff} in {result.files} Dateien archiviert")
+    print(f"📦 Archiv: {archive_root()}")
+
+
+if __name__ == "__main__":
+    main()
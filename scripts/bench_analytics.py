@@ -0,0 +1,86 @@
+"""Vergleicht die Report-Helfer per SQL mit den Spalten-Snapshots (backend/app/analytics).
+
+Aufruf (aus dem Projekt-Root):
+    python -m scripts.bench_analytics
+    python -m scripts.bench_analytics --rows 1000000 --repeat 50
+
+Legt eine temporäre SQLite-Datenbank an (oder nutzt --url), prüft, dass beide
+Wege dieselben Ergebnisse liefern, und misst die Latenz pro Aufruf. Der erste
+Snapshot-Zugriff (Laden) wird separat ausgewiesen.
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+
+def _timed(fn, repeat: int) -> float:
+    runs = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        runs.append(time.perf_counter() - t0)
+    return statistics.median(runs) * 1000
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="Datenbank-URL (Standard: temporäre SQLite-Datei)")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    tmp = tempfile.TemporaryDirectory()
+    os.environ["DATABASE_URL"] = args.url or f"sqlite:///{tmp.name}/bench.db"
+
+    from sqlmodel import Session
+
+    from backend.app.analytics import columnar
+    from backend.app.api import accounts, reports
+    from backend.app.db import rollups
+    from backend.app.db.database import engine
+    from scripts.bench_async import seed
+
+    print(f"⏳ Lege {args.rows} Buchungen an ...")
+    account_id = seed(args.rows, 1)[0]
+
+    pairs = {
+        "timeseries": (
+            lambda s: rollups.daily_closings(s, account_id),
+            lambda s: columnar.daily_closings(s, account_id),
+        ),
+        "income-expense": (
+            lambda s: accounts._income_expense(s, account_id),
+            lambda s: columnar.income_expense(s, account_id),
+        ),
+        "monthly": (
+            lambda s: reports._period_reports(s, account_id, 2024, 6, 1),
+            lambda s: reports._period_reports_columnar(s, account_id, 2024, 6, 1),
+        ),
+        "range (36 Monate)": (
+            lambda s: reports._period_reports(s, account_id, 2023, 1, 36),
+            lambda s: reports._period_reports_columnar(s, account_id, 2023, 1, 36),
+        ),
+        "chart-data": (
+            lambda s: reports._chart_data(s, account_id, "expense"),
+            lambda s: columnar.chart_data(s, account_id, "expense"),
+        ),
+    }
+
+    with Session(engine) as session:
+        t0 = time.perf_counter()
+        columnar.store.get(session, account_id)
+        print(f"Snapshot laden: {(time.perf_counter() - t0) * 1000:.1f} ms")
+
+        print(f"{'Auswertung':20} {'SQL ms':>8} {'Snapshot ms':>12} {'gleich':>7}")
+        for name, (sql, snap) in pairs.items():
+            same = sql(session) == snap(session)
+            sql_ms = _timed(lambda: sql(session), args.repeat)
+            snap_ms = _timed(lambda: snap(session), args.repeat)
+            print(f"{name:20} {sql_ms:8.2f} {snap_ms:12.2f} {'ja' if same else 'NEIN':>7}")
+    tmp.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""Vergleicht Requests/s der async-Routen mit dem synchronen Pfad unter paralleler Last.
+
+Aufruf (aus dem Projekt-Root):
+    python -m scripts.bench_async
+    python -m scripts.bench_async --rows 500000 --concurrency 64 --requests 4000
+
+Legt eine temporäre SQLite-Datenbank mit Testbuchungen an (oder nutzt --url),
+startet uvicorn in einem eigenen Prozess und feuert parallel Requests auf jeden
+Endpunkt – einmal auf die async-Route, einmal auf eine synchrone Zwillingsroute
+(def + Session aus dem Threadpool), die dieselben Query-Helfer aufruft.
+"""
+import argparse
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import requests
+
+
+def create_app():
+    """App-Factory für uvicorn: die normale App plus synchrone Vergleichsrouten unter /sync."""
+    from fastapi import APIRouter, Depends
+    from sqlmodel import Session
+
+    from backend.app.api import accounts, dashboard, reports
+    from backend.app.db import rollups
+    from backend.app.db.session import engine, get_session
+    from backend.app.main import app
+
+    sync = APIRouter(prefix="/sync")
+
+    @sync.get("/accounts/{account_id}/timeseries")
+    def timeseries(account_id: int, session: Session = Depends(get_session)):
+        return rollups.daily_closings(session, account_id)
+
+    @sync.get("/accounts/{account_id}/income-expense")
+    def income_expense(account_id: int, session: Session = Depends(get_session)):
+        return accounts._income_expense(session, account_id)
+
+    @sync.get("/reports/monthly")
+    def monthly(account_id: int, year: int, month: int, session: Session = Depends(get_session)):
+        return {"account_id": account_id, **reports._period_reports(session, account_id, year, month, 1)[0]}
+
+    @sync.get("/reports/chart-data")
+    def chart_data(account_id: int, tx_type: str = "expense", session: Session = Depends(get_session)):
+        return reports._chart_data(session, account_id, tx_type)
+
+    @sync.get("/dashboard/overview")
+    def overview(account_id: int, session: Session = Depends(get_session)):
+        return dashboard._overview(
+            account_id, rollups.daily_closings(session, account_id), dashboard._category_totals(session, account_id)
+        )
+
+    app.include_router(sync)
+    return app
+
+
+def seed(rows: int, accounts: int) -> list[int]:
+    """Legt Konten, Kategorien und zufällige Buchungen über drei Jahre an (per Import-Pipeline)."""
+    from sqlmodel import Session
+
+    from backend.app.db.database import engine, init_db
+    from backend.app.db.models import Account, Category
+    from backend.app.importer.parsers import ParsedRow
+    from backend.app.importer.pipeline import import_rows
+
+    init_db()
+    rng = random.Random(42)
+    start = datetime(2023, 1, 1)
+    with Session(engine) as session:
+        ids = []
+        for i in range(accounts):
+            acc = Account(name=f"Bench {i}")
+            session.add(acc)
+            ids.append(acc)
+        for name in ("Miete", "Lebensmittel", "Gehalt", "Freizeit"):
+            session.add(Category(name=name))
+        session.commit()
+        ids = [acc.id for acc in ids]
+
+        for account_id in ids:
+            generated = (
+                ParsedRow(
+                    created_at=start + timedelta(minutes=rng.randint(0, 3 * 365 * 24 * 60)),
+                    amount=round(rng.uniform(-150, 120), 2),
+                    note=f"Bench {n}",
+                )
+                for n in range(rows // accounts)
+            )
+            import_rows(session, account_id, generated, "bench")
+    return ids
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def load(url: str, params: dict, total: int, concurrency: int) -> dict:
+    """Schickt total Requests mit concurrency parallelen Clients, liefert req/s und Latenzen."""
+    per_worker = total // concurrency
+
+    def worker(_):
+        http = requests.Session()
+        latencies = []
+        for _ in range(per_worker):
+            t0 = time.perf_counter()
+            r = http.get(url, params=params)
+            r.raise_for_status()
+            latencies.append(time.perf_counter() - t0)
+        return latencies
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        latencies = [lat for chunk in pool.map(worker, range(concurrency)) for lat in chunk]
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "rps": len(latencies) / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+    }
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="Datenbank-URL (Standard: temporäre SQLite-Datei)")
+    parser.add_argument("--rows", type=int, default=100_000, help="Anzahl Testbuchungen")
+    parser.add_argument("--accounts", type=int, default=4)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=2000, help="Requests pro Endpunkt und Variante")
+    args = parser.parse_args(argv)
+
+    tmp = tempfile.TemporaryDirectory()
+    os.environ["DATABASE_URL"] = args.url or f"sqlite:///{tmp.name}/bench.db"
+    print(f"⏳ Lege {args.rows} Buchungen an ...")
+    account_id = seed(args.rows, args.accounts)[0]
+
+    port = _free_port()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "--factory", "scripts.bench_async:create_app",
+         "--port", str(port), "--log-level", "warning"],
+        env=os.environ.copy(),
+    )
+    base = f"http://127.0.0.1:{port}"
+    try:
+        for _ in range(100):
+            try:
+                requests.get(f"{base}/health", timeout=1)
+                break
+            except requests.ConnectionError:
+                time.sleep(0.1)
+
+        endpoints = [
+            (f"/accounts/{account_id}/timeseries", {}),
+            (f"/accounts/{account_id}/income-expense", {}),
+            ("/reports/monthly", {"account_id": account_id, "year": 2024, "month": 6}),
+            ("/reports/chart-data", {"account_id": account_id}),
+            ("/dashboard/overview", {"account_id": account_id}),
+        ]
+        print(f"{'Endpunkt':40} {'sync req/s':>11} {'async req/s':>12} {'sync p95':>9} {'async p95':>10}")
+        for path, params in endpoints:
+            sync = load(f"{base}/sync{path}", params, args.requests, args.concurrency)
+            async_ = load(f"{base}{path}", params, args.requests, args.concurrency)
+            print(
+                f"{path:40} {sync['rps']:11.0f} {async_['rps']:12.0f} "
+                f"{sync['p95_ms']:7.1f}ms {async_['p95_ms']:8.1f}ms"
+            )
+    finally:
+        server.terminate()
+        server.wait()
+        tmp.cleanup()
+
+
+if __name__ == "__main__":
+    main()
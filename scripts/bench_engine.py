@@ -0,0 +1,98 @@
+"""Vergleicht Durchsatz der alten Engine (echo=True, ohne Pool-/Pragma-Tuning) mit make_engine().
+
+Aufruf (aus dem Projekt-Root):
+    python -m scripts.bench_engine
+    python -m scripts.bench_engine --writes 2000 --reads 5000 --threads 8
+
+Jede Variante bekommt eine eigene temporäre SQLite-Datei. Gemessen werden
+einzelne Buchungen mit je einem Commit (LedgerWriter, wie POST /transactions)
+und parallele Lesezugriffe auf Saldo und Zeitreihe aus mehreren Threads.
+Das SQL-Logging der alten Engine wird in /dev/null geschrieben, kostet aber
+trotzdem die Formatierung jedes Statements – so wie vorher im Betrieb.
+"""
+import argparse
+import logging
+import os
+import random
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from sqlmodel import Session, SQLModel, create_engine
+
+from backend.app.db import rollups
+from backend.app.db.database import make_engine
+from backend.app.db.ledger import LedgerWriter
+from backend.app.db.models import Account, TransactionCreate
+
+
+def baseline_engine(url: str):
+    # So wurden die Engines vor der Zusammenlegung erstellt
+    return create_engine(url, echo=True, connect_args={"check_same_thread": False})
+
+
+def measure(engine, writes: int, reads: int, threads: int) -> dict:
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        account = Account(name="Bench")
+        session.add(account)
+        session.commit()
+        account_id = account.id
+
+    rng = random.Random(7)
+    start = datetime(2024, 1, 1)
+    t0 = time.perf_counter()
+    with Session(engine) as session:
+        for n in range(writes):
+            writer = LedgerWriter(session)
+            writer.create(TransactionCreate(
+                account_id=account_id,
+                amount=round(rng.uniform(-100, 100), 2),
+                note=f"Bench {n}",
+                created_at=start + timedelta(hours=rng.randint(0, 365 * 24)),
+            ))
+            writer.commit()
+    write_rate = writes / (time.perf_counter() - t0)
+
+    def reader(count: int) -> None:
+        with Session(engine) as session:
+            for _ in range(count):
+                rollups.current_balance(session, account_id)
+                rollups.daily_closings(session, account_id)
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(threads) as pool:
+        list(pool.map(reader, [reads // threads] * threads))
+    read_rate = (reads // threads * threads) / (time.perf_counter() - t0)
+    engine.dispose()
+    return {"writes": write_rate, "reads": read_rate}
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--writes", type=int, default=1000, help="Einzel-Commits pro Variante")
+    parser.add_argument("--reads", type=int, default=2000, help="Lesezugriffe (Saldo + Zeitreihe) pro Variante")
+    parser.add_argument("--threads", type=int, default=8)
+    args = parser.parse_args(argv)
+
+    # echo=True schreibt über logging nach stdout; für die Messung ins Leere umleiten
+    sql_log = logging.getLogger("sqlalchemy.engine.Engine")
+    sql_log.addHandler(logging.FileHandler(os.devnull))
+    sql_log.propagate = False
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, factory in (("vorher", baseline_engine), ("nachher", make_engine)):
+            url = f"sqlite:///{tmp}/{name}.db"
+            results[name] = measure(factory(url), args.writes, args.reads, args.threads)
+
+    print(f"{'Variante':10} {'Commits/s':>10} {'Reads/s':>10}")
+    for name, r in results.items():
+        print(f"{name:10} {r['writes']:10.0f} {r['reads']:10.0f}")
+    before, after = results["vorher"], results["nachher"]
+    print(f"Faktor     {after['writes'] / before['writes']:9.1f}x {after['reads'] / before['reads']:9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
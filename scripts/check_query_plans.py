@@ -0,0 +1,33 @@
+"""Prüft per EXPLAIN, ob die Report-Abfragen die Indizes der Transaktions-Tabelle nutzen.
+
+Aufruf (aus dem Projekt-Root):
+    python -m scripts.check_query_plans                 # frische SQLite-Datenbank
+    python -m scripts.check_query_plans --url postgresql://...   # zusätzlich eine leere PostgreSQL-Test-Datenbank
+
+Die Prüfungen selbst stehen in tests/test_query_plans.py und laufen auch mit
+"python -m pytest"; das Skript ruft nur diese Tests auf. Läuft eine Abfrage als
+Full Table Scan, endet es mit Exit-Code 1.
+"""
+import argparse
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+TESTS = Path(__file__).resolve().parents[1] / "tests" / "test_query_plans.py"
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="PostgreSQL-Test-Datenbank (wird geleert), setzt TEST_DATABASE_URL")
+    parser.add_argument("-v", "--verbose", action="store_true", help="jede Abfrage einzeln ausgeben")
+    args = parser.parse_args(argv)
+
+    if args.url:
+        os.environ["TEST_DATABASE_URL"] = args.url
+    return int(pytest.main([str(TESTS), "-v" if args.verbose else "-q"]))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,150 @@
+"""Erzeugt reproduzierbare Testdaten: Nutzer, Konten, Kategorien und jahrelange Buchungshistorie.
+
+Aufruf (aus dem Projekt-Root):
+    python -m scripts.generate_data                                   # Standard-Größe in die konfigurierte DB
+    python -m scripts.generate_data --accounts 200 --years 5 --per-month 120 --seed 7
+    python -m scripts.generate_data --url sqlite:///./bench.db --reset
+
+Gleicher Seed, gleiche Größe und gleiches --until ergeben exakt dieselben
+Daten. Die Verteilung ist absichtlich schief:
+- Kontogrößen folgen einer Pareto-Verteilung (wenige sehr aktive Konten)
+- Kategorien werden Zipf-artig gewählt (Lebensmittel viel häufiger als Reisen)
+- Beträge sind pro Kategorie log-normal verteilt
+- dazu feste Buchungen: Gehalt, Miete, Strom, Versicherung; ~10 % ohne Kategorie
+Geschrieben wird über die Import-Pipeline (Bulk-Insert + Rollup).
+"""
+import argparse
+import math
+import os
+import random
+from datetime import date, datetime, timedelta
+
+# (Name, Gewicht, Median-Betrag, Streuung, Händler) – Gewichte ~ 1/Rang
+VARIABLE = [
+    ("Lebensmittel", 1 / 1, 28.0, 0.7, ["REWE", "EDEKA", "ALDI SUED", "LIDL", "Netto"]),
+    ("Restaurant", 1 / 2, 24.0, 0.6, ["Lieferando", "Pizzeria Roma", "Bäckerei Kamps", "Cafe Central"]),
+    ("Online-Shopping", 1 / 3, 45.0, 0.9, ["AMAZON EU", "Zalando", "Otto", "eBay"]),
+    ("Tanken", 1 / 4, 65.0, 0.3, ["ARAL", "Shell", "JET", "Total"]),
+    ("Drogerie", 1 / 5, 18.0, 0.5, ["dm-drogerie markt", "Rossmann"]),
+    ("Freizeit", 1 / 6, 35.0, 0.8, ["Kino Cinemaxx", "Fitnessstudio", "Spotify", "Netflix"]),
+    ("Mobilität", 1 / 7, 12.0, 0.8, ["DB Vertrieb", "MVG", "Uber"]),
+    ("Gesundheit", 1 / 8, 25.0, 0.9, ["Apotheke am Markt", "Dr. med. Weber"]),
+    ("Reisen", 1 / 12, 380.0, 0.8, ["Lufthansa", "Booking.com", "Airbnb"]),
+]
+FIXED = ["Gehalt", "Miete", "Strom", "Versicherung", "Erstattung"]
+NO_CATEGORY_SHARE = 0.1
+# Feste Obergrenze statt "heute", damit Läufe an verschiedenen Tagen vergleichbar bleiben
+UNTIL = date(2025, 1, 1)
+
+
+def _lognormal(rng: random.Random, median: float, sigma: float) -> float:
+    return round(median * math.exp(rng.gauss(0, sigma)), 2)
+
+
+def _months(start: date, months: int):
+    for i in range(months):
+        idx = start.year * 12 + start.month - 1 + i
+        yield idx // 12, idx % 12 + 1
+
+
+def account_rows(rng: random.Random, categories: dict[str, int], start: date, months: int, per_month: float):
+    """Buchungen eines Kontos, chronologisch nicht sortiert (die Pipeline braucht das nicht)."""
+    from backend.app.importer.parsers import ParsedRow
+
+    # Aktivität und Einkommen pro Konto: wenige Konten sind sehr groß
+    activity = min(rng.paretovariate(1.5), 20.0)
+    salary = _lognormal(rng, 3200, 0.35)
+    rent = round(salary * rng.uniform(0.25, 0.4), 2)
+    names = [v[0] for v in VARIABLE]
+    weights = [v[1] for v in VARIABLE]
+    spec = {v[0]: v for v in VARIABLE}
+
+    def category(name: str):
+        return None if rng.random() < NO_CATEGORY_SHARE else categories[name]
+
+    for year, month in _months(start, months):
+        first = datetime(year, month, 1)
+        days = (datetime(year + month // 12, month % 12 + 1, 1) - first).days
+        yield ParsedRow(first + timedelta(days=rng.randint(0, 2), hours=6), salary, "Gehalt", categories["Gehalt"])
+        yield ParsedRow(first + timedelta(hours=8), -rent, "Miete", categories["Miete"])
+        yield ParsedRow(first + timedelta(days=14, hours=9), -_lognormal(rng, 85, 0.2), "Stadtwerke Strom",
+                        categories["Strom"])
+        if month % 3 == 1:
+            yield ParsedRow(first + timedelta(days=1, hours=9), -_lognormal(rng, 140, 0.3), "Allianz Versicherung",
+                            categories["Versicherung"])
+        if rng.random() < 0.05:
+            yield ParsedRow(first + timedelta(days=rng.randrange(days)), _lognormal(rng, 60, 0.8),
+                            "Erstattung", categories["Erstattung"])
+
+        # Poisson-ähnliche Anzahl variabler Buchungen
+        count = max(0, int(rng.gauss(per_month * activity, math.sqrt(per_month * activity))))
+        for name in rng.choices(names, weights, k=count):
+            _, _, median, sigma, merchants = spec[name]
+            when = first + timedelta(days=rng.randrange(days), minutes=rng.randrange(7 * 60, 22 * 60))
+            note = f"{rng.choice(merchants)} {rng.randint(1000, 9999)}"
+            yield ParsedRow(when, -_lognormal(rng, median, sigma), note, category(name))
+
+
+def generate(session, accounts: int = 20, years: int = 3, per_month: float = 40, seed: int = 42,
+             users: int | None = None, until: date = UNTIL) -> dict:
+    """Füllt die Datenbank und liefert eine kleine Zusammenfassung (IDs, Anzahl Buchungen)."""
+    from sqlmodel import select
+
+    from backend.app.db.models import Account, Category, User
+    from backend.app.importer.pipeline import import_rows
+
+    existing = {c.name: c.id for c in session.exec(select(Category)).all()}
+    for name in [v[0] for v in VARIABLE] + FIXED:
+        if name not in existing:
+            category = Category(name=name)
+            session.add(category)
+            session.flush()
+            existing[name] = category.id
+
+    for i in range(users if users is not None else max(1, accounts // 2)):
+        session.add(User(name=f"Testnutzer {i}", email=f"user{i}@example.com"))
+
+    created = [Account(name=f"Konto {i}", currency="EUR") for i in range(accounts)]
+    session.add_all(created)
+    session.commit()
+
+    start = date(until.year - years, until.month, 1)
+    rows = 0
+    for i, account in enumerate(created):
+        # Eigener Zufallsstrom pro Konto: Ergebnis hängt nicht von der Reihenfolge ab
+        account_rng = random.Random(f"{seed}-{i}")
+        result = import_rows(session, account.id, account_rows(account_rng, existing, start, years * 12, per_month),
+                             "generated")
+        rows += result.inserted
+    return {"accounts": [a.id for a in created], "categories": existing, "transactions": rows,
+            "start": start, "until": until}
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="Datenbank-URL (Standard: DATABASE_URL bzw. Settings)")
+    parser.add_argument("--accounts", type=int, default=20)
+    parser.add_argument("--years", type=int, default=3)
+    parser.add_argument("--per-month", type=float, default=40, help="variable Buchungen pro Konto und Monat (Mittel)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--until", default=UNTIL.strftime("%Y-%m"), help="erster Monat ohne Buchungen (YYYY-MM)")
+    parser.add_argument("--reset", action="store_true", help="alle Tabellen vorher löschen")
+    args = parser.parse_args(argv)
+
+    if args.url:
+        os.environ["DATABASE_URL"] = args.url
+    from sqlmodel import Session, SQLModel
+
+    from backend.app.db.database import engine, init_db
+
+    if args.reset:
+        SQLModel.metadata.drop_all(engine)
+    init_db()
+    with Session(engine) as session:
+        summary = generate(session, args.accounts, args.years, args.per_month, args.seed,
+                           until=date.fromisoformat(f"{args.until}-01"))
+    print(f"✅ {len(summary['accounts'])} Konten, {summary['transactions']} Buchungen (Seed {args.seed})")
+
+
+if __name__ == "__main__":
+    main()
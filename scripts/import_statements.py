@@ -0,0 +1,38 @@
+"""Importiert Kontoauszüge (CSV, CAMT.053, MT940) direkt in die Datenbank.
+
+Aufruf (aus dem Projekt-Root):
+    python -m scripts.import_statements --account 1 auszug.csv
+    python -m scripts.import_statements --account 1 --format mt940 --encoding cp1252 *.sta
+
+Bereits importierte Zeilen werden anhand ihres Inhalts-Hashes übersprungen.
+"""
+import argparse
+
+from sqlmodel import Session
+
+from backend.app.db.database import engine, init_db
+from backend.app.importer.pipeline import BATCH_SIZE, import_rows, parse_stream
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("files", nargs="+", help="Auszugsdateien")
+    parser.add_argument("--account", type=int, required=True, help="Ziel-Konto (ID)")
+    parser.add_argument("--format", default="auto", choices=["auto", "csv", "camt053", "mt940"])
+    parser.add_argument("--encoding", default="utf-8-sig", help="Text-Kodierung für CSV/MT940")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    args = parser.parse_args(argv)
+
+    init_db()
+    for path in args.files:
+        with open(path, "rb") as stream, Session(engine) as session:
+            fmt, rows = parse_stream(stream, args.format, args.encoding)
+            result = import_rows(session, args.account, rows, fmt, args.batch_size)
+        print(
+            f"✅ {path} ({result.format}): {result.inserted} neu, {result.duplicates} Dubletten, "
+            f"{result.rows_per_sec:.0f} Zeilen/s"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+"""Baut das Tages-Rollup (DailyBalance) aus den Rohbuchungen neu auf.
+
+Aufruf (aus dem Projekt-Root):
+    python -m scripts.rebuild_rollups              # alle Konten
+    python -m scripts.rebuild_rollups --account 3  # nur ein Konto
+
+Für den Backfill nach dem Einspielen von Altdaten oder zur Reparatur,
+falls Buchungen am Backend vorbei geändert wurden.
+"""
+import argparse
+
+from sqlmodel import Session
+
+from backend.app.db import rollups
+from backend.app.db.database import engine, init_db
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--account", type=int, default=None, help="nur dieses Konto neu berechnen")
+    args = parser.parse_args(argv)
+
+    init_db()
+    with Session(engine) as session:
+        days = rollups.rebuild(session, args.account)
+        session.commit()
+    print(f"✅ Rollup neu aufgebaut: {days} Tageszeilen")
+
+
+if __name__ == "__main__":
+    main()
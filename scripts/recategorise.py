@@ -0,0 +1,33 @@
+"""Wendet die Kategorisierungsregeln (CategoryRule) auf bestehende Buchungen an.
+
+Aufruf (aus dem Projekt-Root):
+    python -m scripts.recategorise                  # alle Buchungen ohne Kategorie
+    python -m scripts.recategorise --account 3      # nur ein Konto
+    python -m scripts.recategorise --overwrite      # auch bereits kategorisierte Buchungen
+
+Gedacht für den Backfill, nachdem neue Regeln angelegt wurden. Neue Buchungen
+werden beim Anlegen und beim Import schon automatisch kategorisiert.
+"""
+import argparse
+
+from sqlmodel import Session
+
+from backend.app.db import rules
+from backend.app.db.database import engine, init_db
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--account", type=int, default=None, help="nur dieses Konto")
+    parser.add_argument("--overwrite", action="store_true", help="auch Buchungen mit Kategorie neu zuordnen")
+    args = parser.parse_args(argv)
+
+    init_db()
+    with Session(engine) as session:
+        result = rules.recategorise(session, account_id=args.account, overwrite=args.overwrite)
+    print(f"✅ {result.rows} Buchungen geprüft, {result.changed} neu kategorisiert "
+          f"({result.seconds:.2f} s, {result.rows_per_sec:,.0f} Zeilen/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Gemeinsame Fixtures der Tests.
+
+Aufruf (aus dem Projekt-Root):
+    python -m pytest -q
+    TEST_DATABASE_URL=postgresql://... python -m pytest -q   # zusätzlich gegen eine leere PostgreSQL-Test-Datenbank
+
+database.py liest DATABASE_URL schon beim Import, deshalb werden App-Datenbank,
+Jobs-Datenbank und Archiv-Verzeichnis hier vor dem ersten Import aus backend
+auf ein temporäres Verzeichnis gelegt.
+"""
+import os
+import tempfile
+from pathlib import Path
+
+_TMP = Path(tempfile.mkdtemp(prefix="dashboard-tests-"))
+os.environ["DATABASE_URL"] = f"sqlite:///{(_TMP / 'app.db').as_posix()}"
+os.environ["JOBS_DATABASE_URL"] = f"sqlite:///{(_TMP / 'jobs.db').as_posix()}"
+os.environ["ARCHIVE_DIR"] = str(_TMP / "archive")
+
+import pytest  # noqa: E402
+from sqlalchemy import text  # noqa: E402
+from sqlmodel import SQLModel  # noqa: E402
+
+from backend.app.core.settings import settings  # noqa: E402
+from backend.app.db import migrations  # noqa: E402
+from backend.app.db.database import make_engine  # noqa: E402
+
+
+@pytest.fixture
+def engine(tmp_path):
+    """Frische SQLite-Datei, per migrations.upgrade auf den aktuellen Stand gebracht."""
+    engine = make_engine(f"sqlite:///{(tmp_path / 'test.db').as_posix()}")
+    migrations.upgrade(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def archive_dir(tmp_path, monkeypatch):
+    path = tmp_path / "archive"
+    monkeypatch.setattr(settings, "archive_dir", str(path))
+    return path
+
+
+def pg_engine_or_skip():
+    """Engine auf TEST_DATABASE_URL mit leerem, migriertem Schema; ohne erreichbares PostgreSQL wird übersprungen."""
+    url = os.environ.get("TEST_DATABASE_URL")
+    if not url:
+        pytest.skip("TEST_DATABASE_URL nicht gesetzt")
+    engine = None
+    try:
+        engine = make_engine(url)
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+    except Exception as exc:  # noqa: BLE001 - Treiber fehlt, Server nicht erreichbar, ...
+        if engine is not None:
+            engine.dispose()
+        pytest.skip(f"PostgreSQL nicht erreichbar: {exc}")
+    if engine.dialect.name != "postgresql":
+        engine.dispose()
+        pytest.skip("TEST_DATABASE_URL ist keine PostgreSQL-URL")
+    SQLModel.metadata.drop_all(engine)
+    migrations.upgrade(engine)
+    return engine
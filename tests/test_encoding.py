@@ -0,0 +1,28 @@
+"""Listen-Routen mit ?format=columns: Antwort und OpenAPI-Schema passen zu beiden Formen."""
+import orjson
+import pytest
+from fastapi import Response
+
+from backend.app.api.encoding import render
+from backend.app.api.transactions import TRANSACTION_FIELDS
+from backend.app.main import app
+
+
+def test_render_rows_and_columns():
+    rows = [{"day": "2025-01-01", "balance": 1.5}, {"day": "2025-01-02", "balance": -2.0}]
+    assert orjson.loads(render(rows, Response(), ("day", "balance")).body) == rows
+    assert orjson.loads(render(rows, Response(), ("day", "balance"), "columns").body) == {
+        "day": ["2025-01-01", "2025-01-02"], "balance": [1.5, -2.0],
+    }
+    assert orjson.loads(render([], Response(), ("day", "balance"), "columns").body) == {"day": [], "balance": []}
+
+
+@pytest.mark.parametrize("path", ["/transactions/", "/transactions/filter", "/transactions/search"])
+def test_transaction_lists_document_both_shapes(path):
+    spec = app.openapi()
+    shapes = spec["paths"][path]["get"]["responses"]["200"]["content"]["application/json"]["schema"]["anyOf"]
+    assert {"type": "array", "items": {"$ref": "#/components/schemas/Transaction"}} in shapes
+    assert {"$ref": "#/components/schemas/TransactionColumns"} in shapes
+    columns = spec["components"]["schemas"]["TransactionColumns"]["properties"]
+    assert list(columns) == list(TRANSACTION_FIELDS)
+    assert all(field["type"] == "array" for field in columns.values())
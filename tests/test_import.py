@@ -0,0 +1,34 @@
+"""Statement-Import: Dubletten beim Re-Import zählen weder als eingefügt noch als kategorisiert."""
+from datetime import datetime
+
+from sqlmodel import Session, func, select
+
+from backend.app.db.models import Account, Category, CategoryRule, Transaction
+from backend.app.importer.parsers import ParsedRow
+from backend.app.importer.pipeline import import_rows
+
+ROWS = [
+    ParsedRow(created_at=datetime(2025, 1, 2), amount=-23.4, note="REWE Markt"),
+    ParsedRow(created_at=datetime(2025, 1, 3), amount=-4.5, note="Bäckerei"),
+    ParsedRow(created_at=datetime(2025, 1, 3), amount=-4.5, note="Bäckerei"),
+    ParsedRow(created_at=datetime(2025, 1, 5), amount=-61.0, note="rewe center"),
+]
+
+
+def test_reimport_counts_nothing_as_categorised(engine):
+    with Session(engine) as session:
+        account, category = Account(name="Import"), Category(name="Lebensmittel")
+        session.add_all([account, category])
+        session.commit()
+        session.add(CategoryRule(pattern="rewe", category_id=category.id))
+        session.commit()
+
+        first = import_rows(session, account.id, ROWS, batch_size=3)
+        assert (first.rows, first.inserted, first.duplicates, first.categorised) == (4, 4, 0, 2)
+
+        # Nur eine neue Zeile, die übrigen sind schon da
+        again = import_rows(session, account.id, ROWS + [
+            ParsedRow(created_at=datetime(2025, 1, 9), amount=-12.0, note="REWE to go"),
+        ], batch_size=3)
+        assert (again.rows, again.inserted, again.duplicates, again.categorised) == (5, 1, 4, 1)
+        assert session.exec(select(func.count()).select_from(Transaction)).one() == 5
@@ -0,0 +1,78 @@
+"""Report-Jobs: zwischengespeicherte Ergebnisse werden über die Datenversion der Konten ungültig."""
+import time
+from datetime import datetime
+
+import pytest
+from sqlmodel import Session
+
+from backend.app.analytics import jobs
+from backend.app.core.settings import settings
+from backend.app.db.ledger import LedgerWriter
+from backend.app.db.models import Account, TransactionCreate
+
+
+@pytest.fixture
+def app_engine(engine, tmp_path, monkeypatch):
+    """Jobs rechnen auf der Test-Datenbank und legen sich in einer eigenen Job-Datei ab."""
+    monkeypatch.setattr(jobs, "engine", engine)
+    monkeypatch.setattr(jobs, "_engine", None)
+    monkeypatch.setattr(settings, "jobs_database_url", f"sqlite:///{(tmp_path / 'jobs.db').as_posix()}")
+    yield engine
+    jobs.shutdown()
+    jobs.jobs_engine().dispose()
+
+
+def _book(session: Session, account_id: int, amount: float, when: datetime) -> None:
+    writer = LedgerWriter(session)
+    writer.create(TransactionCreate(account_id=account_id, amount=amount, created_at=when))
+    writer.commit()
+
+
+def _wait(job_id: str, timeout: float = 10.0) -> tuple[dict, object]:
+    deadline = time.monotonic() + timeout
+    while True:
+        job, result = jobs.get(job_id, with_result=True)
+        if job["status"] not in (jobs.QUEUED, jobs.RUNNING) or time.monotonic() > deadline:
+            return job, result
+        time.sleep(0.02)
+
+
+def test_result_is_cached_until_the_account_changes(app_engine):
+    with Session(app_engine) as session:
+        account = Account(name="Jobs")
+        session.add(account)
+        session.commit()
+        account_id = account.id
+        _book(session, account_id, 50.0, datetime(2025, 1, 1, 9))
+
+        job_id = jobs.submit("timeseries", {"account_id": account_id})["id"]
+        job, result = _wait(job_id)
+        assert job["status"] == jobs.DONE
+        assert result["points"] == [{"day": "2025-01-01", "balance": 50.0}]
+
+        # Gleiche Anfrage, unveränderte Daten: dasselbe Ergebnis ohne neuen Job
+        again = jobs.submit("timeseries", {"account_id": account_id})
+        assert (again["id"], again["status"]) == (job_id, jobs.DONE)
+
+        _book(session, account_id, -20.0, datetime(2025, 1, 2, 9))
+        job, result = jobs.get(job_id, with_result=True)
+        assert job["status"] == jobs.STALE
+        assert result is None
+
+        fresh = jobs.submit("timeseries", {"account_id": account_id})
+        assert fresh["id"] != job_id
+        job, result = _wait(fresh["id"])
+        assert job["status"] == jobs.DONE
+        assert result["points"][-1] == {"day": "2025-01-02", "balance": 30.0}
+
+
+def test_all_accounts_result_goes_stale_with_a_new_account(app_engine):
+    with Session(app_engine) as session:
+        session.add(Account(name="Eins"))
+        session.commit()
+        job_id = jobs.submit("timeseries", {})["id"]
+        assert _wait(job_id)[0]["status"] == jobs.DONE
+
+        session.add(Account(name="Zwei"))
+        session.commit()
+        assert jobs.get(job_id)[0]["status"] == jobs.STALE
@@ -0,0 +1,45 @@
+"""LedgerWriter.commit: Reihenfolge der Statements gegenüber parallelen Writern."""
+from datetime import datetime
+
+from sqlalchemy import event
+from sqlalchemy.dialects import postgresql
+from sqlmodel import Session
+
+from backend.app.db import ledger
+from backend.app.db.ledger import LedgerWriter
+from backend.app.db.models import Account, TransactionCreate
+
+
+def test_accounts_are_locked_before_the_rollup_is_read(engine):
+    with Session(engine) as session:
+        accounts = [Account(name="B"), Account(name="A")]
+        session.add_all(accounts)
+        session.commit()
+        ids = [a.id for a in accounts]
+
+        statements = []
+        event.listen(engine, "before_cursor_execute", lambda conn, cursor, statement, *args: statements.append(statement))
+        writer = LedgerWriter(session)
+        for account_id in reversed(ids):
+            writer.create(TransactionCreate(account_id=account_id, amount=5.0, created_at=datetime(2025, 1, 1)))
+        writer.commit()
+
+    lock = next(i for i, s in enumerate(statements) if s.lstrip().startswith("SELECT account.id"))
+    rollup = next(i for i, s in enumerate(statements) if "dailybalance" in s)
+    assert lock < rollup
+    assert "ORDER BY account.id" in statements[lock]
+
+
+def test_lock_is_for_update_on_postgresql():
+    captured = []
+
+    class _Session:  # nimmt nur das Statement entgegen
+        def exec(self, statement):
+            captured.append(str(statement.compile(dialect=postgresql.dialect())))
+            return self
+
+        def all(self):
+            return []
+
+    ledger.lock_accounts(_Session(), {2, 1})
+    assert captured[0].endswith("ORDER BY account.id FOR UPDATE")
@@ -0,0 +1,112 @@
+"""Migrationen auf leeren und auf Datenbanken aus der Zeit vor der Versionierung."""
+from sqlalchemy import inspect
+from sqlmodel import Session, SQLModel, select
+
+from backend.app.db import migrations, rollups
+from backend.app.db.database import make_engine
+from backend.app.db.models import Transaction
+from backend.app.db.money import cents, to_cents
+
+# Schema, wie es init_db() vor den Indizes, dem Rollup und den Cent-Beträgen angelegt hat
+LEGACY_SCHEMA = (
+    'CREATE TABLE "user" (id INTEGER PRIMARY KEY, name VARCHAR NOT NULL, email VARCHAR NOT NULL)',
+    'CREATE TABLE account (id INTEGER PRIMARY KEY, name VARCHAR NOT NULL, currency VARCHAR NOT NULL)',
+    'CREATE TABLE category (id INTEGER PRIMARY KEY, name VARCHAR NOT NULL)',
+    'CREATE TABLE "transaction" (id INTEGER PRIMARY KEY, account_id INTEGER NOT NULL, amount FLOAT NOT NULL, '
+    'note VARCHAR NOT NULL, category_id INTEGER REFERENCES category (id), created_at DATETIME NOT NULL)',
+)
+
+
+def legacy_engine(path, transactions=()):
+    engine = make_engine(f"sqlite:///{path.as_posix()}")
+    with engine.begin() as conn:
+        for ddl in LEGACY_SCHEMA:
+            conn.exec_driver_sql(ddl)
+        conn.exec_driver_sql("INSERT INTO account (id, name, currency) VALUES (1, 'Giro', 'EUR')")
+        for amount, created_at in transactions:
+            conn.exec_driver_sql(
+                'INSERT INTO "transaction" (account_id, amount, note, created_at) VALUES (1, ?, \'\', ?)',
+                (amount, created_at),
+            )
+    return engine
+
+
+def _index_names(engine, table: str) -> set[str]:
+    return {index["name"] for index in inspect(engine).get_indexes(table)}
+
+
+def _model_indexes(table) -> set[str]:
+    # Dialektspezifische Indizes (GIN auf PostgreSQL) gibt es auf SQLite nicht
+    return {i.name for i in table.indexes if i.dialect_options["postgresql"].get("using") != "gin"}
+
+
+def test_migrated_schema_matches_models(engine):
+    """Schlägt fehl, wenn sich models.py ändert, ohne dass eine Migration dazukommt."""
+    inspector = inspect(engine)
+    tables = {name for name in inspector.get_table_names() if not name.startswith("transaction_fts")}
+    assert tables == set(SQLModel.metadata.tables)
+    for table in SQLModel.metadata.sorted_tables:
+        columns = {c["name"]: c["nullable"] for c in inspector.get_columns(table.name)}
+        assert columns == {c.name: c.nullable for c in table.columns}, table.name
+        assert _index_names(engine, table.name) == _model_indexes(table), table.name
+
+
+def test_empty_database_reaches_head(engine):
+    with engine.connect() as conn:
+        assert migrations.current_version(conn) == migrations.head()
+    assert migrations.upgrade(engine) == []
+
+
+def test_baseline_creates_only_frozen_indexes(tmp_path):
+    engine = legacy_engine(tmp_path / "legacy.db", [(12.5, "2024-01-01 10:00:00")])
+    migrations._apply(engine, migrations.MIGRATIONS[0])
+    created = _index_names(engine, "transaction") | _index_names(engine, "archivedtotal")
+    assert created == set(migrations.BASELINE_INDEXES)
+    engine.dispose()
+
+
+def test_legacy_database_gets_baseline_indexes(tmp_path):
+    engine = legacy_engine(tmp_path / "legacy.db")
+    assert migrations.upgrade(engine) == [m.version for m in migrations.MIGRATIONS]
+    assert set(migrations.BASELINE_INDEXES) - {"ix_archivedtotal_account_day"} <= _index_names(engine, "transaction")
+    assert "ix_archivedtotal_account_day" in _index_names(engine, "archivedtotal")
+    with Session(engine) as session:
+        assert migrations.current_version(session.connection()) == migrations.head()
+    engine.dispose()
+
+
+def test_float_amounts_become_exact_cents(tmp_path, monkeypatch):
+    monkeypatch.setattr(migrations, "CENTS_BATCH", 3)  # mehrere Blöcke
+    amounts = [0.1, 0.2, 19.99, -7.35, 1234.56, -0.01, 1.005, -0.125]
+    engine = legacy_engine(tmp_path / "legacy.db", [(a, f"2024-01-{i + 1:02d} 10:00:00") for i, a in enumerate(amounts)])
+    migrations.upgrade(engine)
+
+    with Session(engine) as session:
+        stored = session.exec(select(cents(Transaction.amount)).order_by(Transaction.id)).all()
+        # 1.005 wie money.to_cents (kaufmännisch), nicht wie ROUND(1.005 * 100) = 100
+        assert stored == [10, 20, 1999, -735, 123456, -1, 101, -13]
+        assert stored == [to_cents(a) for a in amounts]
+        # Das Rollup wird nach der Umstellung neu aufgebaut und summiert exakt
+        assert rollups.current_balance(session, 1) == 1248.37
+        assert rollups.daily_closings(session, 1)[1] == {"day": "2024-01-02", "balance": 0.3}
+    engine.dispose()
+
+
+def test_float_rollup_table_is_converted_and_rebuilt(tmp_path, monkeypatch):
+    # Stand nach dem Tages-Rollup, aber vor den Cent-Beträgen: dailybalance hat Gleitkommaspalten
+    monkeypatch.setattr(migrations, "CENTS_BATCH", 2)  # Keyset über den zusammengesetzten Schlüssel
+    engine = legacy_engine(tmp_path / "legacy.db", [(0.1, "2024-01-01 10:00:00"), (0.2, "2024-01-02 10:00:00"),
+                                                    (2.5, "2024-01-03 10:00:00")])
+    with engine.begin() as conn:
+        conn.exec_driver_sql("CREATE TABLE dailybalance (account_id INTEGER NOT NULL, day DATE NOT NULL, "
+                             "delta FLOAT NOT NULL, closing FLOAT NOT NULL, PRIMARY KEY (account_id, day))")
+        conn.exec_driver_sql("INSERT INTO dailybalance VALUES (1, '2024-01-01', 0.1, 0.1), "
+                             "(1, '2024-01-02', 0.2, 0.30000000000000004), (1, '2024-01-03', 2.5, 2.8000000000000003)")
+    migrations.upgrade(engine)
+    with Session(engine) as session:
+        assert rollups.daily_closings(session, 1) == [
+            {"day": "2024-01-01", "balance": 0.1},
+            {"day": "2024-01-02", "balance": 0.3},
+            {"day": "2024-01-03", "balance": 2.8},
+        ]
+    engine.dispose()
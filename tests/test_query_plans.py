@@ -0,0 +1,138 @@
+"""Prüft per EXPLAIN, ob die Report-Abfragen die Indizes der Transaktions-Tabelle nutzen.
+
+Jeder Endpunkt wird einmal direkt aufgerufen, alle SQL-Statements gegen die
+Tabelle "transaction" werden mitgeschnitten und anschließend mit EXPLAIN
+(QUERY PLAN) geprüft. Ein Full Table Scan lässt den Test fehlschlagen.
+
+Läuft gegen eine frisch migrierte SQLite-Datei und, wenn TEST_DATABASE_URL
+gesetzt ist, zusätzlich gegen eine leere PostgreSQL-Test-Datenbank.
+"""
+from datetime import date, datetime, timedelta
+
+import pytest
+from fastapi import Response
+from sqlalchemy import event
+from sqlmodel import Session
+
+from backend.app.api import accounts, dashboard, reports, transactions
+from backend.app.api.pagination import encode_cursor
+from backend.app.db import migrations, rollups, search
+from backend.app.db.database import make_engine
+from backend.app.db.models import Account, Category, Transaction
+
+from conftest import pg_engine_or_skip
+
+
+def _cursor() -> str:
+    # Cursor mitten in den Testdaten, damit auch die Keyset-Bedingung geprüft wird
+    return encode_cursor(datetime(2025, 2, 1), 1)
+
+
+def report_calls(account_id: int):
+    """Alle Abfragen der Lese-Endpunkte, die einen Index treffen müssen.
+
+    Die async-Routen führen dieselben synchronen Query-Helfer per run_sync aus.
+    """
+    start, end = reports._bounds(2025, 1, 12)
+    return {
+        "accounts.balance": lambda s: rollups.current_balance(s, account_id),
+        "accounts.balance.as_of": lambda s: rollups.balance_as_of(s, account_id, date(2025, 3, 15)),
+        "accounts.balances": lambda s: accounts._all_balances(s),
+        "accounts.timeseries": lambda s: rollups.daily_closings(s, account_id),
+        "accounts.timeseries.range": lambda s: rollups.daily_closings(s, account_id, date(2025, 1, 1), date(2025, 6, 30)),
+        "accounts.income_expense": lambda s: accounts._income_expense(s, account_id),
+        "reports.monthly": lambda s: reports._period_reports(s, account_id, 2025, 3, 1),
+        "reports.range.kpis": lambda s: reports._kpis(s, account_id, start, end),
+        "reports.range.by_category": lambda s: reports._spent_by_category(s, account_id, start, end),
+        "reports.chart_data.expense": lambda s: reports._chart_data(s, account_id, "expense"),
+        "reports.chart_data.income": lambda s: reports._chart_data(s, account_id, "income"),
+        "dashboard.overview": lambda s: dashboard._category_totals(s, account_id),
+        "transactions.list": lambda s: transactions.list_txs(Response(), cursor=_cursor(), limit=10, session=s),
+        "transactions.list.account": lambda s: transactions.list_txs(Response(), account_id=account_id, cursor=_cursor(), limit=10, session=s),
+        "transactions.filter.month": lambda s: transactions.filter_transactions(account_id, Response(), year=2025, month=3, cursor=None, limit=500, session=s),
+        "transactions.search": lambda s: search.search(s, ["plan"], limit=10),
+        "transactions.search.filtered": lambda s: search.search(
+            s, ["plan", "check"], account_id=account_id, start=start, end=end, limit=10),
+        "transactions.filter.year": lambda s: transactions.filter_transactions(account_id, Response(), year=2025, month=None, cursor=_cursor(), limit=10, session=s),
+    }
+
+
+CALLS = list(report_calls(0))
+
+
+def seed(engine) -> int:
+    """50 Buchungen auf einem Konto, ab 1.1.2025 alle drei Tage."""
+    with Session(engine) as session:
+        acc = Account(name="Plan-Check")
+        cat = Category(name="Plan-Check")
+        session.add(acc)
+        session.add(cat)
+        session.commit()
+        start = datetime(2025, 1, 1)
+        for i in range(50):
+            session.add(Transaction(
+                account_id=acc.id,
+                amount=(-1) ** i * (10 + i),
+                note="Plan-Check" if i % 5 == 0 else None,
+                category_id=cat.id if i % 3 else None,
+                created_at=start + timedelta(days=i * 3),
+            ))
+        session.commit()
+        return acc.id
+
+
+def capture_statements(engine, call):
+    """Führt call aus und liefert alle Statements, die "transaction" lesen."""
+    captured = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT") and "transaction" in statement:
+            captured.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        with Session(engine) as session:
+            call(session)
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+    return captured
+
+
+def explain(engine, statement, parameters) -> tuple[list[str], bool]:
+    """Liefert den Plan als Textzeilen und ob die Transaktions-Tabelle gescannt wird."""
+    with engine.connect() as conn:
+        if engine.dialect.name == "sqlite":
+            rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()
+            plan = [r[-1] for r in rows]
+            # "SEARCH ... USING INDEX" ist ein Index-Zugriff, "SCAN transaction"
+            # (auch "USING COVERING INDEX" ohne Suchbedingung) liest alles.
+            # (Die FTS-Tabelle transaction_fts zählt nicht, die sucht über ihren eigenen Index.)
+            full_scan = any(line.split()[:2] == ["SCAN", "transaction"] for line in plan)
+        else:
+            # Bei kleinen Tabellen wählt PostgreSQL sonst immer den Seq Scan.
+            conn.exec_driver_sql("SET enable_seqscan = off")
+            rows = conn.exec_driver_sql(f"EXPLAIN {statement}", parameters).all()
+            plan = [r[0] for r in rows]
+            full_scan = any('Seq Scan on "transaction"' in line or "Seq Scan on transaction" in line for line in plan)
+    return plan, full_scan
+
+
+@pytest.fixture(scope="module", params=["sqlite", "postgresql"])
+def seeded(request, tmp_path_factory):
+    """(engine, account_id) je Datenbank; einmal pro Modul befüllt."""
+    if request.param == "sqlite":
+        engine = make_engine(f"sqlite:///{(tmp_path_factory.mktemp('plans') / 'plans.db').as_posix()}")
+        migrations.upgrade(engine)
+    else:
+        engine = pg_engine_or_skip()
+    yield engine, seed(engine)
+    engine.dispose()
+
+
+@pytest.mark.parametrize("name", CALLS)
+def test_uses_index(seeded, name):
+    engine, account_id = seeded
+    statements = capture_statements(engine, report_calls(account_id)[name])
+    # Ohne Statements (z.B. Saldo und Zeitreihe aus dem Tages-Rollup) gibt es nichts zu prüfen
+    scans = [plan for plan, full_scan in (explain(engine, s, p) for s, p in statements) if full_scan]
+    assert not scans, f"{name}: Full Table Scan\n" + "\n\n".join("\n".join(plan) for plan in scans)
@@ -0,0 +1,143 @@
+"""Das Tages-Rollup (DailyBalance) muss nach jedem Schreibzugriff dem Ergebnis von rollups.rebuild entsprechen."""
+import random
+from datetime import date, datetime, timedelta
+
+from sqlmodel import Session, select
+
+from backend.app.db import archive, rollups
+from backend.app.db.ledger import LedgerWriter
+from backend.app.db.models import Account, DailyBalance, Transaction, TransactionCreate
+
+
+def _account(session: Session) -> int:
+    account = Account(name="Rollup")
+    session.add(account)
+    session.commit()
+    return account.id
+
+
+def _book(session: Session, account_id: int, amount: float, when: datetime) -> Transaction:
+    writer = LedgerWriter(session)
+    tx = writer.create(TransactionCreate(account_id=account_id, amount=amount, created_at=when))
+    writer.commit()
+    return tx
+
+
+def _rows(session: Session) -> list[tuple]:
+    return [tuple(r) for r in session.exec(
+        select(DailyBalance.account_id, DailyBalance.day, DailyBalance.delta, DailyBalance.closing)
+        .order_by(DailyBalance.account_id, DailyBalance.day)
+    ).all()]
+
+
+def assert_matches_rebuild(session: Session, context: str = "") -> None:
+    """Vergleicht das gepflegte Rollup mit einem Neuaufbau; der Neuaufbau wird wieder verworfen."""
+    maintained = _rows(session)
+    rollups.rebuild(session)
+    rebuilt = _rows(session)
+    session.rollback()
+    assert maintained == rebuilt, context
+
+
+def test_delete_late_booking_keeps_archived_day(engine, archive_dir):
+    with Session(engine) as session:
+        account_id = _account(session)
+        _book(session, account_id, 100.0, datetime(2024, 1, 5, 9))
+        _book(session, account_id, -20.0, datetime(2024, 1, 6, 9))
+        archive.archive_account(session, account_id, date(2024, 2, 1))
+
+        late = _book(session, account_id, -5.0, datetime(2024, 1, 6, 18))
+        writer = LedgerWriter(session)
+        writer.delete(session.get(Transaction, late.id))
+        writer.commit()
+
+        assert rollups.daily_closings(session, account_id) == [
+            {"day": "2024-01-05", "balance": 100.0},
+            {"day": "2024-01-06", "balance": 80.0},
+        ]
+        assert rollups.balance_as_of(session, account_id, date(2024, 1, 6)) == 80.0
+        assert_matches_rebuild(session)
+
+
+def test_random_writes_match_rebuild(engine, archive_dir):
+    rng = random.Random(14)
+    start = datetime(2024, 1, 1)
+    with Session(engine) as session:
+        accounts = [_account(session) for _ in range(2)]
+        cutoffs = {account_id: date(2024, 1, 1) for account_id in accounts}
+
+        for step in range(200):
+            live = session.exec(select(Transaction)).all()
+            op = rng.choices(["create", "update", "delete", "archive"], weights=[6, 2, 2, 1])[0]
+            if op in ("update", "delete") and not live:
+                op = "create"
+
+            writer = LedgerWriter(session)
+            if op == "create":
+                for _ in range(rng.randint(1, 3)):
+                    # Auch späte Buchungen in bereits archivierten Monaten
+                    when = start + timedelta(days=rng.randint(0, 180), hours=rng.randint(0, 23))
+                    amount = round(rng.uniform(-200, 200), 2)
+                    writer.create(TransactionCreate(account_id=rng.choice(accounts), amount=amount, created_at=when))
+                writer.commit()
+            elif op == "update":
+                tx = rng.choice(live)
+                writer.update(tx, round(rng.uniform(-200, 200), 2), tx.note, tx.category_id)
+                writer.commit()
+            elif op == "delete":
+                for tx in rng.sample(live, min(len(live), rng.randint(1, 2))):
+                    writer.delete(tx)
+                writer.commit()
+            else:
+                account_id = rng.choice(accounts)
+                month = cutoffs[account_id].month + 1
+                if month <= 6:
+                    cutoffs[account_id] = date(2024, month, 1)
+                    archive.archive_account(session, account_id, cutoffs[account_id])
+
+            assert_matches_rebuild(session, f"Schritt {step}: {op}")
+
+
+def test_balance_as_of_equals_sum_of_bookings(engine, archive_dir):
+    rng = random.Random(18)
+    start = datetime(2024, 1, 1)
+    with Session(engine) as session:
+        account_id = _account(session)
+        writer = LedgerWriter(session)
+        for _ in range(120):
+            when = start + timedelta(days=rng.randint(0, 89), hours=rng.randint(0, 23))
+            writer.create(TransactionCreate(account_id=account_id, amount=round(rng.uniform(-100, 100), 2), created_at=when))
+        writer.commit()
+        # Rückdatiert ändern und löschen, dann die ersten zwei Monate archivieren
+        live = session.exec(select(Transaction)).all()
+        writer = LedgerWriter(session)
+        for tx in live[:10]:
+            writer.update(tx, round(rng.uniform(-100, 100), 2), tx.note, tx.category_id)
+        for tx in live[10:20]:
+            writer.delete(tx)
+        writer.commit()
+        bookings = [(tx.created_at.date(), tx.amount) for tx in session.exec(select(Transaction)).all()]
+        archive.archive_account(session, account_id, date(2024, 3, 1))
+
+        for offset in range(-1, 92):
+            day = date(2024, 1, 1) + timedelta(days=offset)
+            expected = sum(round(amount * 100) for booked, amount in bookings if booked <= day) / 100
+            assert rollups.balance_as_of(session, account_id, day) == expected, day
+
+
+def test_zero_net_days_keep_their_row(engine):
+    with Session(engine) as session:
+        account_id = _account(session)
+        _book(session, account_id, 0.0, datetime(2025, 1, 1, 9))
+        writer = LedgerWriter(session)
+        writer.create(TransactionCreate(account_id=account_id, amount=25.0, created_at=datetime(2025, 1, 2, 9)))
+        writer.create(TransactionCreate(account_id=account_id, amount=-25.0, created_at=datetime(2025, 1, 2, 18)))
+        writer.commit()
+        _book(session, account_id, 10.0, datetime(2025, 1, 3, 9))
+
+        assert rollups.daily_closings(session, account_id) == [
+            {"day": "2025-01-01", "balance": 0.0},
+            {"day": "2025-01-02", "balance": 0.0},
+            {"day": "2025-01-03", "balance": 10.0},
+        ]
+        assert_matches_rebuild(session)